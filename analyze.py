@@ -32,7 +32,7 @@
 #    text where the choices are way less than the number of rows -> max length text choice field
 #    highly deviant text (excluding blanks) -> text field
 
-# LIMITATION: memory must be enough to ingest the CSV file to analyze
+# Relation files are streamed; memory use depends on the number of distinct values per column, not the row count.
 
 from pytrackdat.analysis import main
 
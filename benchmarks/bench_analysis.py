@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+
+# PyTrackDat is a utility for assisting in online database creation.
+# Copyright (C) 2018-2020 the PyTrackDat authors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Contact information:
+# Measures the throughput and peak memory use of the analysis engine on synthetic data (see benchmarks.datasets):
+# infer_column_type on each kind of column, and a full analysis of a relation file with one column of each kind, at
+# sizes from --min-rows to --max-rows in powers of 10. Results can be saved as a baseline and compared against later,
+# so that performance regressions (or changes in the types detected) show up as differences.
+#
+# Usage (from the repository root):
+#     python -m benchmarks.bench_analysis [--max-rows 10000000] [--baseline benchmarks/baseline.json]
+#     python -m benchmarks.bench_analysis --save-baseline benchmarks/baseline.json
+
+import argparse
+import io
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+
+from contextlib import redirect_stdout
+from typing import Callable, Dict, List
+
+from pytrackdat.analysis import (
+    create_relation_design_file_rows,
+    find_relation_keys,
+    infer_column_type,
+    profile_relation_file,
+)
+
+from .datasets import COLUMN_KINDS, generate_column, write_relation_file
+
+
+# A benchmark is reported as a regression if its throughput drops by more than this fraction
+REGRESSION_THRESHOLD = 0.2
+
+# Fast benchmarks are repeated (up to MAX_REPEATS times) until they have taken MIN_TOTAL_SECONDS, to reduce noise
+MAX_REPEATS = 7
+MIN_TOTAL_SECONDS = 0.5
+
+
+def measure(fn: Callable, memory: bool = True) -> Dict:
+    """
+    Times fn, taking the best of several runs for fast functions, and then runs it once more under tracemalloc for its
+    peak memory use if requested (tracing slows Python down too much to do both at once.) Returns the timing, peak
+    memory and fn's result.
+    """
+
+    timings = []
+    while len(timings) < MAX_REPEATS and sum(timings) < MIN_TOTAL_SECONDS:
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+
+    seconds = min(timings)
+
+    peak_memory = None
+    if memory:
+        tracemalloc.start()
+        fn()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {"seconds": seconds, "peak_memory": peak_memory, "result": result}
+
+
+def bench_infer_column_type(kind: str, rows: int, memory: bool) -> Dict:
+    col = generate_column(kind, rows)
+    # Only allow key detection for the key column, as a real analysis would once the relation's key is known
+    keys = None if kind == "key" else {}
+    m = measure(lambda: infer_column_type("bench", kind, col, keys)["detected_type"], memory)
+    return {"benchmark": "infer_column_type", "kind": kind, "rows": rows, "seconds": m["seconds"],
+            "peak_memory": m["peak_memory"], "detected_type": m["result"]}
+
+
+def _analyze_relation_file(rf: str) -> List[str]:
+    with redirect_stdout(io.StringIO()):
+        fields, profiles = profile_relation_file(rf)
+        keys = find_relation_keys([("bench", fields, profiles)])
+        rows = create_relation_design_file_rows("bench", fields, profiles, keys)
+    return [r[2] for r in rows[1:-1]]
+
+
+def bench_relation(rows: int, memory: bool) -> Dict:
+    with tempfile.TemporaryDirectory() as td:
+        rf = os.path.join(td, "bench.csv")
+        write_relation_file(rf, rows)
+        m = measure(lambda: _analyze_relation_file(rf), memory)
+
+    return {"benchmark": "analyze_relation_file", "kind": "all", "rows": rows, "seconds": m["seconds"],
+            "peak_memory": m["peak_memory"], "detected_type": ", ".join(m["result"])}
+
+
+def run_benchmarks(min_rows: int, max_rows: int, kinds: List[str], memory: bool = True) -> List[Dict]:
+    results = []
+
+    rows = min_rows
+    while rows <= max_rows:
+        for kind in kinds:
+            results.append(bench_infer_column_type(kind, rows, memory))
+            print_result(results[-1])
+
+        results.append(bench_relation(rows, memory))
+        print_result(results[-1])
+
+        rows *= 10
+
+    for r in results:
+        r["rows_per_second"] = r["rows"] / r["seconds"] if r["seconds"] > 0 else None
+
+    return results
+
+
+def print_result(r: Dict) -> None:
+    print("{benchmark:>22} {kind:>17} {rows:>9} {seconds:>9.3f}s {peak:>9} KiB  {detected_type}".format(
+        peak="-" if r["peak_memory"] is None else r["peak_memory"] // 1024, **r))
+
+
+def _result_key(r: Dict):
+    return r["benchmark"], r["kind"], r["rows"]
+
+
+def compare_to_baseline(results: List[Dict], baseline: Dict, threshold: float = REGRESSION_THRESHOLD) -> int:
+    """
+    Prints how each result compares to the same benchmark in the baseline, returning the number of regressions.
+    """
+
+    baseline_results = {_result_key(r): r for r in baseline["results"]}
+    regressions = 0
+
+    print("\nCompared to baseline ({}, {}):".format(baseline["python_version"], baseline["platform"]))
+
+    for r in results:
+        b = baseline_results.get(_result_key(r))
+        if b is None or not b["rows_per_second"] or not r["rows_per_second"]:
+            continue
+
+        ratio = r["rows_per_second"] / b["rows_per_second"]
+        notes = []
+        if ratio < 1 - threshold:
+            notes.append("REGRESSION")
+            regressions += 1
+        if b["detected_type"] != r["detected_type"]:
+            notes.append("detected type changed from '{}'".format(b["detected_type"]))
+        if b["peak_memory"] and r["peak_memory"] and r["peak_memory"] > b["peak_memory"] * (1 + threshold):
+            notes.append("peak memory up {:.0%}".format(r["peak_memory"] / b["peak_memory"] - 1))
+
+        print("{:>22} {:>17} {:>9}  {:>6.2f}x throughput  {}".format(*_result_key(r), ratio, "; ".join(notes)))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_analysis")
+    parser.add_argument("--min-rows", type=int, default=1000)
+    parser.add_argument("--max-rows", type=int, default=100000,
+                        help="Largest number of rows to benchmark (default: 100000; up to 10000000 is supported, "
+                             "given enough memory and time.)")
+    parser.add_argument("--kinds", nargs="+", choices=tuple(COLUMN_KINDS), default=list(COLUMN_KINDS),
+                        help="Column kinds to benchmark infer_column_type on (default: all.)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip measuring peak memory use.")
+    parser.add_argument("--baseline", help="Baseline results to compare against.")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="Fraction by which throughput must drop to count as a regression (default: {}.)".format(
+                            REGRESSION_THRESHOLD))
+    parser.add_argument("--save-baseline", metavar="PATH", help="Save the results as a baseline.")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.min_rows, args.max_rows, args.kinds, not args.no_memory)
+
+    regressions = 0
+    if args.baseline:
+        with open(args.baseline, "r") as bf:
+            regressions = compare_to_baseline(results, json.load(bf), args.threshold)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as bf:
+            json.dump({
+                "python_version": platform.python_version(),
+                "platform": platform.platform(),
+                "results": [{k: round(v, 6) if isinstance(v, float) else v for k, v in r.items()} for r in results],
+            }, bf, indent=2, sort_keys=True)
+            bf.write("\n")
+
+    exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
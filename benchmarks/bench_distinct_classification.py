@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+# PyTrackDat is a utility for assisting in online database creation.
+# Copyright (C) 2018-2020 the PyTrackDat authors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Contact information:
+#     David Lougheed (david.lougheed@gmail.com)
+
+# Compares classifying every row of a column against classifying each distinct value once (weighted by its count),
+# which is what infer_column_type does. The gap grows as the ratio of rows to distinct values grows.
+#
+# Usage (from the repository root): python -m benchmarks.bench_distinct_classification [rows]
+
+import random
+import sys
+import time
+
+from pytrackdat.analysis import infer_column_type
+from pytrackdat.analysis.profile import ColumnSummary
+
+
+def per_row_classification(col):
+    summary = ColumnSummary()
+    for v in col:
+        summary.add(str(v).strip())
+    return summary
+
+
+def time_call(fn, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    rng = random.Random(1)
+
+    print("{:>10} {:>10} {:>12} {:>12} {:>8}".format("rows", "distinct", "per-row (s)", "distinct (s)", "speedup"))
+
+    for distinct in (2, 20, 2000, rows // 10):
+        pool = ["{}-{:02d}-{:02d}".format(2000 + i % 20, i % 12 + 1, i % 28 + 1) if i % 2 else str(i)
+                for i in range(distinct)]
+        col = [rng.choice(pool) for _ in range(rows)]
+
+        t_row = time_call(per_row_classification, col)
+        t_distinct = time_call(infer_column_type, "bench", "col", col, {})
+
+        print("{:>10} {:>10} {:>12.3f} {:>12.3f} {:>7.1f}x".format(
+            rows, distinct, t_row, t_distinct, t_row / t_distinct))
+
+
+if __name__ == "__main__":
+    main()
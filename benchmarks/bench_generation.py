@@ -0,0 +1,136 @@
+# PyTrackDat is a utility for assisting in online database creation.
+# Copyright (C) 2018-2020 the PyTrackDat authors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Contact information:
+#     David Lougheed (david.lougheed@gmail.com)
+# Measures the time and peak memory use of site code generation on synthetic design files: parsing the design file
+# and generating the admin, models and API code, for designs of 10 relations up to --relations relations (in powers of
+# 10) with --fields fields each. Time and memory per field should stay roughly constant as designs grow.
+#
+# Usage (from the repository root):
+#     python -m benchmarks.bench_generation [--relations 1000] [--fields 50]
+
+import argparse
+import csv
+import io
+
+from contextlib import redirect_stdout
+from typing import Dict, List
+
+from pytrackdat.generation import create_admin, create_api, create_models, design_to_relations
+
+from .bench_analysis import measure
+
+
+DESIGN_HEADERS = ("new field name", "data type", "nullable?", "null values", "default", "description",
+                  "show in table?", "additional fields...")
+
+# Data types (with their additional settings) cycled through for each relation's non-key fields
+FIELD_KINDS = (
+    ("integer", ()),
+    ("decimal", ("8", "2")),
+    ("boolean", ()),
+    ("text", ("64",)),
+    ("text", ("5", "adult; juvenile; larva; egg; unknown")),
+    ("date", ("%Y-%m-%d",)),
+    ("float", ()),
+    ("text", ()),
+)
+
+
+def generate_design(relations: int, fields: int) -> str:
+    """
+    Generates a design file with the given number of relations, each with an automatic key, a foreign key to the
+    previous relation (if any) and fields of each kind in FIELD_KINDS, for the given number of fields in total.
+    """
+
+    df = io.StringIO()
+    writer = csv.writer(df)
+
+    for r in range(relations):
+        writer.writerow(("relation_{}".format(r), *DESIGN_HEADERS))
+        writer.writerow(("ID", "id", "auto key", "false", "", "", "Key", "true"))
+
+        if r > 0:
+            writer.writerow(("Parent", "parent", "foreign key", "true", "", "", "Parent", "true",
+                             "relation_{}".format(r - 1)))
+
+        for f in range(fields - (2 if r > 0 else 1)):
+            data_type, additional_fields = FIELD_KINDS[f % len(FIELD_KINDS)]
+            writer.writerow(("Field {}".format(f), "field_{}".format(f), data_type, "true" if f % 3 else "false",
+                             "", "", "Field {} of relation {}".format(f, r), "true" if f < 5 else "false",
+                             *additional_fields))
+
+        writer.writerow(())
+
+    return df.getvalue()
+
+
+def _generate(design: str) -> int:
+    with redirect_stdout(io.StringIO()):
+        relations = design_to_relations(io.StringIO(design), False)
+        return sum(len(buf.getvalue()) for buf in (
+            create_admin(relations, "bench_site", False),
+            create_models(relations, False),
+            create_api(relations, "bench_site", False),
+        ))
+
+
+def _parse(design: str) -> int:
+    with redirect_stdout(io.StringIO()):
+        return len(design_to_relations(io.StringIO(design), False))
+
+
+def run_benchmarks(max_relations: int, fields: int, memory: bool = True) -> List[Dict]:
+    results = []
+
+    relations = 10
+    while relations <= max_relations:
+        design = generate_design(relations, fields)
+
+        for benchmark, fn in (("design_to_relations", _parse), ("generate_code", _generate)):
+            m = measure(lambda: fn(design), memory)
+            results.append({"benchmark": benchmark, "relations": relations, "fields": relations * fields,
+                            "seconds": m["seconds"], "peak_memory": m["peak_memory"]})
+            print_result(results[-1])
+
+        relations *= 10
+
+    return results
+
+
+def print_result(r: Dict) -> None:
+    print("{benchmark:>20} {relations:>6} relations {fields:>8} fields {seconds:>8.3f}s {us:>8.1f} us/field "
+          "{peak:>9} KiB {bpf:>7} B/field".format(
+              us=r["seconds"] * 1000000 / r["fields"],
+              peak="-" if r["peak_memory"] is None else r["peak_memory"] // 1024,
+              bpf="-" if r["peak_memory"] is None else r["peak_memory"] // r["fields"],
+              **r))
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_generation")
+    parser.add_argument("--relations", type=int, default=1000,
+                        help="Largest number of relations to benchmark (default: 1000.)")
+    parser.add_argument("--fields", type=int, default=50, help="Number of fields per relation (default: 50.)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip measuring peak memory use.")
+    args = parser.parse_args()
+
+    run_benchmarks(args.relations, args.fields, not args.no_memory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+# PyTrackDat is a utility for assisting in online database creation.
+# Copyright (C) 2018-2020 the PyTrackDat authors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Contact information:
+# Seeded generators of synthetic relation data, with one column kind for each kind of value the analyzer handles.
+# The same seed always gives the same data, so benchmark results can be compared between runs.
+
+import csv
+import random
+import string
+
+from typing import Callable, List, Tuple
+
+
+__all__ = [
+    "COLUMN_KINDS",
+    "generate_column",
+    "generate_relation",
+    "write_relation_file",
+]
+
+
+ENUM_CHOICES = ("adult", "juvenile", "larva", "egg", "unknown", "pupa", "nymph", "imago")
+
+
+def _words(n: int) -> Tuple[str, ...]:
+    rng = random.Random(0)
+    return tuple("".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 9))) for _ in range(n))
+
+
+WORDS = _words(2000)
+
+
+def _integer(rng: random.Random, n: int) -> List[str]:
+    return [str(rng.randint(-1000000, 1000000)) for _ in range(n)]
+
+
+def _human_integer(rng: random.Random, n: int) -> List[str]:
+    return ["{:,}".format(rng.randint(1000, 1000000000)) for _ in range(n)]
+
+
+def _decimal(rng: random.Random, n: int) -> List[str]:
+    return ["{:.2f}".format(rng.uniform(-500, 500)) for _ in range(n)]
+
+
+def _float(rng: random.Random, n: int) -> List[str]:
+    return ["{:.4e}".format(rng.uniform(-1, 1) * 10 ** rng.randint(-20, 20)) for _ in range(n)]
+
+
+def _date(fmt: str) -> Callable[[random.Random, int], List[str]]:
+    def _gen(rng: random.Random, n: int) -> List[str]:
+        return [fmt.format(y=rng.randint(1950, 2020), m=rng.randint(1, 12), d=rng.randint(1, 28)) for _ in range(n)]
+    return _gen
+
+
+def _time(rng: random.Random, n: int) -> List[str]:
+    return ["{:02d}:{:02d}".format(rng.randint(0, 23), rng.randint(0, 59)) for _ in range(n)]
+
+
+def _boolean(rng: random.Random, n: int) -> List[str]:
+    return [rng.choice(("yes", "no")) for _ in range(n)]
+
+
+def _enum(rng: random.Random, n: int) -> List[str]:
+    return [rng.choice(ENUM_CHOICES) for _ in range(n)]
+
+
+def _text(rng: random.Random, n: int) -> List[str]:
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 12))) for _ in range(n)]
+
+
+def _key(rng: random.Random, n: int) -> List[str]:
+    ids = ["S-{:08d}".format(i) for i in range(n)]
+    rng.shuffle(ids)
+    return ids
+
+
+COLUMN_KINDS = {
+    "integer": _integer,
+    "human_integer": _human_integer,
+    "decimal": _decimal,
+    "float": _float,
+    "date_ymd_dashes": _date("{y}-{m:02d}-{d:02d}"),
+    "date_ymd_slashes": _date("{y}/{m}/{d}"),
+    "date_dmy_dashes": _date("{d:02d}-{m:02d}-{y}"),
+    "date_dmy_slashes": _date("{d}/{m}/{y}"),
+    "time": _time,
+    "boolean": _boolean,
+    "enum": _enum,
+    "text": _text,
+    "key": _key,
+}
+
+
+def generate_column(kind: str, n: int, seed: int = 1) -> List[str]:
+    return COLUMN_KINDS[kind](random.Random("{}:{}".format(kind, seed)), n)
+
+
+def generate_relation(n: int, seed: int = 1) -> Tuple[Tuple[str, ...], List[List[str]]]:
+    """
+    Generates a relation with one column of each kind (the key first), returning its fields and its columns.
+    """
+
+    fields = ("key",) + tuple(k for k in COLUMN_KINDS if k != "key")
+    return fields, [generate_column(k, n, seed) for k in fields]
+
+
+def write_relation_file(path: str, n: int, seed: int = 1) -> Tuple[str, ...]:
+    fields, columns = generate_relation(n, seed)
+
+    with open(path, "w", newline="", encoding="utf-8") as rf:
+        writer = csv.writer(rf)
+        writer.writerow(fields)
+        writer.writerows(zip(*columns))
+
+    return fields
@@ -0,0 +1,993 @@
+# PyTrackDat is a utility for assisting in online database creation.
+# Copyright (C) 2018-2020 the PyTrackDat authors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Contact information:
+#     David Lougheed (david.lougheed@gmail.com)
+
+# To lowercase
+# Replace whitespace with underline
+# Analyze domain and find out:
+#    integer with one other value -> nullable integer
+#    integer with no other value -> integer
+#    decimal with constant digits -> decimal (max: length plus 2)
+#    y/n, t/f, true/false -> boolean
+#    y/n/u, y/n/blank, etc. -> nullable boolean
+#    mm/dd/yyyy, dd/mm/yyyy, yyyy-mm-dd -> date (if ONE other value that doesn't match, nullable) TODO
+#    HH:MM pm, HH:MMpm, HH:MM, etc -> time (if ONE other value that doesn't match, nullable) TODO
+#    text where the choices are way less than the number of rows -> max length text choice field
+#    highly deviant text (excluding blanks) -> text field
+
+# Relation files are streamed; memory use depends on the number of distinct values per column, not the row count.
+
+import argparse
+import csv
+import io
+import sys
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from itertools import islice
+
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from ..common import *
+from ..profiling import phase, profile_run
+from .cache import ProfileCache, ProfileStore, DEFAULT_CACHE_DIRECTORY
+from .chunks import *
+from .columnar import *
+from .foreign_keys import *
+from .distinct import *
+from .profile import ColumnProfile, ColumnSummary, DEFAULT_DISTINCT_CAP
+from .relation_files import *
+from .sampling import *
+from .tables import *
+
+
+__all__ = [
+    "ColumnProfile",
+    "EncodedColumn",
+    "ColumnarRelation",
+    "read_relation_columns",
+    "infer_column_type",
+    "infer_column_type_from_profile",
+    "create_design_file_rows_from_inference",
+    "profile_relation_file",
+    "profile_relation_chunk",
+    "profile_relations",
+    "column_is_unique",
+    "verify_relation_keys",
+    "sample_relations",
+    "profile_table",
+    "analyze_relations",
+    "main",
+]
+
+
+ALTERNATE_THRESHOLD = 0.5
+MAX_CHOICES = 16
+MAX_CHOICE_LENGTH = 24
+CHAR_FIELD_MAX_LENGTH = 48
+CHAR_FIELD_LENGTH = 128
+
+# Number of rows transposed into columns at a time while profiling a relation file
+PROFILE_BATCH_SIZE = 8192
+
+# Smallest number of distinct values kept per column when a memory limit is set; enough to detect choices
+MIN_DISTINCT_CAP = 1024
+
+# Number of byte ranges each relation file is split into per worker process when profiling in parallel
+CHUNKS_PER_JOB = 4
+
+
+def infer_column_type(
+    relation: str,
+    name: str,
+    col: Union[Sequence[str], EncodedColumn],
+    keys: Optional[Dict[str, Tuple[str, Sequence]]] = None
+) -> Dict:
+    profile = ColumnProfile()
+    if isinstance(col, EncodedColumn):
+        profile.update_encoded(col)
+    else:
+        profile.update(col)
+    return infer_column_type_from_profile(relation, name, profile, keys)
+
+
+def infer_column_type_from_profile(
+    relation: str,
+    name: str,
+    profile: ColumnProfile,
+    keys: Optional[Dict[str, Tuple[str, Sequence]]] = None
+) -> Dict:
+    detected_type = "unknown"
+    nullable = False
+    null_values = []
+    choices = []
+    max_length = -1
+    is_key = False
+    include_alternate = False
+    fmt = None
+
+    summary = profile.summary()
+
+    n_rows = summary.rows
+
+    integer_values = summary.integer_values
+    decimal_values = summary.decimal_values
+    float_values = summary.float_values
+
+    integer_values_set = summary.integer_values_set
+
+    all_values = profile.value_counts.keys()
+    all_values_counts = profile.value_counts
+
+    date_values = summary.date_values
+    time_values = summary.time_values
+
+    non_numeric_values = summary.non_numeric_values
+    other_values = summary.other_values
+
+    max_seen_length = summary.max_seen_length
+    max_seen_decimals = summary.max_seen_decimals
+
+    # Keys:
+    #  - If keys aren't specified or this field is in fact the key, allow the key type to be inferred.
+
+    if profile.is_unique() and "" not in all_values and (keys is None or
+                                                         keys.get(relation, (None, None))[0] == name):
+        detected_type = DT_MANUAL_KEY
+        nullable = False
+        is_key = True
+
+    # TODO: Infer foreign keys for non-integers??? When do we infer foreign keys vs. ints?
+
+    # Integers:
+
+    elif integer_values == n_rows:
+        detected_type = DT_INTEGER
+        nullable = False
+
+    elif integer_values > 0 and len(non_numeric_values) == 1 and decimal_values == 0 \
+            and not (len(integer_values_set) == 2 and 0 in integer_values_set and 1 in integer_values_set):
+        detected_type = DT_INTEGER
+        nullable = True
+        # TODO: DO WE WANT NULL VALUES HERE?
+
+    elif integer_values > 0 and len(non_numeric_values) > 1 and ((integer_values / n_rows) >= ALTERNATE_THRESHOLD):
+        detected_type = DT_INTEGER
+        nullable = True
+        include_alternate = True
+
+    # Decimals: TODO: more
+
+    elif decimal_values > 0 and len(non_numeric_values) in (0, 1):
+        # Integer or decimal values -> use a decimal field.
+        # TODO: Find number of digits!!!
+        detected_type = DT_DECIMAL
+        nullable = (len(non_numeric_values) == 1)
+        max_length = max_seen_length + max_seen_decimals + 4
+
+    # Floats: TODO: more
+
+    elif float_values > 0 and len(non_numeric_values) in (0, 1):
+        # Integer, decimal or float values in column -> use a float field.
+        detected_type = DT_FLOAT
+        nullable = (len(non_numeric_values) == 1)
+
+    # Dates:
+
+    elif date_values == n_rows:
+        detected_type = DT_DATE
+        nullable = False
+
+    elif date_values > 0 and len(other_values) == 1:
+        detected_type = DT_DATE
+        nullable = True
+        null_values = list(other_values)[0]
+
+    # Times:
+
+    elif time_values == n_rows:
+        detected_type = DT_TIME
+        nullable = False
+
+    elif time_values > 0 and len(other_values) == 1:
+        detected_type = DT_TIME
+        nullable = True
+        null_values = list(other_values)[0]
+
+    # Enums:
+
+    elif (len([a for a in all_values if a.strip() != ""]) < MAX_CHOICES and max_seen_length < MAX_CHOICE_LENGTH and
+          sum(v for a, v in all_values_counts.items() if a.strip() != "") >= 2 * len(all_values)):
+        detected_type = DT_TEXT
+        nullable = ("" in all_values)
+        choices = sorted(all_values)
+        in_choices = {c.lower() for c in choices}
+        max_length = max_seen_length * 2
+
+        # Booleans:
+        if (len(choices) == 2 or (len(choices) == 3 and nullable)) and any(tv in in_choices and fv in in_choices
+                                                                           for tv, fv in BOOLEAN_TF_PAIRS):
+            detected_type = DT_BOOLEAN
+            null_values = [c for c in choices if c.lower() not in BOOLEAN_TRUE_VALUES + BOOLEAN_FALSE_VALUES]
+
+    # Text
+
+    # TODO: I don't like this logic
+
+    elif integer_values < max(n_rows / 10, 10) or len(non_numeric_values) >= 10:
+        detected_type = DT_TEXT
+        nullable = False
+        if max_seen_length <= CHAR_FIELD_MAX_LENGTH and "note" not in name and "comment" not in name:
+            max_length = CHAR_FIELD_LENGTH
+
+    if detected_type == DT_DATE:
+        fmt = ColumnSummary.dominant_format(summary.date_formats)
+    elif detected_type == DT_TIME:
+        fmt = ColumnSummary.dominant_format(summary.time_formats)
+
+    return {
+        "detected_type": detected_type,
+        "nullable": nullable,
+        "null_values": tuple(null_values),
+        "choices": tuple(choices),
+        "max_length": max_length,
+        "is_key": is_key,
+        "include_alternate": include_alternate,
+        "format": fmt,
+
+        "max_seen_decimals": max_seen_decimals
+    }
+
+
+def create_design_file_rows_from_inference(old_name: str, new_name: str, inference: Dict) -> List[List[str]]:
+    f_type = inference["detected_type"]
+
+    choices = (inference["choices"] if len(inference["choices"]) > 0 and inference["detected_type"] != DT_BOOLEAN
+               else None)
+
+    inferred_field = RelationField(
+        csv_names=(old_name,),  # Old CSV / field name(s)
+        name=new_name,  # New field name (in database)
+        data_type=f_type,  # Detected data type
+        nullable=inference["nullable"],  # Whether the field is nullable
+        null_values=inference["null_values"],  # What value(s) will become null in the database
+        default="",  # The default value for the field (optional, null/blank if left empty)
+        description="!fill me in!",  # Field description
+        show_in_table=(f_type not in {DT_TEXT, *GIS_DATA_TYPES} or
+                       (f_type == DT_TEXT and (len(inference["choices"]) > 0 or inference["max_length"] > 0))),
+        additional_fields=(
+            # IF DECIMAL: Max length and decimal placement:
+            *((inference["max_length"], inference["max_seen_decimals"]) if inference["detected_type"] == DT_DECIMAL
+              else ()),
+            # IF TEXT/ENUM: Max length:
+            *((inference["max_length"],) if inference["detected_type"] == DT_TEXT and inference["max_length"] > 0
+              else ()),
+            # IF ENUM: Choices:
+            *(("{} ".format(DESIGN_SEPARATOR).join(choices),) if choices is not None else ()),
+            # IF DATE/TIME: Dominant format:
+            *((inference["format"],) if inference["detected_type"] in (DT_DATE, DT_TIME) and inference["format"]
+              else ()),
+            # IF FOREIGN KEY: Target relation:
+            *((inference["foreign_key_target"],) if inference["detected_type"] == DT_FOREIGN_KEY else ()),
+        ),
+        choices=choices,  # Not used here?
+    )
+
+    design_file_rows = [inferred_field.as_design_file_row()]
+    if inference["include_alternate"]:
+        design_file_rows.append(inferred_field.make_alternate().as_design_file_row())
+
+    return design_file_rows
+
+
+def _profile_rows(rows, n_fields: int, columns: Optional[Sequence[int]] = None,
+                  distinct_cap: int = DEFAULT_DISTINCT_CAP) -> List[ColumnProfile]:
+    columns = tuple(range(n_fields)) if columns is None else tuple(columns)
+    profiles = [ColumnProfile(distinct_cap) for _ in columns]
+
+    while True:
+        batch = list(islice(rows, PROFILE_BATCH_SIZE))
+        if not batch:
+            break
+
+        batch_columns = tuple(zip(*batch))
+        for p, c in zip(profiles, columns):
+            p.update(batch_columns[c])
+
+    return profiles
+
+
+def profile_relation_file(rf, columns: Optional[Sequence[int]] = None, distinct_cap: int = DEFAULT_DISTINCT_CAP) \
+        -> Tuple[Tuple[str, ...], List[ColumnProfile]]:
+    """
+    Reads a relation file once, row by row, accumulating a profile for each of its columns. If a sequence of column
+    indices is given, only those columns are profiled, and the returned profiles are in the same order.
+    """
+
+    with open_relation_file(rf) as (fields, rows):
+        return fields, _profile_rows(rows, len(fields), columns, distinct_cap)
+
+
+def profile_relation_chunk(rf, start: int, end: int, n_fields: int, columns: Optional[Sequence[int]] = None,
+                           distinct_cap: int = DEFAULT_DISTINCT_CAP) -> List[ColumnProfile]:
+    """
+    Profiles the columns of the records in the byte range [start, end) of a relation file. The range must be one of
+    those returned by analysis.chunks.find_chunk_boundaries.
+    """
+
+    return _profile_rows(read_chunk_rows(rf, start, end, n_fields), n_fields, columns, distinct_cap)
+
+
+def _profile_relation_chunk(task: Tuple[str, Optional[int], Optional[int], int, Optional[Sequence[int]], int]) \
+        -> List[ColumnProfile]:
+    # Module-level so that it can be sent to worker processes
+    rf, start, end, _n_fields, columns, distinct_cap = task
+    if start is None:
+        # Compressed files cannot be split up, so they are read whole by a single worker
+        return profile_relation_file(rf, columns, distinct_cap)[1]
+    return profile_relation_chunk(*task)
+
+
+def _find_relation_chunks(rf: str, n_chunks: int) -> Tuple[Tuple[str, ...], List[Tuple[Optional[int], ...]]]:
+    if detect_compression(rf) is not None:
+        return read_relation_fields(rf), [(None, None)]
+    return find_chunk_boundaries(rf, n_chunks)
+
+
+def profile_relations(
+    relations: Sequence[Tuple[str, Union[str, Sequence[str]]]],
+    jobs: int = 1,
+    cache: Optional[ProfileCache] = None,
+    distinct_cap: int = DEFAULT_DISTINCT_CAP
+) -> List[Tuple[str, Tuple[str, ...], List[ColumnProfile]]]:
+    """
+    Profiles the columns of every (relation name, relation file) pair given. With more than one job, each relation
+    file is memory-mapped and split into byte ranges on record boundaries, which are parsed and profiled by a pool of
+    worker processes; the per-range profiles are then merged, so output does not depend on the number of jobs.
+
+    A relation can also be given as a sequence of shard files with identical headers. Each shard is profiled (and
+    cached) on its own, alongside every other file, and the shards' profiles are merged into the relation's.
+
+    If a profile cache is given, relations whose files have not changed since they were last profiled are loaded
+    from it instead, and newly-computed profiles are saved to it.
+    """
+
+    shards = [(rn if len(relation_file_shards(rf)) == 1 else "{} [{}]".format(rn, shard), shard)
+              for rn, rf in relations for shard in relation_file_shards(rf)]
+    shard_profiles = iter(_profile_cached_files(shards, jobs, cache, distinct_cap))
+
+    relation_profiles = []
+    for rn, rf in relations:
+        n_shards = len(relation_file_shards(rf))
+        if n_shards == 1:
+            relation_profiles.append((rn, *next(shard_profiles)[1:]))
+            continue
+
+        with phase("merge shards", rn):
+            fields = None
+            profiles = []
+            for shard, (_label, s_fields, s_profiles) in zip(rf, islice(shard_profiles, n_shards)):
+                if fields is None:
+                    fields = s_fields
+                    profiles = [ColumnProfile(distinct_cap) for _ in fields]
+                elif s_fields != fields:
+                    exit_with_error("Error: The fields of shard '{}' do not match those of the other shards of "
+                                    "relation '{}'.".format(shard, rn))
+
+                for p, sp in zip(profiles, s_profiles):
+                    p.merge(sp)
+
+        relation_profiles.append((rn, fields, profiles))
+
+    return relation_profiles
+
+
+def _profile_cached_files(files: Sequence[Tuple[str, str]], jobs: int, cache: Optional[ProfileCache],
+                          distinct_cap: int) -> List[Tuple[str, Tuple[str, ...], List[ColumnProfile]]]:
+    if cache is None:
+        return _profile_relations(files, jobs, distinct_cap)
+
+    cached = {}
+    for i, (rn, rf) in enumerate(files):
+        with phase("load cached profiles", rn):
+            entry = cache.get(rf, distinct_cap)
+        if entry is not None:
+            print("Using cached profiles for relation '{}'...".format(rn))
+            cached[i] = entry
+
+    uncached = [i for i in range(len(files)) if i not in cached]
+    profiled = _profile_relations(tuple(files[i] for i in uncached), jobs, distinct_cap)
+
+    for i, (_rn, fields, profiles) in zip(uncached, profiled):
+        cache.put(files[i][1], fields, profiles, distinct_cap)
+        cached[i] = (fields, profiles)
+
+    return [(rn, *cached[i]) for i, (rn, _rf) in enumerate(files)]
+
+
+def _profile_relations(relations: Sequence[Tuple[str, str]], jobs: int = 1, distinct_cap: int = DEFAULT_DISTINCT_CAP) \
+        -> List[Tuple[str, Tuple[str, ...], List[ColumnProfile]]]:
+    if not relations:
+        return []
+
+    if jobs <= 1:
+        relation_profiles = []
+        for rn, rf in relations:
+            print("Profiling relation '{}'...".format(rn))
+            with phase("parse and profile", rn) as ph:
+                fields, profiles = profile_relation_file(rf, distinct_cap=distinct_cap)
+                ph["rows"] = profiles[0].rows if profiles else 0
+            relation_profiles.append((rn, fields, profiles))
+        return relation_profiles
+
+    # Several chunks per job even out the work when chunks (or relations) take different amounts of time to parse
+    relation_chunks = [_find_relation_chunks(rf, jobs * CHUNKS_PER_JOB) for _rn, rf in relations]
+    tasks = [(rf, start, end, len(fields), None, distinct_cap)
+             for (_rn, rf), (fields, chunks) in zip(relations, relation_chunks)
+             for start, end in chunks]
+
+    print("Profiling {} relations in {} chunks using {} processes...".format(len(relations), len(tasks), jobs))
+
+    with phase("parse and profile") as ph, ProcessPoolExecutor(max_workers=jobs) as executor:
+        results = executor.map(_profile_relation_chunk, tasks)
+
+        relation_profiles = []
+        for (rn, _rf), (fields, chunks) in zip(relations, relation_chunks):
+            profiles = [ColumnProfile(distinct_cap) for _ in fields]
+            for chunk_profiles in islice(results, len(chunks)):
+                for p, cp in zip(profiles, chunk_profiles):
+                    p.merge(cp)
+            relation_profiles.append((rn, fields, profiles))
+
+        ph["rows"] = sum(profiles[0].rows for _rn, _fields, profiles in relation_profiles if profiles)
+
+    return relation_profiles
+
+
+def _sample_relation(task: Tuple[str, int]) -> Tuple[Tuple[str, ...], List[ColumnProfile], int]:
+    # Module-level so that it can be sent to worker processes
+    return sample_relation_file(*task)
+
+
+def sample_relations(relations: Sequence[Tuple[str, str]], sample_size: int, jobs: int = 1) \
+        -> List[Tuple[str, Tuple[str, ...], List[ColumnProfile], int]]:
+    """
+    Reservoir-samples up to sample_size rows from each relation, returning tuples of the relation name, its fields,
+    the profiles of its sampled columns, and the total number of rows in the relation file.
+    """
+
+    tasks = tuple((rf, sample_size) for _rn, rf in relations)
+
+    if jobs <= 1:
+        results = []
+        for (rn, _rf), task in zip(relations, tasks):
+            print("Sampling relation '{}'...".format(rn))
+            with phase("sample", rn) as ph:
+                results.append(_sample_relation(task))
+                ph["rows"] = results[-1][2]
+    else:
+        print("Sampling {} relations using {} processes...".format(len(relations), jobs))
+        with phase("sample") as ph, ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(_sample_relation, tasks))
+            ph["rows"] = sum(total_rows for _fields, _profiles, total_rows in results)
+
+    return [(rn, *result) for (rn, _rf), result in zip(relations, results)]
+
+
+def profile_table(data, distinct_cap: int = DEFAULT_DISTINCT_CAP) -> Tuple[Tuple[str, ...], List[ColumnProfile]]:
+    """
+    Profiles the columns of an in-memory table, which can either be column-oriented (a mapping of field names to
+    sequences of values, a pandas data frame or a NumPy record array) or row-oriented (an iterable of mappings of
+    field names to values, or of sequences of values following a header row.) Values are converted to strings as
+    they would appear in a relation file, with None and NaN as blanks, and rows which are blank in every column are
+    skipped whatever the kind of table.
+    """
+
+    columns = table_columns(data)
+
+    if columns is None:
+        fields, rows = table_rows(data)
+        return fields, _profile_rows(rows, len(fields), distinct_cap=distinct_cap)
+
+    fields, columns = columns
+    profiles = []
+    for col in columns:
+        profile = ColumnProfile(distinct_cap)
+        profile.update(col)
+        profiles.append(profile)
+
+    return fields, profiles
+
+
+def analyze_relations(relations: Dict[str, object], verbose: bool = False) -> List[List[str]]:
+    """
+    Analyzes in-memory tables, given as a mapping of relation names to tables (see profile_table for the kinds of
+    tables accepted), and returns the rows of the resulting design file. If verbose is true, the analysis is
+    described on standard output the same way ptd-analyze does it.
+
+    Since rows can only be read once, columns with too many distinct values for their profiles to keep are not
+    considered as keys (see verify_relation_keys.)
+    """
+
+    with redirect_stdout(sys.stdout if verbose else io.StringIO()):
+        relation_profiles = []
+        for rn, data in relations.items():
+            print("Profiling relation '{}'...".format(rn))
+            relation_profiles.append((rn, *profile_table(data)))
+
+        print()
+
+        keys = find_relation_keys(relation_profiles)
+        foreign_keys = {}
+        for (rn, i), target in find_foreign_keys(relation_profiles, keys).items():
+            foreign_keys.setdefault(rn, {})[i] = target
+
+        design_file_rows = []
+        for rn, fields, profiles in relation_profiles:
+            design_file_rows.extend(create_relation_design_file_rows(rn, fields, profiles, keys,
+                                                                       foreign_keys=foreign_keys.get(rn)))
+
+    return design_file_rows
+
+
+def column_is_unique(rf, column: int, memory_limit: Optional[int] = None) -> bool:
+    """
+    Checks exactly whether a column of a relation file contains any value more than once, stopping at the first
+    duplicate found. If a memory limit (in bytes) is given, the column's values are spilled to temporary files on
+    disk once they no longer fit within it.
+    """
+
+    with SpillingDistinctSet(sys.maxsize if memory_limit is None else memory_limit) as seen, \
+            open_relation_file(rf, raw=True) as (_fields, rows):
+        for row in rows:
+            if is_blank_row(row):
+                continue
+
+            seen.add(row[column].strip() if column < len(row) else "")
+            if seen.has_duplicates:
+                return False
+
+        return seen.is_unique()
+
+
+def verify_relation_keys(
+    relation_profiles: Sequence[Tuple[str, Sequence[str], Sequence[ColumnProfile]]],
+    relations: Sequence[Tuple[str, Optional[str]]],
+    memory_limit: Optional[int] = None
+) -> List[str]:
+    """
+    Key detection is exact for columns whose profiles kept every distinct value. For columns with too many distinct
+    values for that, profiles can only rule out keys (by an estimate of their number of distinct values, or by having
+    spotted a duplicate), so plausible keys are checked exactly against their relation files here. Only columns up to
+    the first key of each relation are considered, since that is the one which will be used. Returns the names of the
+    relations for which any checks were done.
+    """
+
+    checked = []
+
+    for (rn, fields, profiles), (_rn, rf) in zip(relation_profiles, relations):
+        for i, profile in enumerate(profiles):
+            if not profile.may_be_unique() or "" in profile.value_counts:
+                continue
+
+            if profile.distinct_overflow and profile.exact_unique is None and rf is not None:
+                print("Checking uniqueness of field '{}' in relation '{}'...".format(fields[i], rn))
+                profile.exact_unique = column_is_unique(rf, i, memory_limit)
+                if rn not in checked:
+                    checked.append(rn)
+
+            if profile.is_unique():
+                break
+
+    return checked
+
+
+def find_relation_keys(relation_profiles: Sequence[Tuple[str, Sequence[str], Sequence[ColumnProfile]]]) \
+        -> Dict[str, Tuple[str, Sequence]]:
+    """
+    Picks the first key-like column (if any) of each relation, using already-computed column profiles.
+    """
+
+    keys = {}
+
+    for rn, fields, profiles in relation_profiles:
+        print("Finding keys for relation '{}'...".format(rn))
+
+        for f, profile in zip(fields, profiles):
+            new_name = field_to_py_code(f)
+
+            inference = infer_column_type_from_profile(rn, new_name, profile)
+
+            if inference["is_key"]:
+                keys[rn] = (new_name, profile.value_counts.keys())
+                print("    Field '{}' identified as a key".format(new_name))
+                break
+
+        print()
+
+    return keys
+
+
+def create_relation_design_file_rows(
+    rn: str,
+    fields: Sequence[str],
+    profiles: Sequence[ColumnProfile],
+    keys: Dict[str, Tuple[str, Sequence]],
+    notes: Optional[Dict[int, Sequence[str]]] = None,
+    foreign_keys: Optional[Dict[int, str]] = None
+) -> List[List[str]]:
+    """
+    Infers the type of every column of a relation from its profiles, printing a description of each, and returns the
+    relation's section of the design file (headers, fields and trailing blank row.) Any notes given for a column
+    (indexed by position) are printed underneath its description, and columns found to be foreign keys (mapped by
+    position to the relation they refer to) are given the foreign key type.
+    """
+
+    print("Detecting types for fields in relation '{}'...".format(rn))
+
+    new_design_file_rows = [[rn, "new field name", "data type", "nullable?", "null values", "default",
+                             "description", "show in table?", "additional fields..."]]
+
+    if rn not in keys:
+        print("\n    Warning: No primary key found for relation '{}'. If you have a field you "
+              "\n             think should be the primary key (row identifier), this is an indication"
+              "\n             that there may be duplicate values. \n"
+              "\n             Adding an automatic key instead....".format(rn))  # TODO
+
+        # Add automatic primary key to design file
+        new_design_file_rows.append(RelationField(
+            csv_names=(),  # CSV names (blank)
+            name="{}_id".format(rn),  # "new" (database) name
+            data_type=DT_AUTO_KEY,  # auto primary key type
+            nullable=False,  # not nullable - primary key
+            null_values=(),  # no null values
+            default="",  # no default value
+            description="Unique identifier automatically generated by the database",  # auto-generated description
+            show_in_table=True,  # show primary key in table list view
+            additional_fields=(),  # no additional fields
+        ).as_design_file_row())
+
+    for i, (f, profile) in enumerate(zip(fields, profiles)):
+        new_name = field_to_py_code(f)
+
+        inference = infer_column_type_from_profile(rn, new_name, profile, keys)
+        if foreign_keys and i in foreign_keys:
+            inference = make_foreign_key_inference(inference, profile, foreign_keys[i])
+
+        design_file_row = create_design_file_rows_from_inference(f, new_name, inference)
+        new_design_file_rows.extend(design_file_row)
+
+        print("    Field '{}':\n        Type: '{}'{}\n        Nullable: {}{}{}{}".format(
+            f,
+            inference["detected_type"],
+            ("\n        Target: '{}'".format(inference["foreign_key_target"])
+             if inference["detected_type"] == DT_FOREIGN_KEY else ""),
+            inference["nullable"],
+            "\n        Choices: {}".format(inference["choices"]) if len(inference["choices"]) > 0 else "",
+            "\n        With alternate" if inference["include_alternate"] else "",
+            "".join("\n        {}".format(n) for n in (notes or {}).get(i, ()))
+        ))
+
+    new_design_file_rows.append([])
+    print()
+
+    return new_design_file_rows
+
+
+def sampled_column_notes(
+    rn: str,
+    fields: Sequence[str],
+    profiles: Sequence[ColumnProfile],
+    keys: Dict[str, Tuple[str, Sequence]],
+    total_rows: int,
+    verify_below: float = 0.0,
+    verified: Sequence[int] = ()
+) -> Tuple[Dict[int, List[str]], List[int]]:
+    """
+    Describes how much trust to place in inferences made from a sample of a relation. Returns notes for each column
+    along with the indices of columns whose confidence is below verify_below (or which were only detected as keys on
+    the sample), which are candidates for a verification pass.
+    """
+
+    notes = {}
+    uncertain = []
+
+    for i, (f, profile) in enumerate(zip(fields, profiles)):
+        if i in verified:
+            notes[i] = ["Verified against all {} rows".format(profile.rows)]
+            continue
+
+        if profile.rows >= total_rows:
+            # The whole relation fit in the sample, so the inference is exact.
+            continue
+
+        inference = infer_column_type_from_profile(rn, field_to_py_code(f), profile, keys)
+        confidence = inference_confidence(profile, inference)
+
+        notes[i] = ["Confidence: {:.1%} of {} sampled rows (out of {})".format(confidence, profile.rows, total_rows)]
+        if inference["is_key"]:
+            notes[i].append("Key uniqueness was only checked on the sample")
+
+        if confidence < verify_below or inference["is_key"]:
+            uncertain.append(i)
+
+    return notes, uncertain
+
+
+def _classify_relation_values(relation_profiles: Sequence[Tuple[str, Sequence[str], Sequence[ColumnProfile]]]):
+    # Summaries are computed lazily, but doing so up front lets classification be timed on its own when profiling.
+    for rn, _fields, profiles in relation_profiles:
+        with phase("classify values", rn) as ph:
+            for profile in profiles:
+                profile.summary()
+            ph["rows"] = profiles[0].rows if profiles else 0
+
+
+def _run(parser: argparse.ArgumentParser, args: argparse.Namespace):
+    cache = None if args.no_cache else ProfileCache(args.cache_dir)
+
+    if args.cache_info or args.cache_clear:
+        cache = cache or ProfileCache(args.cache_dir)
+
+        if args.cache_info:
+            entries = cache.entries()
+            print("{} cached relation file(s) in '{}':".format(len(entries), cache.directory))
+            for e in entries:
+                print("    {path}\n        Size: {size} bytes, {fields} fields, {rows} rows\n"
+                      "        SHA-256: {sha256}\n        Cache entry: {entry_size} bytes".format(**e))
+            print()
+
+        if args.cache_clear:
+            print("Removed {} cache file(s) from '{}'.".format(cache.clear(), cache.directory))
+
+        exit(0)
+
+    if args.design_file is None or (len(args.relations) == 0 and args.profiles is None) or \
+            len(args.relations) % 2 != 0:
+        parser.print_usage()
+        exit(1)
+
+    if args.jobs < 1:
+        exit_with_error("Error: Number of jobs must be at least 1.")
+
+    if args.sample is not None and args.sample < 1:
+        exit_with_error("Error: Sample size must be at least 1.")
+
+    if args.verify_below is not None and args.sample is None:
+        exit_with_error("Error: --verify-below can only be used along with --sample.")
+
+    memory_limit = None
+    if args.memory_limit is not None:
+        try:
+            memory_limit = parse_memory_size(args.memory_limit)
+        except ValueError as e:
+            exit_with_error("Error: {}.".format(e))
+
+    if args.profiles is not None and args.sample is not None:
+        exit_with_error("Error: --profiles cannot be used along with --sample.")
+
+    design_file = args.design_file  # Name for output
+    relation_names = args.relations[0::2]
+    relations = tuple(zip(relation_names, args.relations[1::2]))  # Split pairs of name, file name
+
+    # Relation names which only differ by case would end up as the same model, but file paths may be case-sensitive
+    lower_relation_names = [r.lower() for r in relation_names]
+    if len(set(lower_relation_names)) < len(relation_names):
+        print("Error: You cannot use the same relation name(s) for more than one table:")
+
+        duplicates = set(r for r in relation_names if lower_relation_names.count(r.lower()) > 1)
+        for r in duplicates:
+            print("\t{}".format(r))
+
+        exit(1)
+
+    # A relation can be split across several shard files, given as a directory or a glob pattern
+    relation_shards = []
+    for rn, rf in relations:
+        shards = find_relation_shards(rf)
+        if not shards:
+            exit_with_error("Error: No files found for relation '{}' in '{}'.".format(rn, rf))
+        relation_shards.append((rn, shards[0] if len(shards) == 1 else shards))
+    relations = tuple(relation_shards)
+
+    notes = {}
+    foreign_keys = {}
+
+    distinct_cap = DEFAULT_DISTINCT_CAP
+    if memory_limit is not None:
+        # Share the budget between every column being profiled
+        n_columns = sum(len(read_relation_fields(rf)) for _rn, rf in relations)
+        distinct_cap = max(MIN_DISTINCT_CAP, memory_limit // (DISTINCT_VALUE_BYTES * max(1, n_columns)))
+
+    if args.profiles is not None:
+        try:
+            store = ProfileStore(args.profiles)
+        except ValueError as e:
+            exit_with_error("Error: Could not load saved profiles: {}.".format(e))
+
+        # Each shard of a relation is a batch of its own
+        new_batches = []
+        for rn, rf in relations:
+            for shard in relation_file_shards(rf):
+                if store.has_batch(rn, shard):
+                    print("Skipping '{}', which has already been merged into relation '{}'...".format(shard, rn))
+                else:
+                    new_batches.append((rn, shard))
+
+        # Only the new batches need to be read; their profiles are merged into the saved ones
+        batch_profiles = profile_relations(new_batches, args.jobs, cache, distinct_cap)
+        with phase("merge batches"):
+            for (rn, rf), (_rn, fields, profiles) in zip(new_batches, batch_profiles):
+                try:
+                    store.add_batch(rn, rf, fields, profiles, distinct_cap)
+                except ValueError as e:
+                    exit_with_error("Error: Could not merge batch: {}.".format(e))
+
+            store.save()
+        print("Saved merged profiles to '{}'...".format(args.profiles))
+
+        relation_profiles = store.relations()
+        if not relation_profiles:
+            exit_with_error("Error: No relations have been saved to '{}' yet.".format(args.profiles))
+
+        relations = tuple((rn, None) for rn, _fields, _profiles in relation_profiles)  # Every saved relation
+
+    if args.sample is None:
+        if args.profiles is None:
+            # Read each relation file exactly once, keeping only the per-column profiles around
+            relation_profiles = profile_relations(relations, args.jobs, cache, distinct_cap)
+
+        print()
+
+        _classify_relation_values(relation_profiles)
+
+        # Columns with too many distinct values to keep in memory need an extra pass to tell if they are keys
+        with phase("verify keys"):
+            checked = verify_relation_keys(relation_profiles, relations, memory_limit)
+            if cache is not None:
+                for (rn, fields, profiles), (_rn, rf) in zip(relation_profiles, relations):
+                    # Save the results of the checks along with the profiles; shards are cached separately, so the
+                    # results for a sharded relation (which only hold for all of its shards together) are not saved.
+                    if rn in checked and isinstance(rf, str):
+                        cache.put(rf, fields, profiles, distinct_cap)
+
+        # Find key candidates from the cached profiles
+        with phase("find keys"):
+            keys = find_relation_keys(relation_profiles)
+
+        # Find columns which refer to other relations' keys. This is only done on full profiles, since a sample of a
+        # key column will usually be missing values that are referred to elsewhere.
+        print("Finding foreign keys...")
+        relation_fields = {rn: fields for rn, fields, _profiles in relation_profiles}
+        with phase("find foreign keys"):
+            relation_foreign_keys = find_foreign_keys(relation_profiles, keys)
+        for (rn, i), target in relation_foreign_keys.items():
+            foreign_keys.setdefault(rn, {})[i] = target
+            print("    Field '{}' of relation '{}' refers to relation '{}'".format(relation_fields[rn][i], rn, target))
+        print()
+
+    else:
+        relation_samples = sample_relations(relations, args.sample, args.jobs)
+        relation_profiles = [(rn, fields, profiles) for rn, fields, profiles, _total_rows in relation_samples]
+
+        print()
+
+        _classify_relation_values(relation_profiles)
+
+        with phase("find keys"):
+            keys = find_relation_keys(relation_profiles)
+
+        verify_below = -1.0 if args.verify_below is None else args.verify_below
+        verified = {}
+
+        for (rn, fields, profiles, total_rows), (_rn, rf) in zip(relation_samples, relations):
+            notes[rn], uncertain = sampled_column_notes(rn, fields, profiles, keys, total_rows, verify_below)
+
+            if args.verify_below is not None and uncertain:
+                # Verification pass: profile the uncertain columns in full, replacing their sampled profiles
+                print("Verifying {} column(s) of relation '{}' against the full relation...".format(
+                    len(uncertain), rn))
+                with phase("verify sampled columns", rn) as ph:
+                    for c, profile in zip(uncertain, profile_relation_file(rf, uncertain)[1]):
+                        profiles[c] = profile
+                    ph["rows"] = total_rows
+                verified[rn] = uncertain
+
+        if verified:
+            # Keys may have changed now that some columns have been checked against all rows
+            print()
+            keys = find_relation_keys(relation_profiles)
+
+            for rn, fields, profiles, total_rows in relation_samples:
+                notes[rn], _uncertain = sampled_column_notes(rn, fields, profiles, keys, total_rows,
+                                                             verified=verified.get(rn, ()))
+
+    design_file_rows = []
+    for rn, fields, profiles in relation_profiles:
+        with phase("infer types", rn):
+            design_file_rows.extend(create_relation_design_file_rows(rn, fields, profiles, keys, notes.get(rn),
+                                                                       foreign_keys.get(rn)))
+
+    try:
+        with phase("write design file"), open(design_file, "w", newline="") as df:
+            design_writer = csv.writer(df, delimiter=",")
+            max_length = max(len(r) for r in design_file_rows)
+
+            for r in design_file_rows:
+                r.extend([""] * (max_length - len(r)))  # Pad out row with blank columns if needed
+                design_writer.writerow(r)
+
+            print("    Wrote design file to '{}'...\n".format(design_file))
+
+        print("Analyzed {} relations.".format(len(relations)))
+
+    except IOError:
+        print("\nError: Could not write to design file.\n")
+        exit(1)
+
+
+def main():
+    print_license()
+
+    parser = argparse.ArgumentParser(
+        prog="ptd-analyze",
+        usage="ptd-analyze [options] design_out.csv relation_1_name file1.csv [relation_2_name file2.csv] ...\n"
+              "       ptd-analyze [options] --profiles PROFILES design_out.csv [relation_name batch.csv] ...\n"
+              "       ptd-analyze [--cache-dir DIR] [--cache-info] [--cache-clear]")
+    parser.add_argument("design_file", nargs="?", help="Path to write the generated design file to.")
+    parser.add_argument("relations", nargs="*",
+                        help="Pairs of relation names and relation CSV files. A relation split across several CSV "
+                             "files with the same header can be given as a directory or a (quoted) glob pattern.")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Number of worker processes to use for profiling columns (default: 1).")
+    parser.add_argument("--sample", type=int, metavar="N",
+                        help="Only analyze a random sample of (at most) N rows from each relation, for a quick draft.")
+    parser.add_argument("--verify-below", type=float, metavar="FRACTION",
+                        help="When sampling, re-scan the full relation for columns where less than FRACTION of the "
+                             "sampled values fit the inferred type, as well as for keys detected on the sample.")
+    parser.add_argument("--memory-limit", metavar="SIZE",
+                        help="Approximate amount of memory (e.g. 512M or 2G) to use for keeping track of distinct "
+                             "values. Columns with more distinct values than fit are only tallied by type, and exact "
+                             "key checks spill to temporary files on disk.")
+    parser.add_argument("--profiles", metavar="PROFILES",
+                        help="Merge the given relation files, as new batches of rows, into the column profiles saved "
+                             "in PROFILES (created if needed), and generate the design file from the merged profiles "
+                             "of every saved relation. Files which have already been merged are skipped.")
+    parser.add_argument("--timings", metavar="REPORT",
+                        help="Write timings, throughput and peak memory use for each phase of the run to REPORT, as "
+                             "JSON ('-' for standard output.)")
+    parser.add_argument("--timings-cprofile", metavar="STATS",
+                        help="Profile the run with cProfile, writing the statistics to STATS.")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIRECTORY,
+                        help="Directory for cached column profiles (default: {}; can also be set with the "
+                             "PTD_CACHE_DIR environment variable.)".format(DEFAULT_CACHE_DIRECTORY))
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Do not use or update cached column profiles.")
+    parser.add_argument("--cache-info", action="store_true",
+                        help="List the relation files with cached column profiles, then exit.")
+    parser.add_argument("--cache-clear", action="store_true",
+                        help="Remove all cached column profiles, then exit.")
+
+    args = parser.parse_args()
+
+    with profile_run("ptd-analyze", args.timings, args.timings_cprofile):
+        _run(parser, args)
+
+
+if __name__ == "__main__":
+    main()
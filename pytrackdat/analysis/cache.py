@@ -0,0 +1,294 @@
+# PyTrackDat is a utility for assisting in online database creation.
+# Copyright (C) 2018-2020 the PyTrackDat authors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Contact information:
+#     David Lougheed (david.lougheed@gmail.com)
+
+import hashlib
+import json
+import os
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .profile import ColumnProfile, DEFAULT_DISTINCT_CAP
+from .sketches import HyperLogLog
+
+
+__all__ = [
+    "CACHE_VERSION",
+    "DEFAULT_CACHE_DIRECTORY",
+    "PROFILE_STORE_VERSION",
+    "file_fingerprint",
+    "ProfileCache",
+    "ProfileStore",
+]
+
+
+# Bump whenever the contents of a cache entry (including profiles) change meaning, to invalidate old entries.
+CACHE_VERSION = 5
+
+# Saved profile stores cannot simply be thrown away like cache entries, since the batches merged into them may no
+# longer be around. Bump whenever the format of a store changes, adding a migration from the previous version to
+# STORE_MIGRATIONS. Stores were versioned along with the cache up to version 5.
+PROFILE_STORE_VERSION = 5
+MIN_PROFILE_STORE_VERSION = 2
+
+DEFAULT_CACHE_DIRECTORY = os.environ.get(
+    "PTD_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "pytrackdat", "profiles"))
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_fingerprint(rf: str, with_hash: bool = True) -> Dict:
+    """
+    Describes the current state of a file by its absolute path, size, modification time and (optionally) the SHA-256
+    hash of its contents.
+    """
+
+    path = os.path.abspath(rf)
+    stat = os.stat(path)
+
+    fingerprint = {
+        "path": path,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": None,
+    }
+
+    if with_hash:
+        h = hashlib.sha256()
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(HASH_CHUNK_SIZE), b""):
+                h.update(chunk)
+        fingerprint["sha256"] = h.hexdigest()
+
+    return fingerprint
+
+
+class ProfileCache:
+    """
+    On-disk cache of relation file column profiles, stored as one JSON file per relation file path. An entry is only
+    used if the file's size, modification time and content hash all still match the ones recorded with it, and if its
+    profiles were made with the same cap on distinct values as the ones being asked for (so e.g. --memory-limit is not
+    defeated by profiles cached without a limit.)
+    """
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIRECTORY):
+        self.directory = directory
+        self._fingerprints = {}  # type: Dict[str, Dict]
+
+    def _entry_path(self, rf: str) -> str:
+        return os.path.join(self.directory, "{}.json".format(
+            hashlib.sha256(os.path.abspath(rf).encode("utf-8")).hexdigest()))
+
+    def _fingerprint(self, rf: str) -> Dict:
+        # Hashing a large file is not free, so only do it once per file per run.
+        path = os.path.abspath(rf)
+        if path not in self._fingerprints:
+            self._fingerprints[path] = file_fingerprint(path)
+        return self._fingerprints[path]
+
+    def _read_entry(self, entry_path: str) -> Optional[Dict]:
+        try:
+            with open(entry_path, "r", encoding="utf-8") as ef:
+                entry = json.load(ef)
+        except (OSError, ValueError):
+            return None
+
+        return entry if entry.get("version") == CACHE_VERSION else None
+
+    def get(self, rf: str, distinct_cap: int = DEFAULT_DISTINCT_CAP) \
+            -> Optional[Tuple[Tuple[str, ...], List[ColumnProfile]]]:
+        entry = self._read_entry(self._entry_path(rf))
+        if entry is None or entry["distinct_cap"] != distinct_cap:
+            return None
+
+        # Cheap checks first, so changed files do not need to be hashed twice
+        stat = os.stat(rf)
+        if entry["fingerprint"]["size"] != stat.st_size or entry["fingerprint"]["mtime_ns"] != stat.st_mtime_ns:
+            return None
+
+        if entry["fingerprint"]["sha256"] != self._fingerprint(rf)["sha256"]:
+            return None
+
+        return tuple(entry["fields"]), [ColumnProfile.from_dict(p) for p in entry["profiles"]]
+
+    def put(self, rf: str, fields: Sequence[str], profiles: Sequence[ColumnProfile],
+            distinct_cap: int = DEFAULT_DISTINCT_CAP) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+
+        entry_path = self._entry_path(rf)
+        tmp_path = entry_path + ".tmp"
+
+        with open(tmp_path, "w", encoding="utf-8") as ef:
+            json.dump({
+                "version": CACHE_VERSION,
+                "fingerprint": self._fingerprint(rf),
+                "distinct_cap": distinct_cap,
+                "fields": list(fields),
+                "profiles": [p.to_dict() for p in profiles],
+            }, ef)
+
+        # Replace atomically, so an interrupted run cannot leave a half-written entry behind
+        os.replace(tmp_path, entry_path)
+
+    def entries(self) -> List[Dict]:
+        """
+        Lists the cache's entries, each with its file fingerprint, field count, row count and size on disk.
+        """
+
+        if not os.path.isdir(self.directory):
+            return []
+
+        entries = []
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".json"):
+                continue
+
+            entry_path = os.path.join(self.directory, name)
+            entry = self._read_entry(entry_path)
+            if entry is None:
+                continue
+
+            entries.append({
+                **entry["fingerprint"],
+                "fields": len(entry["fields"]),
+                "rows": entry["profiles"][0]["rows"] if entry["profiles"] else 0,
+                "entry_size": os.path.getsize(entry_path),
+            })
+
+        return sorted(entries, key=lambda e: e["path"])
+
+    def clear(self) -> int:
+        """
+        Removes every entry from the cache, returning the number of files removed.
+        """
+
+        if not os.path.isdir(self.directory):
+            return 0
+
+        removed = 0
+        for name in os.listdir(self.directory):
+            if name.endswith(".json") or name.endswith(".json.tmp"):
+                os.remove(os.path.join(self.directory, name))
+                removed += 1
+
+        return removed
+
+
+def _migrate_profiles(relations: List[Dict], migrate_profile) -> None:
+    for relation in relations:
+        relation["profiles"] = [migrate_profile(p) for p in relation["profiles"]]
+
+
+def _add_uniqueness(profile: Dict) -> Dict:
+    # Distinct values past the cap were not recorded, so overflowed columns' estimates only cover the kept values.
+    sketch = None
+    if profile["overflow"] is not None:
+        sketch = HyperLogLog()
+        sketch.update(profile["value_counts"])
+        sketch = sketch.to_dict()
+
+    return {**profile, "has_duplicates": any(n > 1 for n in profile["value_counts"].values()), "sketch": sketch,
+            "exact_unique": None}
+
+
+def _add_formats(profile: Dict) -> Dict:
+    if profile["overflow"] is None:
+        return profile
+    return {**profile, "overflow": {"date_formats": {}, "time_formats": {}, **profile["overflow"]}}
+
+
+# Migrations of a store's relations from each version to the next
+STORE_MIGRATIONS = {
+    2: lambda relations: _migrate_profiles(relations, _add_uniqueness),  # Uniqueness tracking added
+    3: lambda relations: _migrate_profiles(relations, _add_formats),  # Date and time formats added
+    4: lambda relations: None,  # Only cache entries changed
+}
+
+
+class ProfileStore:
+    """
+    Saved column profiles for relations whose data arrive in append-only batches (e.g. one CSV file per field
+    season.) Each batch is profiled on its own and merged into the relation's saved profiles, so re-analyzing a
+    relation only requires reading the new batch. The SHA-256 hashes of merged batch files are recorded, so that the
+    same batch is never counted twice.
+
+    Stores saved by older versions are migrated when they are loaded, and saved in the current format.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._relations = []  # type: List[Dict]
+
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as sf:
+                store = json.load(sf)
+
+            version = store.get("version")
+            if not isinstance(version, int) or not MIN_PROFILE_STORE_VERSION <= version <= PROFILE_STORE_VERSION:
+                raise ValueError("profile store '{}' was saved by an incompatible version".format(path))
+
+            self._relations = store["relations"]
+            for v in range(version, PROFILE_STORE_VERSION):
+                STORE_MIGRATIONS[v](self._relations)
+
+    def _relation(self, rn: str) -> Optional[Dict]:
+        return next((r for r in self._relations if r["name"] == rn), None)
+
+    def has_batch(self, rn: str, rf: str) -> bool:
+        relation = self._relation(rn)
+        return relation is not None and file_fingerprint(rf)["sha256"] in relation["batches"]
+
+    def add_batch(self, rn: str, rf: str, fields: Sequence[str], profiles: Sequence[ColumnProfile],
+                  distinct_cap: int = DEFAULT_DISTINCT_CAP) -> None:
+        """
+        Merges the profiles of a new batch of a relation's rows into the saved ones. The merged profiles keep at most
+        distinct_cap distinct values each, even if the saved ones were made with a larger cap.
+        """
+
+        relation = self._relation(rn)
+
+        if relation is None:
+            relation = {"name": rn, "fields": list(fields), "profiles": [None for _ in fields], "batches": []}
+            self._relations.append(relation)
+
+        if relation["fields"] != list(fields):
+            raise ValueError("fields of '{}' do not match those of earlier batches of relation '{}'".format(rf, rn))
+
+        merged = []
+        for saved, profile in zip(relation["profiles"], profiles):
+            merged_profile = ColumnProfile(distinct_cap)
+            if saved is not None:
+                merged_profile.merge(ColumnProfile.from_dict(saved))
+            merged_profile.merge(profile)
+            merged.append(merged_profile.to_dict())
+
+        relation["profiles"] = merged
+        relation["batches"].append(file_fingerprint(rf)["sha256"])
+
+    def relations(self) -> List[Tuple[str, Tuple[str, ...], List[ColumnProfile]]]:
+        return [(r["name"], tuple(r["fields"]), [ColumnProfile.from_dict(p) for p in r["profiles"]])
+                for r in self._relations]
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as sf:
+            json.dump({"version": PROFILE_STORE_VERSION, "relations": self._relations}, sf)
+
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,116 @@
+# PyTrackDat is a utility for assisting in online database creation.
+# Copyright (C) 2018-2020 the PyTrackDat authors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Contact information:
+#     David Lougheed (david.lougheed@gmail.com)
+
+import csv
+import io
+import mmap
+import os
+
+from typing import List, Tuple
+
+from ..common import exit_with_error
+from .relation_files import is_blank_row, normalize_row, strip_blank_fields
+
+
+__all__ = [
+    "MIN_CHUNK_SIZE",
+    "find_chunk_boundaries",
+    "read_chunk_rows",
+]
+
+
+# Chunks smaller than this are not worth the overhead of handing them to another process.
+MIN_CHUNK_SIZE = 1024 * 1024
+
+
+def _next_record_start(mm: mmap.mmap, record_start: int, position: int) -> int:
+    """
+    Finds the start of the first record beginning at or after position, given the start of a record at or before it.
+    A newline only ends a record if it is outside of quotes, i.e. if an even number of quote characters occur between
+    the start of the record and the newline (escaped quotes come in pairs, so they do not affect this.)
+    """
+
+    if position <= record_start:
+        return record_start
+
+    quotes = mm[record_start:position].count(b'"')
+
+    while True:
+        newline = mm.find(b"\n", position)
+        if newline == -1:
+            return len(mm)
+
+        quotes += mm[position:newline].count(b'"')
+        if quotes % 2 == 0:
+            return newline + 1
+
+        position = newline + 1
+
+
+def find_chunk_boundaries(rf: str, n_chunks: int, min_chunk_size: int = MIN_CHUNK_SIZE) \
+        -> Tuple[Tuple[str, ...], List[Tuple[int, int]]]:
+    """
+    Memory-maps a relation file, reads its header and splits the rest of it into (at most) n_chunks byte ranges of
+    roughly equal size, each starting and ending on a record boundary (taking quoted newlines into account.)
+    Returns the relation's fields and the list of (start, end) byte offsets.
+    """
+
+    size = os.path.getsize(rf)
+    if size == 0:
+        exit_with_error("Error: No fields detected")
+
+    with open(rf, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        header_end = _next_record_start(mm, 0, 1)
+
+        header = next(csv.reader(io.StringIO(mm[:header_end].decode("utf-8-sig"))), ())
+        fields = strip_blank_fields(tuple(header))
+        if len(fields) == 0:
+            exit_with_error("Error: No fields detected")
+
+        data_size = size - header_end
+        n_chunks = max(1, min(n_chunks, data_size // max(1, min_chunk_size)))
+        chunk_size = data_size / n_chunks
+
+        boundaries = [header_end]
+        for i in range(1, n_chunks):
+            start = _next_record_start(mm, boundaries[-1], header_end + int(i * chunk_size))
+            if start >= size:
+                break
+            if start > boundaries[-1]:
+                boundaries.append(start)
+
+        boundaries.append(size)
+
+    return fields, [(s, e) for s, e in zip(boundaries, boundaries[1:]) if e > s]
+
+
+def read_chunk_rows(rf: str, start: int, end: int, n_fields: int):
+    """
+    Yields the normalized, non-blank rows of the byte range [start, end) of a relation file, which must begin and end
+    on record boundaries (see find_chunk_boundaries.)
+    """
+
+    with open(rf, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        # Records end with newlines, which are never part of a multi-byte UTF-8 sequence, so chunks decode cleanly.
+        text = mm[start:end].decode("utf-8")
+
+    # Translate line endings the same way reading the file in text mode would (see open_relation_file)
+    for row in csv.reader(io.StringIO(text, newline=None), delimiter=","):
+        if not is_blank_row(row):
+            yield normalize_row(row, n_fields)
@@ -0,0 +1,115 @@
+# PyTrackDat is a utility for assisting in online database creation.
+# Copyright (C) 2018-2020 the PyTrackDat authors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Contact information:
+#     David Lougheed (david.lougheed@gmail.com)
+
+from array import array
+from typing import Iterable, Iterator, Optional, Sequence
+
+from .relation_files import open_relation_file
+
+
+__all__ = [
+    "EncodedColumn",
+    "ColumnarRelation",
+    "read_relation_columns",
+]
+
+
+class EncodedColumn:
+    """
+    A dictionary-encoded column of strings: each row is stored as an integer code into a table of distinct values,
+    so repeated values cost a few bytes per row instead of a pointer to (and possibly a copy of) a string object.
+    """
+
+    __slots__ = ("codes", "values", "_index")
+
+    def __init__(self, values: Iterable[str] = ()):
+        self.codes = array("I")
+        self.values = []
+        self._index = {}
+        self.extend(values)
+
+    def encode(self, v: str) -> int:
+        code = self._index.get(v)
+        if code is None:
+            code = len(self.values)
+            self._index[v] = code
+            self.values.append(v)
+        return code
+
+    def append(self, v: str) -> None:
+        self.codes.append(self.encode(v))
+
+    def extend(self, values: Iterable[str]) -> None:
+        encode = self.encode
+        self.codes.extend(encode(v) for v in values)
+
+    def __setitem__(self, i: int, v: str) -> None:
+        # The replaced value's entry is kept in the table, since other rows may still refer to it.
+        self.codes[i] = self.encode(v)
+
+    def __getitem__(self, i: int) -> str:
+        return self.values[self.codes[i]]
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __iter__(self) -> Iterator[str]:
+        values = self.values
+        return (values[c] for c in self.codes)
+
+
+class ColumnarRelation:
+    """
+    Parsed relation data stored column by column, with each column dictionary-encoded.
+    """
+
+    def __init__(self, fields: Sequence[str]):
+        self.fields = tuple(fields)
+        self.columns = [EncodedColumn() for _ in self.fields]
+
+    def append_row(self, row: Sequence[str]) -> None:
+        for col, v in zip(self.columns, row):
+            col.append(v)
+
+    def set_row(self, i: int, row: Sequence[str]) -> None:
+        for col, v in zip(self.columns, row):
+            col[i] = v
+
+    @property
+    def rows(self) -> int:
+        return len(self.columns[0]) if self.columns else 0
+
+
+def read_relation_columns(rf, columns: Optional[Sequence[int]] = None) -> ColumnarRelation:
+    """
+    Reads a relation file into columnar form. If a sequence of column indices is given, only those columns are kept,
+    in that order.
+    """
+
+    with open_relation_file(rf) as (fields, rows):
+        columns = tuple(range(len(fields))) if columns is None else tuple(columns)
+
+        relation = ColumnarRelation(tuple(fields[c] for c in columns))
+        encoders = tuple(zip(columns, (col.append for col in relation.columns)))
+
+        for row in rows:
+            for c, append in encoders:
+                append(row[c])
+
+        return relation
@@ -0,0 +1,161 @@
+# PyTrackDat is a utility for assisting in online database creation.
+# Copyright (C) 2018-2020 the PyTrackDat authors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Contact information:
+#     David Lougheed (david.lougheed@gmail.com)
+
+import json
+import os
+import re
+import sys
+import tempfile
+
+from typing import Iterator, Optional, Set
+
+from .sketches import hash_value_64
+
+
+__all__ = [
+    "DISTINCT_VALUE_BYTES",
+    "parse_memory_size",
+    "SpillingDistinctSet",
+]
+
+
+# Rough memory cost of keeping one (short) distinct value in a set or dictionary, including the string itself
+DISTINCT_VALUE_BYTES = 128
+
+MEMORY_SIZE_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+
+def parse_memory_size(size: str) -> int:
+    """
+    Parses a size in bytes with an optional unit suffix (K, M, G or T, e.g. "512M"), raising ValueError if the size
+    is not valid.
+    """
+
+    m = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)B?\s*", size, flags=re.IGNORECASE)
+    if m is None:
+        raise ValueError("invalid memory size: '{}'".format(size))
+
+    return int(float(m.group(1)) * MEMORY_SIZE_UNITS[m.group(2).upper()])
+
+
+class SpillingDistinctSet:
+    """
+    A set of strings which is kept in memory until it grows past a memory budget, after which its values are
+    hash-partitioned into temporary files on disk. Duplicates are spotted right away while values are still in
+    memory; once values have been spilled, partitions are loaded one at a time to find the rest, so that only about
+    1 / n_partitions of the values need to be in memory at once.
+
+    Should be used as a context manager, so that temporary files are removed afterwards.
+    """
+
+    def __init__(self, memory_limit: int, n_partitions: int = 64, directory: Optional[str] = None):
+        self.memory_limit = memory_limit
+        self.n_partitions = n_partitions
+        self.directory = directory
+
+        self.has_duplicates = False
+
+        self._values = set()  # type: Set[str]
+        self._memory_used = 0
+        self._spill_dir = None  # type: Optional[tempfile.TemporaryDirectory]
+
+    def __enter__(self) -> "SpillingDistinctSet":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._spill_dir is not None:
+            self._spill_dir.cleanup()
+            self._spill_dir = None
+
+    @property
+    def spilled(self) -> bool:
+        return self._spill_dir is not None
+
+    def _partition_path(self, i: int) -> str:
+        return os.path.join(self._spill_dir.name, "{}.jsonl".format(i))
+
+    def _spill(self) -> None:
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.TemporaryDirectory(prefix="ptd-distinct-", dir=self.directory)
+
+        partitions = [[] for _ in range(self.n_partitions)]
+        for v in self._values:
+            partitions[hash_value_64(v) % self.n_partitions].append(v)
+
+        for i, partition in enumerate(partitions):
+            if partition:
+                # JSON-encode values, since they may contain newlines
+                with open(self._partition_path(i), "a", encoding="utf-8") as pf:
+                    pf.writelines("{}\n".format(json.dumps(v)) for v in partition)
+
+        self._values = set()
+        self._memory_used = 0
+
+    def add(self, v: str) -> None:
+        if v in self._values:
+            self.has_duplicates = True
+            return
+
+        self._values.add(v)
+        self._memory_used += sys.getsizeof(v) + DISTINCT_VALUE_BYTES // 2
+
+        if self._memory_used > self.memory_limit:
+            self._spill()
+
+    def _partitions(self) -> Iterator[Set[str]]:
+        # Yields the distinct values of each partition in turn, noting any duplicates found along the way.
+        self._spill()
+
+        for i in range(self.n_partitions):
+            path = self._partition_path(i)
+            if not os.path.exists(path):
+                continue
+
+            values = set()
+            with open(path, "r", encoding="utf-8") as pf:
+                for line in pf:
+                    v = json.loads(line)
+                    if v in values:
+                        self.has_duplicates = True
+                    values.add(v)
+
+            yield values
+
+    def is_unique(self) -> bool:
+        """
+        Whether no value has been added more than once. Stops at the first partition containing a duplicate.
+        """
+
+        if self.has_duplicates or not self.spilled:
+            return not self.has_duplicates
+
+        for _values in self._partitions():
+            if self.has_duplicates:
+                return False
+
+        return True
+
+    def __len__(self) -> int:
+        if not self.spilled:
+            return len(self._values)
+
+        return sum(len(values) for values in self._partitions())
@@ -0,0 +1,132 @@
+# PyTrackDat is a utility for assisting in online database creation.
+# Copyright (C) 2018-2020 the PyTrackDat authors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Contact information:
+#     David Lougheed (david.lougheed@gmail.com)
+
+from typing import Dict, Sequence, Tuple
+
+from ..common import *
+from .profile import ColumnProfile
+from .sketches import BloomFilter
+
+
+__all__ = [
+    "KeyIndex",
+    "find_foreign_keys",
+    "make_foreign_key_inference",
+]
+
+
+class KeyIndex:
+    """
+    Compact summary of a relation's key column, used to test whether other columns could refer to it.
+    """
+
+    def __init__(self, relation: str, name: str, profile: ColumnProfile):
+        self.relation = relation
+        self.name = name
+        self.distinct_values = profile.distinct_values
+        self.numeric = profile.summary().integer_values + profile.summary().decimal_values == profile.rows
+        self._bloom_filter = None
+
+        # The key's distinct values are already held by its profile, so exact checks can use them without a copy.
+        self.values = profile.value_counts.keys()
+
+    @property
+    def bloom_filter(self) -> BloomFilter:
+        # Built on first use, since many keys are never compared to any column
+        if self._bloom_filter is None:
+            self._bloom_filter = BloomFilter.from_values(self.values, self.distinct_values)
+        return self._bloom_filter
+
+    def name_suggests_reference(self, column_name: str) -> bool:
+        relation_name = field_to_py_code(self.relation)
+        return (column_name == self.name or relation_name in column_name or
+                (relation_name.endswith("s") and relation_name[:-1] in column_name))
+
+    def may_contain_all(self, values: Sequence[str]) -> bool:
+        if len(values) > self.distinct_values:
+            return False
+
+        bf = self.bloom_filter
+        return all(v in bf for v in values)
+
+    def contains_all(self, values: Sequence[str]) -> bool:
+        return self.may_contain_all(values) and all(v in self.values for v in values)
+
+
+def find_foreign_keys(
+    relation_profiles: Sequence[Tuple[str, Sequence[str], Sequence[ColumnProfile]]],
+    keys: Dict[str, Tuple[str, Sequence]]
+) -> Dict[Tuple[str, int], str]:
+    """
+    Finds columns whose (non-blank) distinct values are all values of another relation's key, returning a mapping
+    of (relation name, column index) to the name of the relation being referred to.
+
+    Columns or keys with too many distinct values for their profiles to have kept them all cannot be checked exactly,
+    so they are skipped. Columns are first compared to each key by number of distinct values and against the key's
+    Bloom filter, and only then checked exactly. Since small numbers are likely to appear in any numeric key, numeric
+    keys are only considered as targets for columns whose names suggest a reference to the key's relation.
+    """
+
+    key_indices = []
+    for rn, fields, profiles in relation_profiles:
+        if rn not in keys:
+            continue
+
+        for f, profile in zip(fields, profiles):
+            if field_to_py_code(f) == keys[rn][0] and not profile.distinct_overflow:
+                key_indices.append(KeyIndex(rn, keys[rn][0], profile))
+                break
+
+    foreign_keys = {}
+
+    for rn, fields, profiles in relation_profiles:
+        for i, (f, profile) in enumerate(zip(fields, profiles)):
+            name = field_to_py_code(f)
+
+            if (rn in keys and keys[rn][0] == name) or profile.distinct_overflow:
+                continue
+
+            values = [v for v in profile.value_counts if v != ""]
+            if not values:
+                continue
+
+            candidates = [k for k in key_indices if k.relation != rn and
+                          (not k.numeric or k.name_suggests_reference(name))]
+            # Prefer keys the column's name points to
+            candidates.sort(key=lambda k: not k.name_suggests_reference(name))
+
+            target = next((k.relation for k in candidates if k.contains_all(values)), None)
+            if target is not None:
+                foreign_keys[(rn, i)] = target
+
+    return foreign_keys
+
+
+def make_foreign_key_inference(inference: Dict, profile: ColumnProfile, target: str) -> Dict:
+    return {
+        **inference,
+        "detected_type": DT_FOREIGN_KEY,
+        "nullable": "" in profile.value_counts,
+        "null_values": (),
+        "choices": (),
+        "max_length": -1,
+        "is_key": False,
+        "include_alternate": False,
+        "foreign_key_target": target,
+    }
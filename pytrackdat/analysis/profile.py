@@ -0,0 +1,396 @@
+# PyTrackDat is a utility for assisting in online database creation.
+# Copyright (C) 2018-2020 the PyTrackDat authors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Contact information:
+#     David Lougheed (david.lougheed@gmail.com)
+
+import re
+
+from collections import Counter
+from heapq import merge
+from typing import Dict, Iterable, Optional
+
+from ..common import *
+from .sketches import HyperLogLog
+from .vectorized import MIN_VECTORIZED_VALUES, classify_plain_numbers
+
+
+__all__ = [
+    "DEFAULT_DISTINCT_CAP",
+    "ColumnSummary",
+    "ColumnProfile",
+]
+
+
+# Maximum number of distinct values a profile keeps track of individually. Past this, new values are only tallied by
+# type; this keeps memory use (and the size of saved profiles) bounded for columns like free text or keys.
+DEFAULT_DISTINCT_CAP = 1 << 20
+
+# Type inference only needs to know whether there are none, one, a few or many non-numeric / unrecognized values.
+SUMMARY_VALUES_CAP = 16
+
+
+class ColumnSummary:
+    """
+    Type-related counts for a column, derived from a profile's distinct values.
+    """
+
+    __slots__ = (
+        "rows",
+        "integer_values",
+        "decimal_values",
+        "float_values",
+        "date_values",
+        "time_values",
+        "date_formats",
+        "time_formats",
+        "integer_values_set",
+        "non_numeric_values",
+        "other_values",
+        "max_seen_length",
+        "max_seen_decimals",
+    )
+
+    def __init__(self):
+        self.rows = 0
+
+        self.integer_values = 0
+        self.decimal_values = 0
+        self.float_values = 0
+        self.date_values = 0
+        self.time_values = 0
+
+        # Number of date and time values seen in each format, so the column's dominant format can be recorded.
+        self.date_formats = {}
+        self.time_formats = {}
+
+        # Only used to tell whether the integers are exactly {0, 1}, so there is no point growing it past 3 values.
+        self.integer_values_set = set()
+
+        self.non_numeric_values = set()
+        self.other_values = set()
+
+        self.max_seen_length = -1
+        self.max_seen_decimals = -1
+
+    def add(self, str_v: str, n: int = 1) -> None:
+        """
+        Classifies a (stripped) value once, counting it as if it had been seen n times.
+        """
+
+        vc, fmt = classify_value(str_v)
+        self._add_classified(str_v, n, vc, fmt)
+
+    def _add_classified(self, str_v: str, n: int, vc: str, fmt: Optional[str]) -> None:
+        if vc == VC_INTEGER:
+            self.integer_values += n
+            if len(self.integer_values_set) < 3:
+                self.integer_values_set.add(int(re.sub(RE_NUMBER_GROUP_SEPARATOR, "", str_v)))
+
+        elif vc == VC_DECIMAL or vc == VC_FLOAT:
+            self.decimal_values += n
+            self.max_seen_decimals = max(
+                self.max_seen_decimals,
+                (len(re.sub(RE_NUMBER_GROUP_SEPARATOR, "", str_v).split(".")[-1].lower().split("e")[0])
+                 if "." in str_v else -1)
+            )
+
+            if vc == VC_FLOAT:
+                self.float_values += n
+
+        else:
+            if len(self.non_numeric_values) < SUMMARY_VALUES_CAP:
+                self.non_numeric_values.add(str_v)
+
+            if vc == VC_DATE:
+                self.date_values += n
+                self.date_formats[fmt] = self.date_formats.get(fmt, 0) + n
+
+            elif vc == VC_TIME:
+                self.time_values += n
+                self.time_formats[fmt] = self.time_formats.get(fmt, 0) + n
+
+            elif len(self.other_values) < SUMMARY_VALUES_CAP:
+                self.other_values.add(str_v)
+
+        self.rows += n
+        self.max_seen_length = max(self.max_seen_length, len(str_v))
+
+    @classmethod
+    def from_value_counts(cls, value_counts: Dict[str, int]) -> "ColumnSummary":
+        """
+        Summarizes a column's distinct (stripped) values, weighted by their counts. If NumPy is installed, plain
+        integers and decimals are picked out with array operations, and only the remaining values are classified one
+        by one; the result is the same either way.
+        """
+
+        summary = cls()
+        values = list(value_counts)
+
+        plain = classify_plain_numbers(values, list(value_counts.values())) \
+            if len(values) >= MIN_VECTORIZED_VALUES else None
+
+        if plain is None:
+            for str_v, n in value_counts.items():
+                summary.add(str_v, n)
+            return summary
+
+        other_integers = []
+
+        for i in plain.other_indices.tolist():
+            str_v = values[i]
+            vc, fmt = classify_value(str_v)
+            summary._add_classified(str_v, value_counts[str_v], vc, fmt)
+            if vc == VC_INTEGER:
+                other_integers.append(i)
+
+        summary.rows += plain.integer_values + plain.decimal_values
+        summary.integer_values += plain.integer_values
+        summary.decimal_values += plain.decimal_values
+        summary.max_seen_decimals = max(summary.max_seen_decimals, plain.max_seen_decimals)
+        summary.max_seen_length = max(summary.max_seen_length, plain.max_seen_length)
+
+        # As when adding values one by one, keep the first few integers in the order they were first seen
+        summary.integer_values_set = set()
+        for i in merge(plain.integer_indices, other_integers):
+            if len(summary.integer_values_set) >= 3:
+                break
+            summary.integer_values_set.add(int(re.sub(RE_NUMBER_GROUP_SEPARATOR, "", values[i])))
+
+        return summary
+
+    def merge(self, other: "ColumnSummary") -> None:
+        self.rows += other.rows
+
+        self.integer_values += other.integer_values
+        self.decimal_values += other.decimal_values
+        self.float_values += other.float_values
+        self.date_values += other.date_values
+        self.time_values += other.time_values
+
+        for formats, other_formats in ((self.date_formats, other.date_formats),
+                                       (self.time_formats, other.time_formats)):
+            for fmt, n in other_formats.items():
+                formats[fmt] = formats.get(fmt, 0) + n
+
+        # Only values not already kept can fill the remaining slots of each capped set
+        for values, other_values, cap in ((self.integer_values_set, other.integer_values_set, 3),
+                                          (self.non_numeric_values, other.non_numeric_values, SUMMARY_VALUES_CAP),
+                                          (self.other_values, other.other_values, SUMMARY_VALUES_CAP)):
+            values.update(sorted(other_values - values)[:max(0, cap - len(values))])
+
+        self.max_seen_length = max(self.max_seen_length, other.max_seen_length)
+        self.max_seen_decimals = max(self.max_seen_decimals, other.max_seen_decimals)
+
+    def to_dict(self) -> dict:
+        return {
+            k: sorted(getattr(self, k)) if isinstance(getattr(self, k), set) else getattr(self, k)
+            for k in self.__slots__
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "ColumnSummary":
+        summary = cls()
+        for k in cls.__slots__:
+            v = getattr(summary, k)
+            setattr(summary, k, set(d[k]) if isinstance(v, set) else dict(d[k]) if isinstance(v, dict) else d[k])
+        return summary
+
+    @staticmethod
+    def dominant_format(formats: dict) -> Optional[str]:
+        """
+        Returns the format most values were seen in (the first alphabetically, in case of a tie), if any.
+        """
+        return min(formats, key=lambda fmt: (-formats[fmt], fmt)) if formats else None
+
+
+class ColumnProfile:
+    """
+    Running accumulators for a single column, from which the column's type can be inferred without keeping the
+    column itself in memory. Memory use grows with the number of distinct values seen, not the number of rows.
+
+    Rows are only counted as they are added; each distinct value is classified once, when a summary is requested,
+    with the resulting type counts weighted by how often the value occurred. Once distinct_cap distinct values have
+    been seen, values not seen before are classified straight away into an overflow summary instead of being kept.
+    Blank values are always kept, so that whether a column has blanks is known exactly.
+
+    Profiles can be serialized (see to_dict) and merged, so a profile of a new batch of rows can be added to a saved
+    profile of the rows before it.
+    """
+
+    def __init__(self, distinct_cap: int = DEFAULT_DISTINCT_CAP):
+        self.rows = 0
+        self.value_counts = {}
+        self.distinct_cap = distinct_cap
+        self.overflow = None  # type: Optional[ColumnSummary]
+        self._summary = None  # type: Optional[ColumnSummary]
+
+        # Set as soon as any value is seen more than once, so uniqueness is known without looking at every value.
+        self.has_duplicates = False
+
+        # Once the profile has overflowed, the number of distinct values can only be estimated.
+        self.sketch = None  # type: Optional[HyperLogLog]
+
+        # Result of an exact uniqueness check against the column's data, if one was done (see may_be_unique.)
+        self.exact_unique = None  # type: Optional[bool]
+
+    def _start_overflow(self) -> None:
+        self.overflow = ColumnSummary()
+        self.sketch = HyperLogLog()
+        self.sketch.update(self.value_counts)
+
+    def _count(self, str_v: str, n: int) -> None:
+        self.rows += n
+
+        if str_v in self.value_counts:
+            self.value_counts[str_v] += n
+            self.has_duplicates = True
+            return
+
+        if n > 1:
+            self.has_duplicates = True
+
+        if self.overflow is None and len(self.value_counts) >= self.distinct_cap and str_v != "":
+            self._start_overflow()
+
+        if self.overflow is None or str_v == "":
+            self.value_counts[str_v] = n
+        else:
+            self.overflow.add(str_v, n)
+
+        if self.sketch is not None:
+            self.sketch.add(str_v)
+
+    def _changed(self) -> None:
+        self._summary = None
+        self.exact_unique = None
+
+    def add(self, v) -> None:
+        self._count(str(v).strip(), 1)
+        self._changed()
+
+    def update(self, col: Iterable) -> None:
+        # Counting the raw values first is done in C, so per-value Python work only happens once per distinct value.
+        for v, n in Counter(col).items():
+            self._count(str(v).strip(), n)
+        self._changed()
+
+    def update_encoded(self, col) -> None:
+        """
+        Adds the values of a dictionary-encoded column (see analysis.columnar.EncodedColumn), counting its integer
+        codes rather than the strings themselves.
+        """
+
+        values = col.values
+        for code, n in Counter(col.codes).items():
+            self._count(values[code].strip(), n)
+        self._changed()
+
+    def merge(self, other: "ColumnProfile") -> None:
+        """
+        Adds the values counted by another profile (e.g. of a different part of the same column, or of a new batch of
+        rows) to this one.
+        """
+
+        for str_v, n in other.value_counts.items():
+            self._count(str_v, n)
+
+        if other.overflow is not None:
+            if self.overflow is None:
+                self._start_overflow()
+            self.overflow.merge(other.overflow)
+            self.sketch.merge(other.sketch)
+            self.rows += other.overflow.rows
+
+        self.has_duplicates = self.has_duplicates or other.has_duplicates
+        self._changed()
+
+    @property
+    def distinct_overflow(self) -> bool:
+        """
+        Whether some distinct values were not kept, in which case value_counts is incomplete.
+        """
+        return self.overflow is not None
+
+    def distinct_estimate(self) -> float:
+        """
+        Returns the number of distinct values in the column; this is exact unless the profile has overflowed.
+        """
+        return len(self.value_counts) if self.sketch is None else self.sketch.estimate()
+
+    def may_be_unique(self) -> bool:
+        """
+        Whether the column might not contain any value more than once. Columns which have overflowed are ruled out if
+        their estimated number of distinct values is clearly below the number of rows.
+        """
+
+        if self.has_duplicates:
+            return False
+
+        if self.sketch is None:
+            return True
+
+        return self.distinct_estimate() >= self.rows * (1 - 3 * self.sketch.standard_error)
+
+    def is_unique(self) -> bool:
+        """
+        Whether no value occurs more than once. If the profile has overflowed, this is only known after an exact check
+        against the data (recorded in exact_unique), since values which were not kept cannot be compared.
+        """
+
+        if not self.may_be_unique():
+            return False
+
+        return self.sketch is None or self.exact_unique is True
+
+    def summary(self) -> ColumnSummary:
+        if self._summary is None:
+            summary = ColumnSummary.from_value_counts(self.value_counts)
+            if self.overflow is not None:
+                summary.merge(self.overflow)
+            self._summary = summary
+
+        return self._summary
+
+    def to_dict(self) -> dict:
+        """
+        Returns a JSON-serializable representation of the profile.
+        """
+
+        return {
+            "rows": self.rows,
+            "value_counts": self.value_counts,
+            "distinct_cap": self.distinct_cap,
+            "overflow": None if self.overflow is None else self.overflow.to_dict(),
+            "has_duplicates": self.has_duplicates,
+            "sketch": None if self.sketch is None else self.sketch.to_dict(),
+            "exact_unique": self.exact_unique,
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "ColumnProfile":
+        profile = cls(d["distinct_cap"])
+        profile.rows = d["rows"]
+        profile.value_counts = dict(d["value_counts"])
+        profile.overflow = None if d["overflow"] is None else ColumnSummary.from_dict(d["overflow"])
+        profile.has_duplicates = d["has_duplicates"]
+        profile.sketch = None if d["sketch"] is None else HyperLogLog.from_dict(d["sketch"])
+        profile.exact_unique = d["exact_unique"]
+        return profile
+
+    @property
+    def distinct_values(self) -> int:
+        return len(self.value_counts)
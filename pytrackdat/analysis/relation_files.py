@@ -0,0 +1,133 @@
+# PyTrackDat is a utility for assisting in online database creation.
+# Copyright (C) 2018-2020 the PyTrackDat authors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Contact information:
+#     David Lougheed (david.lougheed@gmail.com)
+
+import csv
+
+from contextlib import contextmanager
+from itertools import chain
+from typing import Iterator, List, Sequence, Tuple
+
+from ..common import exit_with_error, open_text_file
+
+
+__all__ = [
+    "strip_blank_fields",
+    "is_blank_row",
+    "normalize_row",
+    "relation_file_shards",
+    "open_relation_file",
+    "extract_data_from_relation_file",
+    "read_relation_fields",
+]
+
+
+def strip_blank_fields(fields: tuple) -> tuple:
+    blank_tail = len(fields)
+    while blank_tail > 0 and fields[blank_tail-1].strip() == "":
+        blank_tail -= 1
+
+    return fields[:blank_tail]
+
+
+def is_blank_row(row: Sequence[str]) -> bool:
+    return "".join(row).strip() == ""
+
+
+def normalize_row(row: Sequence[str], n_fields: int) -> List[str]:
+    """
+    Strips each cell of a raw CSV row, padding it with blanks to at least n_fields cells.
+    """
+
+    row = [x.strip() for x in row]
+    if len(row) < n_fields:
+        # Treat missing trailing cells as blanks
+        row.extend([""] * (n_fields - len(row)))
+    return row
+
+
+def relation_file_shards(rf) -> Tuple[str, ...]:
+    """
+    Returns the files making up a relation, which is either stored in a single file or split across a sequence of
+    shard files (see common.find_relation_shards.)
+    """
+    return tuple(rf) if isinstance(rf, (list, tuple)) else (rf,)
+
+
+def _read_fields(data_reader) -> Tuple[str, ...]:
+    # TODO: strip or no? might cause errors but could handle in import.
+    return strip_blank_fields(tuple(f for f in next(data_reader, ())))
+
+
+def _shard_rows(shards: Sequence[str], fields: Tuple[str, ...]) -> Iterator[List[str]]:
+    for shard in shards:
+        with open_text_file(shard) as ff:
+            data_reader = csv.reader(ff, delimiter=",")
+            if _read_fields(data_reader) != fields:
+                exit_with_error("Error: The fields of shard '{}' do not match those of the relation's other "
+                                "shards".format(shard))
+            yield from data_reader
+
+
+@contextmanager
+def open_relation_file(rf, raw: bool = False) -> Iterator[Tuple[Tuple[str, ...], Iterator[List[str]]]]:
+    """
+    Opens a (possibly compressed) relation file, providing its fields along with a lazy iterator over its (stripped,
+    non-blank) rows, so that callers can stream through the file without holding it in memory. Rows are padded with
+    blanks to at least the number of fields. If raw is true, rows are provided exactly as parsed, and it is up to the
+    caller to skip blank rows and normalize the rest (see is_blank_row and normalize_row.)
+
+    A sequence of shard files with identical headers can be given instead of a single file; their rows are provided
+    one shard after another, as if they were all in one file.
+    """
+
+    shards = relation_file_shards(rf)
+
+    with open_text_file(shards[0]) as ff:
+        data_reader = csv.reader(ff, delimiter=",")
+        fields = _read_fields(data_reader)
+
+        if len(fields) == 0:
+            exit_with_error("Error: No fields detected")
+
+        if len(shards) > 1:
+            data_reader = chain(data_reader, _shard_rows(shards[1:], fields))
+
+        if raw:
+            yield fields, data_reader
+            return
+
+        n_fields = len(fields)
+
+        def _rows():
+            for d in data_reader:
+                # Skip blank rows, they're likely CSV artifacts
+                if not is_blank_row(d):
+                    yield normalize_row(d, n_fields)
+
+        yield fields, _rows()
+
+
+def extract_data_from_relation_file(rf):
+    with open_relation_file(rf) as (fields, rows):
+        return list(rows), fields
+
+
+def read_relation_fields(rf) -> Tuple[str, ...]:
+    with open_relation_file(rf) as (fields, _rows):
+        return fields
@@ -0,0 +1,126 @@
+# PyTrackDat is a utility for assisting in online database creation.
+# Copyright (C) 2018-2020 the PyTrackDat authors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Contact information:
+#     David Lougheed (david.lougheed@gmail.com)
+
+import random
+
+from itertools import islice
+from math import exp, floor, log
+from typing import Dict, List, Tuple
+
+from ..common import *
+from .columnar import ColumnarRelation
+from .profile import ColumnProfile
+from .relation_files import is_blank_row, normalize_row, open_relation_file
+
+
+__all__ = [
+    "SAMPLE_SEED",
+    "sample_relation_file",
+    "inference_confidence",
+]
+
+
+# Fixed so that repeated sampled runs over the same file produce the same design file
+SAMPLE_SEED = 1
+
+
+def _random_open(rng: random.Random) -> float:
+    # Uniform on (0, 1), so that logarithms below are always defined
+    r = rng.random()
+    while r == 0.0:
+        r = rng.random()
+    return r
+
+
+def sample_relation_file(rf, n: int, seed: int = SAMPLE_SEED) -> Tuple[Tuple[str, ...], List[ColumnProfile], int]:
+    """
+    Reservoir-samples up to n rows from a relation file in a single streaming pass, returning the relation's fields,
+    profiles of the sampled rows, and the total number of rows in the file. Uses Algorithm L, which jumps over rows
+    that will not enter the reservoir instead of drawing a random number for every row.
+    """
+
+    rng = random.Random(seed)
+
+    with open_relation_file(rf, raw=True) as (fields, raw_rows):
+        n_fields = len(fields)
+
+        # Rows are only normalized once they are known to be part of the sample
+        rows = (row for row in raw_rows if not is_blank_row(row))
+
+        # The reservoir is kept dictionary-encoded, so repeated values in the sample share storage
+        reservoir = ColumnarRelation(fields)
+        for row in islice(rows, n):
+            reservoir.append_row(normalize_row(row, n_fields))
+
+        total_rows = reservoir.rows
+
+        if n > 0 and total_rows == n:
+            w = exp(log(_random_open(rng)) / n)
+            skip = floor(log(_random_open(rng)) / log(1 - w))
+
+            for row in rows:
+                total_rows += 1
+
+                if skip > 0:
+                    skip -= 1
+                    continue
+
+                reservoir.set_row(rng.randrange(n), normalize_row(row, n_fields))
+                w *= exp(log(_random_open(rng)) / n)
+                skip = floor(log(_random_open(rng)) / log(1 - w))
+
+    profiles = [ColumnProfile() for _ in fields]
+    for p, col in zip(profiles, reservoir.columns):
+        p.update_encoded(col)
+
+    return fields, profiles, total_rows
+
+
+def inference_confidence(profile: ColumnProfile, inference: Dict) -> float:
+    """
+    Returns the fraction of a profile's values which fit the type that was inferred from it, counting values that
+    will be stored as null as fitting. Keys, booleans and text accept every value they were inferred from.
+    """
+
+    summary = profile.summary()
+    detected_type = inference["detected_type"]
+
+    if summary.rows == 0:
+        return 1.0
+
+    if detected_type == DT_INTEGER:
+        fitting = summary.integer_values
+        null_candidates = summary.non_numeric_values
+    elif detected_type in (DT_DECIMAL, DT_FLOAT):
+        fitting = summary.integer_values + summary.decimal_values
+        null_candidates = summary.non_numeric_values
+    elif detected_type == DT_DATE:
+        fitting = summary.date_values
+        null_candidates = summary.other_values
+    elif detected_type == DT_TIME:
+        fitting = summary.time_values
+        null_candidates = summary.other_values
+    else:
+        return 1.0
+
+    # A single non-matching value is treated as the null value for the column
+    if inference["nullable"] and not inference["include_alternate"] and len(null_candidates) == 1:
+        fitting += profile.value_counts.get(next(iter(null_candidates)), 0)
+
+    return fitting / summary.rows
@@ -0,0 +1,134 @@
+# PyTrackDat is a utility for assisting in online database creation.
+# Copyright (C) 2018-2020 the PyTrackDat authors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Contact information:
+#     David Lougheed (david.lougheed@gmail.com)
+
+import hashlib
+
+from math import ceil, log, sqrt
+from typing import Iterable, Tuple
+
+
+__all__ = [
+    "hash_value_64",
+    "BloomFilter",
+    "HyperLogLog",
+]
+
+
+def _hash_pair(v: str) -> Tuple[int, int]:
+    # Stable across processes and runs (unlike hash()), so sketches can be shared with workers or saved to disk.
+    digest = hashlib.blake2b(v.encode("utf-8"), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little")
+
+
+def hash_value_64(v: str) -> int:
+    return _hash_pair(v)[0]
+
+
+class BloomFilter:
+    """
+    A compact, approximate set: membership tests never give false negatives, and give false positives at (roughly)
+    the error rate the filter was sized for.
+    """
+
+    __slots__ = ("n_bits", "n_hashes", "bits")
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(1, capacity)
+        self.n_bits = max(8, int(ceil(-capacity * log(error_rate) / (log(2) ** 2))))
+        self.n_hashes = max(1, int(round(self.n_bits / capacity * log(2))))
+        self.bits = bytearray((self.n_bits + 7) // 8)
+
+    @classmethod
+    def from_values(cls, values: Iterable[str], capacity: int, error_rate: float = 0.01) -> "BloomFilter":
+        bf = cls(capacity, error_rate)
+        for v in values:
+            bf.add(v)
+        return bf
+
+    def _positions(self, v: str):
+        # Double hashing (Kirsch & Mitzenmacher): k positions from two independent hashes
+        h1, h2 = _hash_pair(v)
+        n_bits = self.n_bits
+        return ((h1 + i * h2) % n_bits for i in range(self.n_hashes))
+
+    def add(self, v: str) -> None:
+        bits = self.bits
+        for pos in self._positions(v):
+            bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, v: str) -> bool:
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(v))
+
+
+class HyperLogLog:
+    """
+    An approximate distinct value counter (Flajolet et al.) using a fixed amount of memory: one byte per register,
+    with 2 ** precision registers. Estimates have a relative standard error of about 1.04 / sqrt(2 ** precision).
+    """
+
+    __slots__ = ("precision", "registers")
+
+    def __init__(self, precision: int = 14):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    @property
+    def standard_error(self) -> float:
+        return 1.04 / sqrt(len(self.registers))
+
+    def add(self, v: str) -> None:
+        h = hash_value_64(v)
+        p = self.precision
+        w = (h << p) & 0xFFFFFFFFFFFFFFFF
+        # Position of the leftmost 1 in the remaining 64 - p bits
+        rank = min(64 - w.bit_length(), 64 - p) + 1
+        i = h >> (64 - p)
+        if rank > self.registers[i]:
+            self.registers[i] = rank
+
+    def update(self, values: Iterable[str]) -> None:
+        for v in values:
+            self.add(v)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        if other.precision != self.precision:
+            raise ValueError("cannot merge HyperLogLog sketches of different precisions")
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    def estimate(self) -> float:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros > 0:
+            # Small range correction: linear counting is more accurate while many registers are still empty
+            return m * log(m / zeros)
+
+        return raw
+
+    def to_dict(self) -> dict:
+        return {"precision": self.precision, "registers": self.registers.hex()}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "HyperLogLog":
+        hll = cls(d["precision"])
+        hll.registers = bytearray.fromhex(d["registers"])
+        return hll
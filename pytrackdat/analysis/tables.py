@@ -0,0 +1,126 @@
+# PyTrackDat is a utility for assisting in online database creation.
+# Copyright (C) 2018-2020 the PyTrackDat authors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Contact information:
+#     David Lougheed (david.lougheed@gmail.com)
+
+from collections.abc import Mapping
+from itertools import chain
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+from .relation_files import is_blank_row, strip_blank_fields
+
+
+__all__ = [
+    "cell_to_str",
+    "table_columns",
+    "table_rows",
+]
+
+
+def cell_to_str(v: Any) -> str:
+    """
+    Converts an in-memory value to the string it would have been in a relation file; missing values (None or NaN)
+    become blanks.
+    """
+
+    if v is None or (isinstance(v, float) and v != v):
+        return ""
+
+    if isinstance(v, bytes):
+        return v.decode("utf-8")
+
+    return str(v)
+
+
+def _is_record_array(data) -> bool:
+    # NumPy structured / record arrays have named fields in their dtype
+    return getattr(getattr(data, "dtype", None), "names", None) is not None
+
+
+def _is_data_frame(data) -> bool:
+    # pandas (and look-alike) data frames
+    return hasattr(data, "columns") and hasattr(data, "iloc")
+
+
+def _drop_blank_rows(columns: List[List[str]]) -> List[List[str]]:
+    # Rows which are blank in every column are skipped, as in relation files
+    blank = None
+    for col in columns:
+        col_blank = {i for i, v in enumerate(col) if v.strip() == ""}
+        blank = col_blank if blank is None else blank & col_blank
+        if not blank:
+            return columns
+
+    return [[v for i, v in enumerate(col) if i not in blank] for col in columns]
+
+
+def table_columns(data) -> Optional[Tuple[Tuple[str, ...], List[List[str]]]]:
+    """
+    If an in-memory table is column-oriented (a mapping of field names to columns, a pandas data frame or a NumPy
+    record array), returns its fields and the values of each column, converted to strings (see cell_to_str) and
+    without the rows which are blank in every column. Otherwise, returns None.
+    """
+
+    if isinstance(data, Mapping):
+        fields, columns = tuple(map(str, data.keys())), [data[k] for k in data.keys()]
+    elif _is_data_frame(data):
+        fields, columns = tuple(map(str, data.columns)), [data[c] for c in data.columns]
+    elif _is_record_array(data):
+        fields, columns = tuple(data.dtype.names), [data[n] for n in data.dtype.names]
+    else:
+        return None
+
+    return fields, _drop_blank_rows([[cell_to_str(v) for v in col] for col in columns])
+
+
+def table_rows(data: Iterable) -> Tuple[Tuple[str, ...], Iterator[List[str]]]:
+    """
+    Returns the fields of a row-oriented in-memory table, along with a lazy iterator over its rows, which are made
+    to look like those of a relation file (see relation_files.open_relation_file.) Rows may either be mappings of
+    field names to values, or sequences of values following a header row of field names. Blank rows are skipped.
+    """
+
+    rows = iter(data)
+    first = next(rows, None)
+
+    if first is None:
+        return (), iter(())
+
+    if isinstance(first, Mapping):
+        fields = tuple(map(str, first.keys()))
+        keys = tuple(first.keys())
+
+        def _mapping_rows():
+            for r in chain((first,), rows):
+                row = [cell_to_str(r.get(k)).strip() for k in keys]
+                if not is_blank_row(row):
+                    yield row
+
+        return fields, _mapping_rows()
+
+    fields = strip_blank_fields(tuple(cell_to_str(f).strip() for f in first))
+    n_fields = len(fields)
+
+    def _rows():
+        for r in rows:
+            row = [cell_to_str(v).strip() for v in r]
+            if is_blank_row(row):
+                continue  # Skip blank rows, as in relation files
+            row.extend([""] * (n_fields - len(row)))
+            yield row
+
+    return fields, _rows()
@@ -0,0 +1,127 @@
+# PyTrackDat is a utility for assisting in online database creation.
+# Copyright (C) 2018-2020 the PyTrackDat authors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Contact information:
+#     David Lougheed (david.lougheed@gmail.com)
+
+
+from typing import Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is an optional extra (pip install pytrackdat[numpy])
+    np = None
+
+
+__all__ = [
+    "NUMPY_AVAILABLE",
+    "MIN_VECTORIZED_VALUES",
+    "PlainNumbers",
+    "classify_plain_numbers",
+]
+
+
+NUMPY_AVAILABLE = np is not None
+
+# Below this many values, setting up the arrays costs more than classifying the values one by one does
+MIN_VECTORIZED_VALUES = 256
+
+# Longer values are never plain numbers in practice, and would make the character matrix below needlessly wide
+MAX_PLAIN_NUMBER_LENGTH = 32
+
+CHAR_0 = ord("0")
+CHAR_9 = ord("9")
+CHAR_PLUS = ord("+")
+CHAR_MINUS = ord("-")
+CHAR_DOT = ord(".")
+
+
+class PlainNumbers:
+    """
+    Counts for the values of a column which are plain integers or decimals, along with the indices of the integers
+    (for picking the first few, as ColumnSummary does) and of every other value, which still need to be classified.
+    """
+
+    __slots__ = (
+        "integer_values",
+        "decimal_values",
+        "max_seen_decimals",
+        "max_seen_length",
+        "integer_indices",
+        "other_indices",
+    )
+
+    def __init__(self, integer_values: int, decimal_values: int, max_seen_decimals: int, max_seen_length: int,
+                 integer_indices: Sequence[int], other_indices: Sequence[int]):
+        self.integer_values = integer_values
+        self.decimal_values = decimal_values
+        self.max_seen_decimals = max_seen_decimals
+        self.max_seen_length = max_seen_length
+        self.integer_indices = integer_indices
+        self.other_indices = other_indices
+
+
+def classify_plain_numbers(values: Sequence[str], counts: Sequence[int]) -> Optional[PlainNumbers]:
+    """
+    Finds the values which are plain integers ([-+]?\\d+) or decimals ([-+]?\\d*\\.\\d+) using array operations on
+    their characters, classifying them exactly as common.classify_value would. Returns None if NumPy is not installed.
+    """
+
+    if np is None:
+        return None
+
+    n = len(values)
+    lengths = np.fromiter(map(len, values), dtype=np.int64, count=n)
+    n_counts = np.fromiter(counts, dtype=np.int64, count=n)
+
+    short = np.flatnonzero(lengths <= MAX_PLAIN_NUMBER_LENGTH)
+    s_lengths = lengths[short]
+    width = max(1, int(s_lengths.max())) if len(short) else 1
+
+    # One row of UTF-32 code points per value, padded with zeros (which, like any other character outside the plain
+    # number alphabet, make a value fall through to one-by-one classification.)
+    chars = np.array(values, dtype=object)[short].astype("U{}".format(width)).view(np.uint32).reshape(-1, width)
+    within = np.arange(width) < s_lengths[:, None]
+
+    digit = (chars >= CHAR_0) & (chars <= CHAR_9)
+    dot = chars == CHAR_DOT
+    signed = (chars[:, 0] == CHAR_PLUS) | (chars[:, 0] == CHAR_MINUS)
+
+    allowed = digit | dot
+    allowed[:, 0] |= signed
+
+    n_dots = dot.sum(axis=1)
+    decimals = np.where(n_dots == 1, s_lengths - dot.argmax(axis=1) - 1, -1)
+
+    plain = (allowed | ~within).all(axis=1) & (digit.sum(axis=1) > 0) & (n_dots <= 1) & (decimals != 0)
+
+    # Integers can't have leading zeros, except for 0 itself; other digit strings (e.g. 007 or -0) are decimals.
+    first_digit = chars[np.arange(len(short)), signed.astype(np.int64)]
+    integer = plain & (n_dots == 0) & ((first_digit != CHAR_0) | (s_lengths == 1))
+    decimal = plain & ~integer
+
+    s_counts = n_counts[short]
+    is_plain = np.zeros(n, dtype=bool)
+    is_plain[short] = plain
+
+    return PlainNumbers(
+        integer_values=int(s_counts[integer].sum()),
+        decimal_values=int(s_counts[decimal].sum()),
+        max_seen_decimals=int(decimals[decimal].max()) if decimal.any() else -1,
+        max_seen_length=int(s_lengths[plain].max()) if plain.any() else -1,
+        integer_indices=short[integer],
+        other_indices=np.flatnonzero(~is_plain),
+    )
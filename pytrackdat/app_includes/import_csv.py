@@ -27,9 +27,7 @@ from django.apps import apps
 from django.shortcuts import redirect, render
 from django.urls import path
 
-from datetime import datetime
 from decimal import *
-from io import TextIOWrapper
 
 from .common import *
 
@@ -43,6 +41,246 @@ LINE_STRING_REGEX = r"\(\s*(-?\d+(\.\d+)\s+-?\d+(\.\d+),\s+)*-?\d+(\.\d+)\s*\)"
 POLYGON_REGEX = r"\(\s*({ls},\s*)*{ls}\s*\)".format(ls=LINE_STRING_REGEX)
 
 
+def iter_model_objects(model, csv_file):
+    """
+    Converts the rows of a CSV file (with either the model's CSV column names or its field names as headers) into
+    unsaved objects of the given model, one row at a time.
+    """
+
+    reader = csv.DictReader(csv_file)
+
+    model_name = model.__name__
+    ptd_info = model.ptd_info()
+    headers = [h.strip() for h in reader.fieldnames if h != ""]
+
+    # TODO: This logic might break with auto keys...
+
+    header_fields_1 = {h: tuple(f for f in ptd_info if h in f["csv_names"]) for h in headers
+                       if len([f for f in ptd_info if h in f["csv_names"]]) > 0}
+    header_fields_2 = {h.lower(): tuple(f for f in ptd_info if h.lower() == f["name"]) for h in headers
+                       if len([f for f in ptd_info if h == f["name"]]) > 0}
+
+    # Option of using database field names as headers, but keep it consistent.
+    header_fields = header_fields_1 if len(header_fields_1) >= len(header_fields_2) else header_fields_2
+
+    models = {m.__name__: m for m in apps.get_app_config("core").get_models()}
+
+    # One parser per date/time field, using the field's format (if the design file specifies one) before falling back
+    # to trying every supported format.
+    date_time_parsers = {
+        f["name"]: make_date_time_parser(f["data_type"], next(
+            (a.strip() for a in f["additional_fields"] if a.strip() != ""), None))
+        for f in ptd_info if f["data_type"] in (DT_DATE, DT_TIME)
+    }
+
+    for i, row in enumerate(reader, 1):
+        object_data = {}
+
+        values = set(v.strip() for v in row.values())
+        if len(values) == 1 and "" in values:
+            # Skip blank rows
+            continue
+
+        for h in header_fields:
+            str_v = row[h].strip()
+            value_class, _fmt = classify_value(str_v)
+            for f in header_fields[h]:
+                if f["data_type"] == DT_AUTO_KEY:
+                    # Key is automatically generated by the database, skip it.
+                    pass
+
+                object_data[f["name"]] = object_data.get(f["name"], {})
+
+                if f["data_type"] == DT_MANUAL_KEY:
+                    object_data[f["name"]][h] = str_v
+                    break
+
+                elif f["data_type"] == DT_INTEGER:
+                    if value_class == VC_INTEGER:
+                        object_data[f["name"]][h] = int(re.sub(RE_NUMBER_GROUP_SEPARATOR, "", str_v))
+                        break
+                    elif f["nullable"]:
+                        # TODO: This assumes null if not integer-like, might be wrong
+                        object_data[f["name"]][h] = None
+                    else:
+                        raise ValueError("Line {}: Incorrect value for integer field {}: {}".format(
+                            i, f["name"], str_v))
+
+                elif f["data_type"] in (DT_FLOAT, DT_DECIMAL):
+                    if value_class in (VC_INTEGER, VC_DECIMAL, VC_FLOAT):
+                        n_str_v = re.sub(RE_NUMBER_GROUP_SEPARATOR, "", str_v.lower())
+                        object_data[f["name"]][h] = (float(n_str_v) if f["data_type"] == "float"
+                                                     else Decimal(n_str_v))
+                        break
+                    elif f["nullable"]:
+                        # TODO: This assumes null if not integer-like, might be wrong
+                        object_data[f["name"]][h] = None
+                    else:
+                        raise ValueError("Line {}: Incorrect value for float field {}: {}".format(
+                            i, f["name"], str_v.lower()))
+
+                elif f["data_type"] == DT_BOOLEAN:
+                    if str_v.lower() in BOOLEAN_TRUE_VALUES + BOOLEAN_FALSE_VALUES:
+                        object_data[f["name"]][h] = str_v.lower() in BOOLEAN_TRUE_VALUES
+                        break
+                    elif f["nullable"]:
+                        object_data[f["name"]][h] = None
+                    else:
+                        raise ValueError("Line {}: Incorrect value for boolean field {}: {}".format(
+                            i, f["name"], str_v.lower()))
+
+                elif f["data_type"] == DT_TEXT:
+                    max_length = -1
+                    choices = []
+
+                    # TODO: More coersion for choices
+
+                    additional_fields = [f.strip() for f in f["additional_fields"] if f.strip() != ""]
+
+                    if len(additional_fields) in (1, 2):
+                        max_length = int(additional_fields[0])
+                        if len(additional_fields) == 2:
+                            choices = [c.strip() for c in additional_fields[1].split(";")]
+
+                    if 0 < max_length < len(str_v):
+                        raise ValueError("Line {}: Value for text field {} exceeded maximum length: "
+                                         "{}".format(i, f["name"], max_length))
+
+                    if len(choices) > 0 and str_v not in choices:
+                        if f["nullable"]:
+                            # TODO: This assumes null if not integer-like, might be wrong
+                            object_data[f["name"]][h] = None
+                        else:
+                            raise ValueError(
+                                "Line {}: Value for text field {} in model {} is not one of the available "
+                                "choices {}: {}".format(
+                                    i, f["name"], model_name, tuple(choices), str_v))
+
+                    object_data[f["name"]][h] = str_v
+                    break
+
+                elif f["data_type"] in (DT_DATE, DT_TIME):
+                    # TODO: Further validation
+                    date_time_value = date_time_parsers[f["name"]](str_v)
+                    if date_time_value is not None:
+                        object_data[f["name"]][h] = date_time_value
+                        break
+
+                    if not f["nullable"]:
+                        raise ValueError("Line {}: Incorrect value for date field {} in model {}: "
+                                         "{}".format(i, f["name"], model_name, str_v))
+
+                    object_data[f["name"]][h] = None
+
+                elif f["data_type"] == DT_FOREIGN_KEY:
+                    # TODO: TYPES PROPERLY
+                    rel_name = to_relation_name(f["additional_fields"][0])
+                    rel_id_data_type = models[rel_name].get_id_type()
+
+                    if rel_id_data_type == "":
+                        raise ValueError("Line {}: Target model for foreign key field {} in model {} has "
+                                         "no primary key.".format(i, f["name"], model_name))
+
+                    foreign_key_value = str_v
+                    if rel_id_data_type == "integer":
+                        foreign_key_value = int(foreign_key_value)
+
+                    if rel_name not in models:
+                        raise ValueError("Line {}: Unavailable model reference for foreign key field "
+                                         "{} in model {}: {}".format(i, f["name"], model_name, rel_name))
+                    object_data[f["name"]][h] = models[rel_name].objects.get(pk=foreign_key_value)
+                    # TODO!
+
+                elif f["data_type"] == DT_GIS_POINT:
+                    # WKT Point
+                    if len(f["csv_names"]) == 1 and \
+                            re.match(r"^POINT\s*{}$".format(POINT_REGEX), str_v.upper()):
+                        object_data[f["name"]] = str_v.upper()
+                    elif len(f["csv_names"]) == 1 and \
+                            re.match(r"^\(?-?\d+(\.\d+)?,?\s+-?\d+(\.\d+)?\)?$", str_v):
+                        # Coerce (5 7), (5, 7), etc. to WKT format
+                        object_data[f["name"]][h] = "POINT ({})".format(
+                            str_v.replace(",", "").replace("(", "").replace(")", ""))
+                    elif len(f["csv_names"]) == 2 and re.match(r"^-?\d+(\.\d+)?$", str_v) and len(h) == 1:
+                        # One component of coordinates
+                        object_data[f["name"]][h] = str_v
+                    elif str_v == "":  # POINTs cannot be Null, so assume (0, 0)
+                        object_data[f["name"]][h] = "0"
+                    else:
+                        # TODO: NEED TO HANDLE NULLABLE (DONT THINK IT IS NULLABLE) OR BLANK...
+                        raise ValueError("Line {}: Incorrect value for point field {}: {}".format(
+                            i, f["name"], str_v.upper()))
+
+                elif f["data_type"] == DT_GIS_LINE_STRING:
+                    # WKT Line String
+                    if re.match(r"^LINESTRING\s*{}$".format(LINE_STRING_REGEX),
+                                str_v.upper()):
+                        object_data[f["name"]][h] = str_v.upper()
+                    else:
+                        # TODO: NEED TO HANDLE NULLABLE (DONT THINK IT IS NULLABLE) OR BLANK...
+                        raise ValueError("Line {}: Incorrect value for line string field {}: {}".format(
+                            i, f["name"], str_v.upper()))
+
+                elif f["data_type"] == DT_GIS_POLYGON:
+                    # WKT Polygon
+                    if re.match(r"^POLYGON\s*{}".format(POLYGON_REGEX),
+                                str_v.upper()):
+                        object_data[f["name"]][h] = str_v.upper()
+                    else:
+                        # TODO: NEED TO HANDLE NULLABLE (DONT THINK IT IS NULLABLE) OR BLANK...
+                        raise ValueError("Line {}: Incorrect value for polygon field {}: {}".format(
+                            i, f["name"], str_v.upper()))
+
+                elif f["data_type"] == DT_GIS_MULTI_POINT:
+                    # WKT Multi Point
+                    if re.match(r"MULTIPOINT\s*\(({pt},\s*)*{pt}\s*\)".format(pt=POINT_REGEX),
+                                str_v.upper()):
+                        object_data[f["name"]][h] = str_v.upper()
+                    else:
+                        # TODO: NEED TO HANDLE NULLABLE (DONT THINK IT IS NULLABLE) OR BLANK...
+                        raise ValueError("Line {}: Incorrect value for multi point field {}: {}".format(
+                            i, f["name"], str_v.upper()))
+
+                elif f["data_type"] == DT_GIS_MULTI_LINE_STRING:
+                    if re.match(r"MULTILINESTRING\s*\(({ls},\s*)*{ls}\s*\)".format(ls=LINE_STRING_REGEX),
+                                str_v.upper()):
+                        object_data[f["name"]][h] = str_v.upper()
+                    else:
+                        # TODO: NEED TO HANDLE NULLABLE (DONT THINK IT IS NULLABLE) OR BLANK...
+                        raise ValueError("Line {}: Incorrect value for multi line string field {}: "
+                                         "{}".format(i, f["name"], str_v.upper()))
+
+                elif f["data_type"] == DT_GIS_MULTI_POLYGON:
+                    if re.match(r"MULTIPOLYGON\s*\(({p},\s*)*{p}\s*\)".format(p=POLYGON_REGEX),
+                                str_v.upper()):
+                        object_data[f["name"]][h] = str_v.upper()
+                    else:
+                        # TODO: NEED TO HANDLE NULLABLE (DONT THINK IT IS NULLABLE) OR BLANK...
+                        raise ValueError("Line {}: Incorrect value for multi polygon field {}: {}".format(
+                            i, f["name"], str_v.upper()))
+
+                else:
+                    raise ValueError("Invalid data type: {}".format(f["data_type"]))
+
+        for f in ptd_info:
+            if len(object_data.get(f["name"], {})) == 1:
+                object_data[f["name"]] = object_data[f["name"]][list(object_data[f["name"]].keys())[0]]
+            elif len(object_data.get(f["name"], {})) == 2 and f["data_type"] == DT_GIS_POINT:
+                # TODO: More systematic / nicer way of doing this
+                object_data[f["name"]] = "POINT ({})".format(" ".join(c[1] for c in sorted(
+                    ((k, v) for k, v in object_data[f["name"]].items()),
+                    key=lambda c: f["csv_names"].index(c[0]))))
+
+        yield model(**object_data)
+
+
+def read_model_objects(model, csv_file) -> list:
+    """
+    Converts the rows of a CSV file into a list of unsaved objects of the given model (see iter_model_objects.)
+    """
+    return list(iter_model_objects(model, csv_file))
+
+
 class ImportCSVForm(forms.Form):
     csv_file = forms.FileField()
 
@@ -55,238 +293,14 @@ class ImportCSVMixin:
             if form.is_valid():
                 encoding = form.cleaned_data["csv_file"].charset \
                     if form.cleaned_data["csv_file"].charset else "utf-8-sig"
-                csv_file = TextIOWrapper(request.FILES["csv_file"], encoding=encoding)
-
-                reader = csv.DictReader(csv_file)
-
-                model_name = self.model.__name__
-                ptd_info = self.model.ptd_info()
-                headers = [h.strip() for h in reader.fieldnames if h != ""]
-
-                # TODO: This logic might break with auto keys...
-
-                header_fields_1 = {h: tuple(f for f in ptd_info if h in f["csv_names"]) for h in headers
-                                   if len([f for f in ptd_info if h in f["csv_names"]]) > 0}
-                header_fields_2 = {h.lower(): tuple(f for f in ptd_info if h.lower() == f["name"]) for h in headers
-                                   if len([f for f in ptd_info if h == f["name"]]) > 0}
-
-                # Option of using database field names as headers, but keep it consistent.
-                header_fields = header_fields_1 if len(header_fields_1) >= len(header_fields_2) else header_fields_2
-
-                models = {m.__name__: m for m in apps.get_app_config("core").get_models()}
+                # Compressed (gzip, bzip2, xz or zip) uploads are decompressed as they are read
+                csv_file = open_text_file(request.FILES["csv_file"], encoding=encoding)
 
+                # Take a snapshot before anything is changed, so the import can be rolled back
                 snapshot = Snapshot(snapshot_type='auto', reason='Pre-import snapshot')
                 snapshot.save()
 
-                model_objects = []
-
-                for i, row in enumerate(reader, 1):
-                    object_data = {}
-
-                    values = set(v.strip() for v in row.values())
-                    if len(values) == 1 and "" in values:
-                        # Skip blank rows
-                        continue
-
-                    for h in header_fields:
-                        str_v = row[h].strip()
-                        for f in header_fields[h]:
-                            if f["data_type"] == DT_AUTO_KEY:
-                                # Key is automatically generated by the database, skip it.
-                                pass
-
-                            object_data[f["name"]] = object_data.get(f["name"], {})
-
-                            if f["data_type"] == DT_MANUAL_KEY:
-                                object_data[f["name"]][h] = str_v
-                                break
-
-                            elif f["data_type"] == DT_INTEGER:
-                                if re.match(RE_INTEGER, str_v) or re.match(RE_INTEGER_HUMAN, str_v):
-                                    object_data[f["name"]][h] = int(re.sub(RE_NUMBER_GROUP_SEPARATOR, "", str_v))
-                                    break
-                                elif f["nullable"]:
-                                    # TODO: This assumes null if not integer-like, might be wrong
-                                    object_data[f["name"]][h] = None
-                                else:
-                                    raise ValueError("Line {}: Incorrect value for integer field {}: {}".format(
-                                        i, f["name"], str_v))
-
-                            elif f["data_type"] in (DT_FLOAT, DT_DECIMAL):
-                                if re.match(RE_DECIMAL, str_v.lower()):
-                                    n_str_v = re.sub(RE_NUMBER_GROUP_SEPARATOR, "", str_v.lower())
-                                    object_data[f["name"]][h] = (float(n_str_v) if f["data_type"] == "float"
-                                                                 else Decimal(n_str_v))
-                                    break
-                                elif f["nullable"]:
-                                    # TODO: This assumes null if not integer-like, might be wrong
-                                    object_data[f["name"]][h] = None
-                                else:
-                                    raise ValueError("Line {}: Incorrect value for float field {}: {}".format(
-                                        i, f["name"], str_v.lower()))
-
-                            elif f["data_type"] == DT_BOOLEAN:
-                                if str_v.lower() in BOOLEAN_TRUE_VALUES + BOOLEAN_FALSE_VALUES:
-                                    object_data[f["name"]][h] = str_v.lower() in BOOLEAN_TRUE_VALUES
-                                    break
-                                elif f["nullable"]:
-                                    object_data[f["name"]][h] = None
-                                else:
-                                    raise ValueError("Line {}: Incorrect value for boolean field {}: {}".format(
-                                        i, f["name"], str_v.lower()))
-
-                            elif f["data_type"] == DT_TEXT:
-                                max_length = -1
-                                choices = []
-
-                                # TODO: More coersion for choices
-
-                                additional_fields = [f.strip() for f in f["additional_fields"] if f.strip() != ""]
-
-                                if len(additional_fields) in (1, 2):
-                                    max_length = int(additional_fields[0])
-                                    if len(additional_fields) == 2:
-                                        choices = [c.strip() for c in additional_fields[1].split(";")]
-
-                                if 0 < max_length < len(str_v):
-                                    raise ValueError("Line {}: Value for text field {} exceeded maximum length: "
-                                                     "{}".format(i, f["name"], max_length))
-
-                                if len(choices) > 0 and str_v not in choices:
-                                    if f["nullable"]:
-                                        # TODO: This assumes null if not integer-like, might be wrong
-                                        object_data[f["name"]][h] = None
-                                    else:
-                                        raise ValueError(
-                                            "Line {}: Value for text field {} in model {} is not one of the available "
-                                            "choices {}: {}".format(
-                                                i, f["name"], model_name, tuple(choices), str_v))
-
-                                object_data[f["name"]][h] = str_v
-                                break
-
-                            elif f["data_type"] in (DT_DATE, DT_TIME):
-                                # TODO: More date formats
-                                # TODO: Further validation
-                                # TODO: Encode format somewhere?
-                                found_date = False
-                                for dr, df in (DATE_FORMATS if f["data_type"] == "date" else TIME_FORMATS):
-                                    if re.match(dr, str_v):
-                                        object_data[f["name"]][h] = datetime.strptime(str_v, df)
-                                        found_date = True
-                                        break
-
-                                if found_date:
-                                    break
-
-                                if not f["nullable"]:
-                                    raise ValueError("Line {}: Incorrect value for date field {} in model {}: "
-                                                     "{}".format(i, f["name"], model_name, str_v))
-
-                                object_data[f["name"]][h] = None
-
-                            elif f["data_type"] == DT_FOREIGN_KEY:
-                                # TODO: TYPES PROPERLY
-                                rel_name = to_relation_name(f["additional_fields"][0])
-                                rel_id_data_type = models[rel_name].get_id_type()
-
-                                if rel_id_data_type == "":
-                                    raise ValueError("Line {}: Target model for foreign key field {} in model {} has "
-                                                     "no primary key.".format(i, f["name"], model_name))
-
-                                foreign_key_value = str_v
-                                if rel_id_data_type == "integer":
-                                    foreign_key_value = int(foreign_key_value)
-
-                                if rel_name not in models:
-                                    raise ValueError("Line {}: Unavailable model reference for foreign key field "
-                                                     "{} in model {}: {}".format(i, f["name"], model_name, rel_name))
-                                object_data[f["name"]][h] = models[rel_name].objects.get(pk=foreign_key_value)
-                                # TODO!
-
-                            elif f["data_type"] == DT_GIS_POINT:
-                                # WKT Point
-                                if len(f["csv_names"]) == 1 and \
-                                        re.match(r"^POINT\s*{}$".format(POINT_REGEX), str_v.upper()):
-                                    object_data[f["name"]] = str_v.upper()
-                                elif len(f["csv_names"]) == 1 and \
-                                        re.match(r"^\(?-?\d+(\.\d+)?,?\s+-?\d+(\.\d+)?\)?$", str_v):
-                                    # Coerce (5 7), (5, 7), etc. to WKT format
-                                    object_data[f["name"]][h] = "POINT ({})".format(
-                                        str_v.replace(",", "").replace("(", "").replace(")", ""))
-                                elif len(f["csv_names"]) == 2 and re.match(r"^-?\d+(\.\d+)?$", str_v) and len(h) == 1:
-                                    # One component of coordinates
-                                    object_data[f["name"]][h] = str_v
-                                elif str_v == "":  # POINTs cannot be Null, so assume (0, 0)
-                                    object_data[f["name"]][h] = "0"
-                                else:
-                                    # TODO: NEED TO HANDLE NULLABLE (DONT THINK IT IS NULLABLE) OR BLANK...
-                                    raise ValueError("Line {}: Incorrect value for point field {}: {}".format(
-                                        i, f["name"], str_v.upper()))
-
-                            elif f["data_type"] == DT_GIS_LINE_STRING:
-                                # WKT Line String
-                                if re.match(r"^LINESTRING\s*{}$".format(LINE_STRING_REGEX),
-                                            str_v.upper()):
-                                    object_data[f["name"]][h] = str_v.upper()
-                                else:
-                                    # TODO: NEED TO HANDLE NULLABLE (DONT THINK IT IS NULLABLE) OR BLANK...
-                                    raise ValueError("Line {}: Incorrect value for line string field {}: {}".format(
-                                        i, f["name"], str_v.upper()))
-
-                            elif f["data_type"] == DT_GIS_POLYGON:
-                                # WKT Polygon
-                                if re.match(r"^POLYGON\s*{}".format(POLYGON_REGEX),
-                                            str_v.upper()):
-                                    object_data[f["name"]][h] = str_v.upper()
-                                else:
-                                    # TODO: NEED TO HANDLE NULLABLE (DONT THINK IT IS NULLABLE) OR BLANK...
-                                    raise ValueError("Line {}: Incorrect value for polygon field {}: {}".format(
-                                        i, f["name"], str_v.upper()))
-
-                            elif f["data_type"] == DT_GIS_MULTI_POINT:
-                                # WKT Multi Point
-                                if re.match(r"MULTIPOINT\s*\(({pt},\s*)*{pt}\s*\)".format(pt=POINT_REGEX),
-                                            str_v.upper()):
-                                    object_data[f["name"]][h] = str_v.upper()
-                                else:
-                                    # TODO: NEED TO HANDLE NULLABLE (DONT THINK IT IS NULLABLE) OR BLANK...
-                                    raise ValueError("Line {}: Incorrect value for multi point field {}: {}".format(
-                                        i, f["name"], str_v.upper()))
-
-                            elif f["data_type"] == DT_GIS_MULTI_LINE_STRING:
-                                if re.match(r"MULTILINESTRING\s*\(({ls},\s*)*{ls}\s*\)".format(ls=LINE_STRING_REGEX),
-                                            str_v.upper()):
-                                    object_data[f["name"]][h] = str_v.upper()
-                                else:
-                                    # TODO: NEED TO HANDLE NULLABLE (DONT THINK IT IS NULLABLE) OR BLANK...
-                                    raise ValueError("Line {}: Incorrect value for multi line string field {}: "
-                                                     "{}".format(i, f["name"], str_v.upper()))
-
-                            elif f["data_type"] == DT_GIS_MULTI_POLYGON:
-                                if re.match(r"MULTIPOLYGON\s*\(({p},\s*)*{p}\s*\)".format(p=POLYGON_REGEX),
-                                            str_v.upper()):
-                                    object_data[f["name"]][h] = str_v.upper()
-                                else:
-                                    # TODO: NEED TO HANDLE NULLABLE (DONT THINK IT IS NULLABLE) OR BLANK...
-                                    raise ValueError("Line {}: Incorrect value for multi polygon field {}: {}".format(
-                                        i, f["name"], str_v.upper()))
-
-                            else:
-                                raise ValueError("Invalid data type: {}".format(f["data_type"]))
-
-                    for f in ptd_info:
-                        if len(object_data.get(f["name"], {})) == 1:
-                            object_data[f["name"]] = object_data[f["name"]][list(object_data[f["name"]].keys())[0]]
-                        elif len(object_data.get(f["name"], {})) == 2 and f["data_type"] == DT_GIS_POINT:
-                            # TODO: More systematic / nicer way of doing this
-                            object_data[f["name"]] = "POINT ({})".format(" ".join(c[1] for c in sorted(
-                                ((k, v) for k, v in object_data[f["name"]].items()),
-                                key=lambda c: f["csv_names"].index(c[0]))))
-
-                    model_objects.append(self.model(**object_data))
-
-                self.model.objects.bulk_create(model_objects)
+                self.model.objects.bulk_create(read_model_objects(self.model, csv_file))
 
             else:
                 # TODO: Handle Errors
@@ -0,0 +1,89 @@
+# PyTrackDat is a utility for assisting in online database creation.
+# Copyright (C) 2018-2020 the PyTrackDat authors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Contact information:
+#     David Lougheed (david.lougheed@gmail.com)
+
+
+import csv
+
+from itertools import islice
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from ...common import *
+from ...import_csv import iter_model_objects
+
+from pytrackdat_snapshot_manager.models import Snapshot
+
+
+BULK_CREATE_BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = ("Imports a relation from one or more CSV files, e.g. the shards of a relation split across a file per day. "
+            "Files can be given directly, as directories or as glob patterns; all of them must have the same header.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("relation", help="Name of the relation (as in the design file) or of its model.")
+        parser.add_argument("files", nargs="+", help="CSV files, directories or glob patterns of CSV files.")
+
+    def handle(self, *args, **options):
+        models = {m.__name__: m for m in apps.get_app_config("core").get_models()}
+        model = models.get(options["relation"], models.get(to_relation_name(options["relation"])))
+        if model is None:
+            raise CommandError("Unknown relation: {}".format(options["relation"]))
+
+        shards = [s for f in options["files"] for s in find_relation_shards(f)]
+        if not shards:
+            raise CommandError("No files found to import.")
+
+        # Check every header before importing anything, so a stray file cannot leave a partial import behind
+        header = None
+        for shard in shards:
+            with open_text_file(shard) as fh:
+                shard_header = [h.strip() for h in next(csv.reader(fh), []) if h.strip() != ""]
+            if header is None:
+                header = shard_header
+            elif shard_header != header:
+                raise CommandError("The header of '{}' does not match that of '{}'.".format(shard, shards[0]))
+
+        snapshot = Snapshot(snapshot_type="auto", reason="Pre-import snapshot")
+        snapshot.save()
+
+        # Shards are imported one after another: they all go into a single transaction, which is tied to one database
+        # connection and so cannot be shared with other threads or processes. Rows are converted and inserted a batch
+        # at a time, so only one batch of objects is held in memory.
+        imported = 0
+        with transaction.atomic():
+            for shard in shards:
+                shard_rows = 0
+                with open_text_file(shard) as fh:
+                    objects = iter_model_objects(model, fh)
+                    while True:
+                        batch = list(islice(objects, BULK_CREATE_BATCH_SIZE))
+                        if not batch:
+                            break
+                        model.objects.bulk_create(batch)
+                        shard_rows += len(batch)
+
+                imported += shard_rows
+                self.stdout.write("Imported {} rows from '{}'".format(shard_rows, shard))
+
+        self.stdout.write(self.style.SUCCESS("Imported {} rows into {} from {} file(s).".format(
+            imported, model.__name__, len(shards))))
@@ -17,8 +17,17 @@
 # Contact information:
 #     David Lougheed (david.lougheed@gmail.com)
 
+import bz2
+import glob
+import gzip
+import io
+import lzma
+import os
 import re
-from typing import Optional, Sequence, Tuple
+import zipfile
+
+from datetime import datetime
+from typing import BinaryIO, Callable, Optional, Sequence, TextIO, Tuple, Union
 
 
 __all__ = [
@@ -73,8 +82,21 @@ __all__ = [
     "TIME_FORMATS",
     "DATE_FORMATS",
 
+    "VC_INTEGER",
+    "VC_DECIMAL",
+    "VC_FLOAT",
+    "VC_DATE",
+    "VC_TIME",
+    "VC_OTHER",
+    "RE_VALUE_CLASS",
+
     "PDT_RELATION_PREFIX",
 
+    "COMPRESSION_GZIP",
+    "COMPRESSION_BZ2",
+    "COMPRESSION_XZ",
+    "COMPRESSION_ZIP",
+
     "valid_data_type",
     "collapse_multiple_underscores",
     "sanitize_python_identifier",
@@ -83,6 +105,11 @@ __all__ = [
     "to_relation_name",
     "print_license",
     "exit_with_error",
+    "classify_value",
+    "make_date_time_parser",
+    "detect_compression",
+    "open_text_file",
+    "find_relation_shards",
 
     "RelationField",
     "Relation",
@@ -147,8 +174,8 @@ DATA_TYPE_ADDITIONAL_DESIGN_SETTINGS = {
     DT_DECIMAL: ["max_length", "precision"],
     DT_BOOLEAN: [],
     DT_TEXT: ["max_length", "options"],
-    DT_DATE: [],
-    DT_TIME: [],
+    DT_DATE: ["format"],
+    DT_TIME: ["format"],
     DT_FOREIGN_KEY: ["target"],
 
     DT_GIS_POINT: [],  # TODO: COORDINATE TYPE
@@ -204,6 +231,37 @@ DATE_FORMATS = (
 )
 
 
+# Value classes, as determined by classify_value
+
+VC_INTEGER = "integer"
+VC_DECIMAL = "decimal"
+VC_FLOAT = "float"  # Decimal in scientific notation
+VC_DATE = "date"
+VC_TIME = "time"
+VC_OTHER = "other"
+
+
+# Order matters here - the first alternative to match a value wins, mirroring the order in which the individual
+# regular expressions above were historically tried. Each entry is (group name, regex, value class, format).
+VALUE_CLASS_ALTERNATIVES = (
+    ("integer", RE_INTEGER, VC_INTEGER, None),
+    ("integer_human", RE_INTEGER_HUMAN, VC_INTEGER, None),
+    ("decimal", RE_DECIMAL, VC_DECIMAL, None),
+    ("decimal_human", RE_DECIMAL_HUMAN, VC_DECIMAL, None),
+    *(("date_{}".format(i), dr, VC_DATE, df) for i, (dr, df) in enumerate(DATE_FORMATS)),
+    *(("time_{}".format(i), tr, VC_TIME, tf) for i, (tr, tf) in enumerate(TIME_FORMATS)),
+)
+
+# All of the above in a single alternation; the only letter involved is the exponent marker, so ignoring case is
+# equivalent to the .lower() calls previously made before matching decimals.
+RE_VALUE_CLASS = re.compile(
+    "|".join("(?P<{}>{})".format(name, r.pattern.lstrip("^").rstrip("$"))
+             for name, r, _vc, _fmt in VALUE_CLASS_ALTERNATIVES),
+    re.IGNORECASE)
+
+VALUE_CLASS_GROUPS = {name: (vc, fmt) for name, _r, vc, fmt in VALUE_CLASS_ALTERNATIVES}
+
+
 PDT_RELATION_PREFIX = "PyTrackDat"
 
 
@@ -267,7 +325,154 @@ def exit_with_error(message: str):
     exit(1)
 
 
+COMPRESSION_GZIP = "gzip"
+COMPRESSION_BZ2 = "bz2"
+COMPRESSION_XZ = "xz"
+COMPRESSION_ZIP = "zip"
+
+COMPRESSION_MAGIC_BYTES = (
+    (b"\x1f\x8b", COMPRESSION_GZIP),
+    (b"BZh", COMPRESSION_BZ2),
+    (b"\xfd7zXZ\x00", COMPRESSION_XZ),
+    (b"PK\x03\x04", COMPRESSION_ZIP),
+)
+
+
+def _peek_magic(f: Union[str, BinaryIO]) -> bytes:
+    if isinstance(f, str):
+        with open(f, "rb") as fh:
+            return fh.read(6)
+
+    position = f.tell()
+    magic = f.read(6)
+    f.seek(position)
+    return magic
+
+
+def detect_compression(f: Union[str, BinaryIO]) -> Optional[str]:
+    """
+    Detects whether a file (given as a path or a seekable binary file object) is compressed, from its first few bytes.
+    Returns one of the COMPRESSION_ constants, or None if the file is not compressed.
+    """
+
+    magic = _peek_magic(f)
+    return next((c for m, c in COMPRESSION_MAGIC_BYTES if magic.startswith(m)), None)
+
+
+def _zip_member(zf: zipfile.ZipFile) -> str:
+    members = [m for m in zf.namelist() if not m.endswith("/")]
+    if len(members) != 1:
+        # Allow other files (e.g. README.txt) alongside a single CSV file
+        members = [m for m in members if m.lower().endswith(".csv")]
+    if len(members) != 1:
+        raise ValueError("zip archive must contain exactly one CSV file")
+    return members[0]
+
+
+def open_text_file(f: Union[str, BinaryIO], encoding: str = "utf-8-sig") -> TextIO:
+    """
+    Opens a (possibly gzip, bzip2, xz or zip-compressed) text file, given as a path or a seekable binary file object,
+    for reading. Compressed files are decompressed as they are read, without writing a decompressed copy anywhere.
+    Closing the returned stream closes the file too, if it was opened from a path.
+    """
+
+    compression = detect_compression(f)
+
+    if compression == COMPRESSION_GZIP:
+        binary = gzip.open(f, "rb") if isinstance(f, str) else gzip.GzipFile(fileobj=f, mode="rb")
+    elif compression == COMPRESSION_BZ2:
+        binary = bz2.open(f, "rb")
+    elif compression == COMPRESSION_XZ:
+        binary = lzma.open(f, "rb")
+    elif compression == COMPRESSION_ZIP:
+        zf = zipfile.ZipFile(f)
+        binary = zf.open(_zip_member(zf))
+    else:
+        return open(f, "r", encoding=encoding) if isinstance(f, str) else io.TextIOWrapper(f, encoding=encoding)
+
+    return io.TextIOWrapper(binary, encoding=encoding)
+
+
+def find_relation_shards(path: str) -> Tuple[str, ...]:
+    """
+    Finds the files a relation is split across (e.g. one CSV file per day, all with the same header), given either a
+    directory containing them or a glob pattern matching them, in sorted order. Hidden files in directories are
+    ignored. Any other path is treated as a relation stored in a single file.
+    """
+
+    if os.path.isdir(path):
+        shards = (os.path.join(path, f) for f in os.listdir(path) if not f.startswith("."))
+    elif any(c in path for c in "*?["):
+        shards = glob.glob(path)
+    else:
+        return (path,)
+
+    return tuple(sorted(s for s in shards if os.path.isfile(s)))
+
+
+def classify_value(str_v: str) -> Tuple[str, Optional[str]]:
+    """
+    Classifies a (stripped) value in a single regex scan, returning its value class (one of the VC_ constants) and,
+    for dates and times, the strptime format it matched.
+    """
+
+    m = RE_VALUE_CLASS.fullmatch(str_v)
+    if m is None:
+        return VC_OTHER, None
+
+    vc, fmt = VALUE_CLASS_GROUPS[m.lastgroup]
+    if vc == VC_DECIMAL and ("e" in str_v or "E" in str_v):
+        return VC_FLOAT, None
+
+    return vc, fmt
+
+
+def make_date_time_parser(data_type: str, fmt: Optional[str] = None) -> Callable[[str], Optional[datetime]]:
+    """
+    Creates a parser for the (stripped) values of a date or time column, which returns None for values that are not
+    dates (or times) in any PyTrackDat-compatible format. If the column's format is known (e.g. as detected by the
+    analyzer), values are parsed with it directly, and only values which do not match it are classified.
+    """
+
+    value_class = VC_DATE if data_type == DT_DATE else VC_TIME
+
+    def parse_any(str_v: str) -> Optional[datetime]:
+        vc, value_format = classify_value(str_v)
+        if vc != value_class:
+            return None
+
+        try:
+            return datetime.strptime(str_v, value_format)
+        except ValueError:
+            # Values can have the shape of a date without being one, e.g. 2020-02-30
+            return None
+
+    if not fmt:
+        return parse_any
+
+    # datetime.fromisoformat is much faster than strptime, but only exists in Python 3.7+ and, from 3.11, also accepts
+    # forms other than YYYY-MM-DD; so it is only used for values with exactly that shape.
+    iso = fmt == "%Y-%m-%d" and hasattr(datetime, "fromisoformat")
+
+    def parse(str_v: str) -> Optional[datetime]:
+        try:
+            if iso and len(str_v) == 10 and str_v[4] == "-" and str_v[7] == "-":
+                return datetime.fromisoformat(str_v)
+            return datetime.strptime(str_v, fmt)
+        except ValueError:
+            return parse_any(str_v)
+
+    return parse
+
+
 class RelationField:
+    """
+    Immutable description of one field of a relation, as specified by a design file row.
+    """
+
+    __slots__ = ("csv_names", "name", "data_type", "nullable", "null_values", "default", "description",
+                 "show_in_table", "additional_fields", "choices", "_items")
+
     def __init__(
         self,
         csv_names: Tuple,
@@ -281,16 +486,33 @@ class RelationField:
         additional_fields: Tuple,
         choices: Optional[Tuple] = None,
     ):
-        self.csv_names = csv_names
-        self.name = name
-        self.data_type = data_type
-        self.nullable = nullable
-        self.null_values = null_values
-        self.default = default
-        self.description = description
-        self.show_in_table = show_in_table
-        self.additional_fields = additional_fields
-        self.choices = choices
+        items = (
+            ("csv_names", csv_names),
+            ("name", name),
+            ("data_type", data_type),
+            ("nullable", nullable),
+            ("null_values", null_values),
+            ("default", default),
+            ("description", description),
+            ("show_in_table", show_in_table),
+            ("additional_fields", additional_fields),
+            ("choices", choices),
+        )
+
+        for k, v in items:
+            object.__setattr__(self, k, v)
+
+        # Fields are converted to dictionaries often while generating code, so the pairs are only built once.
+        object.__setattr__(self, "_items", items)
+
+    def __setattr__(self, key, value):
+        raise AttributeError("'{}' object is immutable".format(type(self).__name__))
+
+    def __delattr__(self, key):
+        raise AttributeError("'{}' object is immutable".format(type(self).__name__))
+
+    def __reduce__(self):
+        return type(self), tuple(v for _, v in self._items)
 
     def as_design_file_row(self):
         return [
@@ -320,36 +542,47 @@ class RelationField:
         )
 
     def __iter__(self):
-        yield "csv_names", self.csv_names
-        yield "name", self.name
-        yield "data_type", self.data_type
-        yield "nullable", self.nullable
-        yield "null_values", self.null_values
-        yield "default", self.default
-        yield "description", self.description
-        yield "show_in_table", self.show_in_table
-        yield "additional_fields", self.additional_fields
-        yield "choices", self.choices
+        return iter(self._items)
 
 
 class Relation:
-    def __init__(self, design_name: str, fields: Sequence[RelationField], id_type: str):
-        self.design_name = design_name.strip()
-        self.fields = fields
-        self.id_type = id_type
+    """
+    Immutable description of a relation and its fields. Names derived from the relation's design file name are
+    computed once, when the relation is created.
+    """
 
-    @property
-    def name(self):
-        # Python class-style name for the relation
-        return to_relation_name(self.design_name)
+    __slots__ = ("design_name", "fields", "id_type", "indexes", "no_index", "name", "name_lower")
+
+    def __init__(self, design_name: str, fields: Sequence[RelationField], id_type: str,
+                 indexes: Sequence[Tuple[str, ...]] = (), no_index: Sequence[str] = ()):
+        design_name = design_name.strip()
+
+        object.__setattr__(self, "design_name", design_name)
+        object.__setattr__(self, "fields", tuple(fields))
+        object.__setattr__(self, "id_type", id_type)
+        # Extra (possibly composite) indexes specified in the design file
+        object.__setattr__(self, "indexes", tuple(indexes))
+        # Fields opted out of automatic indexes, or '*' for all of them
+        object.__setattr__(self, "no_index", tuple(no_index))
 
-    @property
-    def name_lower(self):
+        # Python class-style name for the relation
+        object.__setattr__(self, "name", to_relation_name(design_name))
         # Python variable-style (snake case) name for the relation
-        return field_to_py_code(self.design_name)
+        object.__setattr__(self, "name_lower", field_to_py_code(design_name))
+
+    def __setattr__(self, key, value):
+        raise AttributeError("'{}' object is immutable".format(type(self).__name__))
+
+    def __delattr__(self, key):
+        raise AttributeError("'{}' object is immutable".format(type(self).__name__))
+
+    def __reduce__(self):
+        return type(self), (self.design_name, self.fields, self.id_type, self.indexes, self.no_index)
 
     def __iter__(self):
         yield "name", self.name
         yield "name_lower", self.name_lower
         yield "fields", tuple(dict(f) for f in self.fields)
         yield "id_type", self.id_type
+        yield "indexes", self.indexes
+        yield "no_index", self.no_index
@@ -17,36 +17,48 @@
 # Contact information:
 #     David Lougheed (david.lougheed@gmail.com)
 
+import argparse
 import csv
 import getpass
 import gzip
 import importlib
 import io
 import os
-import pprint
 import re
 import shutil
 import subprocess
-import sys
 
 from datetime import datetime
 from decimal import Decimal
 from pathlib import Path
-from typing import IO, List, Optional, Union
+from typing import IO, List, Optional, Tuple, Union
 
 from ..common import *
+from ..profiling import phase, profile_run
 from .constants import *
+from .environments import *
+from .indexes import *
+from .manifest import *
+from .scaffold import *
 
 from . import constants
+from . import environments
 from . import errors
 from . import formatters
+from . import indexes
+from . import manifest
+from . import scaffold
 from . import utils
 
 
 __all__ = [
     "constants",
+    "environments",
     "errors",
     "formatters",
+    "indexes",
+    "manifest",
+    "scaffold",
     "utils",
     "get_default_from_csv_with_type",
     "design_to_relations",
@@ -56,47 +68,60 @@ __all__ = [
     "print_usage",
     "sanitize_and_check_site_name",
     "is_common_password",
+    "prompt_admin_account",
     "main"
 ]
 
 
-def parse_dt_integer(dv: str):
-    return int(re.sub(RE_NUMBER_GROUP_SEPARATOR, "", dv.strip()))
+def _check_number_default(dv: str, field_name: str, value_classes: tuple, type_name: str) -> str:
+    str_v = dv.strip()
+    if classify_value(str_v)[0] not in value_classes:
+        raise errors.GenerationError("Error: Default value '{}' for {} field '{}' is not a valid {}.".format(
+            str_v, type_name, field_name, type_name))
+    return re.sub(RE_NUMBER_GROUP_SEPARATOR, "", str_v.lower())
 
 
-def parse_dt_float(dv: str):
-    return float(re.sub(RE_NUMBER_GROUP_SEPARATOR, "", dv.lower().strip()))
+def parse_dt_integer(dv: str, field_name: str, *_args) -> int:
+    return int(_check_number_default(dv, field_name, (VC_INTEGER,), "integer"))
 
 
-def parse_dt_decimal(dv: str):
-    return Decimal(re.sub(RE_NUMBER_GROUP_SEPARATOR, "", dv.lower().strip()))
+def parse_dt_float(dv: str, field_name: str, *_args) -> float:
+    return float(_check_number_default(dv, field_name, (VC_INTEGER, VC_DECIMAL, VC_FLOAT), "float"))
 
 
-def parse_dt_date(dv: str, field_name: str):
-    # TODO: adjust format based on heuristics
-    # TODO: Allow extra column setting with date format from python docs?
+def parse_dt_decimal(dv: str, field_name: str, *_args) -> Decimal:
+    return Decimal(_check_number_default(dv, field_name, (VC_INTEGER, VC_DECIMAL, VC_FLOAT), "decimal"))
 
-    dt_interpretations = tuple(datetime.strptime(dv.strip(), df) for dr, df in DATE_FORMATS)
-    if len(dt_interpretations) == 0:
+
+def _parse_dt_date_time(dv: str, field_name: str, data_type: str, additional_fields: tuple) -> Optional[datetime]:
+    str_v = dv.strip()
+    fmt = additional_fields[0].strip() if additional_fields else None
+    value = make_date_time_parser(data_type, fmt)(str_v)
+
+    if value is None:
         # TODO: Warning
-        print("Warning: Value '{}' the date-typed field '{}' does not match any PyTrackDat-compatible "
-              "formats.".format(dv.strip(), field_name))
+        print("Warning: Value '{}' the {}-typed field '{}' does not match any PyTrackDat-compatible "
+              "formats.".format(str_v, data_type, field_name))
         return None
 
-    if re.match(RE_DATE_DMY_D, dv.strip()) or re.match(RE_DATE_DMY_S, dv.strip()):
+    if data_type == DT_DATE and not fmt and classify_value(str_v)[1].startswith("%d"):
         print("Warning: Assuming d{sep}m{sep}Y date format for ambiguously-formatted date field '{field}'.".format(
-            sep="-" if "-" in dv.strip() else "/", field=field_name))
+            sep="-" if "-" in str_v else "/", field=field_name))
+
+    return value
 
-    return dt_interpretations[0]
 
+def parse_dt_date(dv: str, field_name: str, _nullable: bool = False, _null_values: tuple = (),
+                  additional_fields: tuple = ()) -> Optional[datetime]:
+    return _parse_dt_date_time(dv, field_name, DT_DATE, additional_fields)
 
-def parse_dt_time(dv: str):
-    # TODO: adjust format based on MORE heuristics
-    # TODO: Allow extra column setting with time format from python docs?
-    return datetime.strptime(dv.strip(), "%H:%M" if len(dv.strip().split(":")) == 2 else "%H:%M:%S")
 
+def parse_dt_time(dv: str, field_name: str, _nullable: bool = False, _null_values: tuple = (),
+                  additional_fields: tuple = ()) -> Optional[datetime]:
+    return _parse_dt_date_time(dv, field_name, DT_TIME, additional_fields)
 
-def parse_dt_boolean(dv: str, _field_name: str, nullable: bool, null_values: tuple) -> Optional[bool]:
+
+def parse_dt_boolean(dv: str, _field_name: str, nullable: bool, null_values: tuple, *_args) -> Optional[bool]:
     if nullable and ((len(null_values) != 0 and dv.strip() in null_values) or (dv.strip() == "")):
         return None
 
@@ -114,13 +139,14 @@ DATA_TYPE_STRING_PARSERS = {
 }
 
 
-def get_default_from_csv_with_type(field_name: str, dv: str, dt: str, nullable: bool = False, null_values: tuple = ()) \
+def get_default_from_csv_with_type(field_name: str, dv: str, dt: str, nullable: bool = False, null_values: tuple = (),
+                                   additional_fields: tuple = ()) \
         -> Union[None, int, float, Decimal, datetime, str, bool]:
     if dv.strip() == "" and dt != DT_BOOLEAN:
         return None
 
     if dt in DATA_TYPE_STRING_PARSERS:
-        return DATA_TYPE_STRING_PARSERS[dt](dv, field_name, nullable, null_values)
+        return DATA_TYPE_STRING_PARSERS[dt](dv, field_name, nullable, null_values, additional_fields)
 
     # Otherwise, keep string version
     return dv
@@ -191,27 +217,17 @@ def design_to_relations(df: IO, gis_mode: bool) -> List[Relation]:
                             field_name))
                         show_in_table = True
 
-                    default_str = current_field[5].strip()
-                    default = get_default_from_csv_with_type(field_name, default_str, data_type, nullable, null_values)
-
                     # TODO: This handling of additional_fields could eventually cause trouble, because it can shift
                     #  positions of additional fields if a blank additional field occurs before a valued one.
-                    current_field_obj = RelationField(
-                        csv_names=csv_names,
-                        name=field_name,
-                        data_type=data_type,
-                        nullable=nullable,
-                        null_values=null_values,
-                        default=default,
-                        description=current_field[6].strip(),
-                        show_in_table=show_in_table,
-                        additional_fields=tuple(f for f in current_field[8:] if f.strip() != "")
-                    )
+                    additional_fields = tuple(f for f in current_field[8:] if f.strip() != "")
+
+                    default_str = current_field[5].strip()
+                    default = get_default_from_csv_with_type(field_name, default_str, data_type, nullable, null_values,
+                                                             additional_fields)
 
-                    if (len(current_field_obj.additional_fields) >
-                            len(DATA_TYPE_ADDITIONAL_DESIGN_SETTINGS[data_type])):
-                        if data_type in KEY_TYPES and len(current_field_obj.additional_fields) == 2 and \
-                                DESIGN_SEPARATOR in current_field_obj.additional_fields[1]:
+                    if len(additional_fields) > len(DATA_TYPE_ADDITIONAL_DESIGN_SETTINGS[data_type]):
+                        if data_type in KEY_TYPES and len(additional_fields) == 2 and \
+                                DESIGN_SEPARATOR in additional_fields[1]:
                             # Looks like user tried to specify choices for a key-type
                             # TODO: This is heuristic-based, and should be re-examined if additional_fields changes
                             #  for the key types.
@@ -230,8 +246,10 @@ def design_to_relations(df: IO, gis_mode: bool) -> List[Relation]:
                                 )
                             )
 
+                    choices = None
+
                     if data_type == DT_TEXT:
-                        choices = formatters.get_choices_from_text_field(current_field_obj)
+                        choices = utils.get_choices_from_additional_fields(additional_fields)
                         if choices is not None and default_str != "" and default_str not in choices:
                             raise errors.GenerationError(
                                 "Error: Default value for field '{field}' in relation '{relation}' does not match \n"
@@ -242,7 +260,20 @@ def design_to_relations(df: IO, gis_mode: bool) -> List[Relation]:
                                     choices=", ".join(choices)
                                 ))
 
-                        current_field_obj.choices = choices if choices is not None and len(choices) > 1 else None
+                        choices = choices if choices is not None and len(choices) > 1 else None
+
+                    current_field_obj = RelationField(
+                        csv_names=csv_names,
+                        name=field_name,
+                        data_type=data_type,
+                        nullable=nullable,
+                        null_values=null_values,
+                        default=default,
+                        description=current_field[6].strip(),
+                        show_in_table=show_in_table,
+                        additional_fields=additional_fields,
+                        choices=choices,
+                    )
 
                     relation_fields.append(current_field_obj)
 
@@ -254,7 +285,11 @@ def design_to_relations(df: IO, gis_mode: bool) -> List[Relation]:
                     break
 
             # Otherwise, save the relation information.
-            relations.append(Relation(design_name=design_relation_name, fields=relation_fields, id_type=id_type))
+            extra_indexes, no_index = parse_index_settings(relation_name_and_headers[1:])
+            relation = Relation(design_name=design_relation_name, fields=relation_fields, id_type=id_type,
+                                indexes=extra_indexes, no_index=no_index)
+            plan_indexes(relation)  # Validates the relation's index settings
+            relations.append(relation)
 
             # Find the next relation.
 
@@ -287,8 +322,7 @@ def create_admin(relations: List[Relation], site_name: str, gis_mode: bool) -> i
         # Write admin information
 
         list_display_fields = tuple(f.name for f in relation.fields if f.show_in_table)
-        list_filter_fields = tuple(f.name for f in relation.fields
-                                   if f.data_type == DT_BOOLEAN or f.choices is not None)
+        filter_fields = list_filter_fields(relation)
 
         advanced_filter_fields = tuple(r.name for r in relation.fields)
 
@@ -297,8 +331,8 @@ def create_admin(relations: List[Relation], site_name: str, gis_mode: bool) -> i
             admin_class="gis_admin.GeoModelAdmin" if gis_mode else "",
             list_display=("    list_display = ('{}',)\n".format("', '".join(list_display_fields))
                           if len(list_display_fields) > 1 else ""),
-            list_filter=("    list_filter = ('{}',)\n".format("', '".join(list_filter_fields))
-                         if len(list_filter_fields) > 0 else ""),
+            list_filter=("    list_filter = ('{}',)\n".format("', '".join(filter_fields))
+                         if len(filter_fields) > 0 else ""),
             advanced_filter_fields=("    advanced_filter_fields = ('{}',)\n".format("', '".join(advanced_filter_fields))
                                     if len(advanced_filter_fields) > 0 else "")
         ))
@@ -321,14 +355,22 @@ def create_models(relations: List[Relation], gis_mode: bool) -> io.StringIO:
                                        models_path="django.contrib.gis.db" if gis_mode else "django.db"))
 
     for relation in relations:
+        index_plan = plan_indexes(relation)
+
         mf.write(MODEL_TEMPLATE.format(
             name=relation.name,
             # TODO: Pretty-print serialize field objects?
-            fields=pprint.pformat([dict(f) for f in relation.fields], indent=12, width=120, compact=True),
+            fields=utils.format_literal([dict(f) for f in relation.fields], indent=8),
             id_type=relation.id_type,
             short_name=relation.name[len(PDT_RELATION_PREFIX):],
-            model_fields="\n".join("    {} = {}".format(f.name, formatters.DJANGO_TYPE_FORMATTERS[f.data_type](f))
-                                   for f in relation.fields)
+            meta_indexes=(MODEL_INDEXES_TEMPLATE.format(indexes="\n".join(
+                MODEL_INDEX_TEMPLATE.format(fields=list(index)) for index in index_plan.composite))
+                if index_plan.composite else ""),
+            created_at_index=formatters.format_db_index(index_plan.field_db_index(CREATED_AT_FIELD)),
+            modified_at_index=formatters.format_db_index(index_plan.field_db_index(MODIFIED_AT_FIELD)),
+            model_fields="\n".join("    {} = {}".format(
+                f.name, formatters.DJANGO_TYPE_FORMATTERS[f.data_type](f, index_plan.field_db_index(f.name)))
+                for f in relation.fields)
         ))
         mf.flush()
 
@@ -337,25 +379,6 @@ def create_models(relations: List[Relation], gis_mode: bool) -> io.StringIO:
     return mf
 
 
-API_FILTERABLE_FIELD_TYPES = {
-    DT_AUTO_KEY: ["exact", "in"],
-    DT_MANUAL_KEY: ["exact", "in"],
-
-    DT_INTEGER: ["exact", "lt", "lte", "gt", "gte", "in"],
-    DT_FLOAT: ["exact", "lt", "lte", "gt", "gte"],
-    DT_DECIMAL: ["exact", "lt", "lte", "gt", "gte", "in"],
-
-    DT_BOOLEAN: ["exact"],
-
-    DT_TEXT: ["exact", "iexact", "contains", "icontains", "in"],
-
-    DT_DATE: ["exact", "lt", "lte", "gt", "gte", "in"],
-    DT_TIME: ["exact", "lt", "lte", "gt", "gte", "in"],
-
-    DT_FOREIGN_KEY: ["exact", "in"],
-}
-
-
 def create_api(relations: List[Relation], site_name: str, gis_mode: bool) -> io.StringIO:
     """
     Creates the contents of the API specification file.
@@ -364,8 +387,8 @@ def create_api(relations: List[Relation], site_name: str, gis_mode: bool) -> io.
     api_file = io.StringIO()
 
     api_file.write(API_FILE_HEADER.format(version=VERSION, site_name=site_name, gis_mode=gis_mode,
-                                          relations=pprint.pformat(tuple(dict(r) for r in relations), indent=12,
-                                                                   width=120, compact=True)))
+                                          relations=utils.format_literal(tuple(dict(r) for r in relations),
+                                                                         indent=12)))
 
     for relation in relations:
         api_file.write(MODEL_SERIALIZER_TEMPLATE.format(
@@ -375,16 +398,16 @@ def create_api(relations: List[Relation], site_name: str, gis_mode: bool) -> io.
 
         api_file.write(MODEL_VIEWSET_TEMPLATE.format(
             relation_name=relation.name,
-            filterset_fields=pprint.pformat(
+            filterset_fields=utils.format_literal(
                 {f.name: API_FILTERABLE_FIELD_TYPES[f.data_type]
                  for f in relation.fields if f.data_type in API_FILTERABLE_FIELD_TYPES},
-                indent=12, width=120, compact=True),
+                indent=4),
             categorical_fields="('{}',)".format(
                 "', '".join(f.name for f in relation.fields if f.choices is not None)),
-            categorical_choices=pprint.pformat(
+            categorical_choices=utils.format_literal(
                 {f.name: f.choices + (("",) if f.nullable else ())
                  for f in relation.fields if f.choices is not None},
-                indent=12, width=120, compact=True),
+                indent=8),
         ))
 
         api_file.write(MODEL_ROUTER_REGISTRATION_TEMPLATE.format(
@@ -402,7 +425,7 @@ TEMP_DIRECTORY = os.path.join(os.getcwd(), "tmp")
 
 
 def print_usage():
-    print("Usage: ptd-generate design.csv output_site_name")
+    print("Usage: ptd-generate [options] design.csv output_site_name")
 
 
 def sanitize_and_check_site_name(site_name_raw: str) -> str:
@@ -442,18 +465,50 @@ def is_common_password(password: str, package_dir: str) -> bool:
     return password.lower().strip() in common_passwords
 
 
-def copy_buf_to_path(buf, path):
-    with open(path, "w") as fh:
-        shutil.copyfileobj(buf, fh)
+def prompt_admin_account(package_dir: str) -> Tuple[str, str, str]:
+    """
+    Asks for the username, email and password of a new site's administrative account.
+    """
+
+    print("\n================ ADMINISTRATIVE SETUP ================")
+
+    admin_password = "1"
+    admin_password_2 = "2"
+
+    admin_username = input("Admin Account Username: ")
+    while admin_username.strip() == "":
+        print("Please enter a username.")
+        admin_username = input("Admin Account Username: ")
+    admin_email = input("Admin Account Email (Optional): ")
+
+    while admin_password != admin_password_2:
+        admin_password = getpass.getpass("Admin Account Password: ")
+
+        # TODO: Properly check password validity
+        if len(admin_password.strip()) < 8:
+            print("Error: Please enter a more secure password (8 or more characters).")
+            admin_password = "1"
+            admin_password_2 = "2"
+            continue
+
+        if is_common_password(admin_password, package_dir=package_dir):
+            print("Error: Please enter in a less commonly-used password (8 or more characters).")
+            admin_password = "1"
+            admin_password_2 = "2"
+            continue
+
+        admin_password_2 = getpass.getpass("Admin Account Password Again: ")
+
+        if admin_password != admin_password_2:
+            print("Error: Passwords do not match. Please try again.")
 
+    print("======================================================\n")
 
-def clean_up(package_dir: str, django_site_name: str):
-    subprocess.run((os.path.join(package_dir, "os_scripts", "clean_up.bat" if os.name == "nt" else "clean_up.bash"),
-                    package_dir, django_site_name, TEMP_DIRECTORY))
+    return admin_username, admin_email, admin_password
 
 
-def get_script_file_name(name: str):
-    return "{}.{}".format(name, "bat" if os.name == "nt" else "bash")
+def clean_up(django_site_name: str):
+    shutil.rmtree(os.path.join(TEMP_DIRECTORY, django_site_name), ignore_errors=True)
 
 
 # TODO: TIMEZONES
@@ -462,13 +517,7 @@ def get_script_file_name(name: str):
 # TODO: More customization options
 
 
-def main():
-    print_license()
-
-    if len(sys.argv) != 3:
-        print_usage()
-        exit(1)
-
+def _run(args: argparse.Namespace):
     # TODO: EXPERIMENTAL: GIS MODE
     gis_mode = os.environ.get("PTD_GIS", "false").lower() == "true"
     spatialite_library_path = os.environ.get("SPATIALITE_LIBRARY_PATH", "")
@@ -477,16 +526,14 @@ def main():
         if spatialite_library_path == "":
             exit_with_error("Error: Please set SPATIALITE_LIBRARY_PATH.")
 
-    args = sys.argv[1:]
-
     # TODO: Make path more robust
     package_dir = Path(os.path.dirname(__file__)).parent
 
-    design_file = args[0]  # File name for design file input
+    design_file = args.design_file  # File name for design file input
 
     django_site_name = ""
     try:
-        django_site_name = sanitize_and_check_site_name(args[1])
+        django_site_name = sanitize_and_check_site_name(args.site_name)
     except ValueError as e:
         exit_with_error(str(e))
 
@@ -506,11 +553,12 @@ def main():
     relations = []
 
     try:
-        with open(os.path.join(os.getcwd(), design_file), "r") as df:
+        with phase("parse design file") as ph, open(os.path.join(os.getcwd(), design_file), "r") as df:
             try:
                 relations = design_to_relations(df, gis_mode)
             except errors.GenerationError as e:
                 exit_with_error(str(e))
+            ph["rows"] = sum(len(r.fields) for r in relations)
 
     except FileNotFoundError:
         exit_with_error("Error: Design file not found: '{}'.".format(design_file))
@@ -521,12 +569,27 @@ def main():
     if len(relations) == 0:
         exit_with_error("Error: No relations detected.")
 
-    a_buf = create_admin(relations, django_site_name, gis_mode)
-    m_buf = create_models(relations, gis_mode)
-    api_buf = create_api(relations, django_site_name, gis_mode)
+    with phase("generate code", rows=len(relations)):
+        a_buf = create_admin(relations, django_site_name, gis_mode)
+        m_buf = create_models(relations, gis_mode)
+        api_buf = create_api(relations, django_site_name, gis_mode)
 
     print("Done.\n")
 
+    site_path = os.path.join(TEMP_DIRECTORY, django_site_name)
+
+    # A site generated before is updated in place, keeping its database, instead of being rebuilt from scratch.
+    site_manifest = None if args.rebuild else read_manifest(site_path)
+    if site_manifest is not None and site_manifest["gis_mode"] != gis_mode:
+        print("Notice: GIS mode has changed since site '{}' was generated; rebuilding it...\n".format(django_site_name))
+        site_manifest = None
+
+    relation_diff = None  # type: Optional[RelationDiff]
+    if site_manifest is not None:
+        relation_diff = diff_relations(site_manifest, relations)
+        print("Updating existing site '{}'...".format(django_site_name))
+        print(relation_diff.summary() + "\n")
+
     try:
         prod_build = input("Is this a production build? (y/n): ")
 
@@ -546,122 +609,105 @@ def main():
 
     print()
 
-    core_app_path = os.path.join(TEMP_DIRECTORY, django_site_name, "core")
-    django_site_path = os.path.join(TEMP_DIRECTORY, django_site_name, django_site_name)
-
-    with a_buf, m_buf, api_buf:
-        # Clean up any old remnants
-        clean_up(package_dir, django_site_name)
-
-        # Run site creation script
-        subprocess.run((
-            os.path.join(package_dir, "os_scripts", get_script_file_name("create_django_site")),
-            package_dir, django_site_name, TEMP_DIRECTORY, "Dockerfile{}.template".format(".gis" if gis_mode else "")
-        ), check=True)
-
-        # Write admin file contents to disk
-        copy_buf_to_path(a_buf, os.path.join(core_app_path, "admin.py"))
-
-        # Write model file contents to disk
-        copy_buf_to_path(m_buf, os.path.join(core_app_path, "models.py"))
-
-        # Write API specification file contents to disk
-        copy_buf_to_path(api_buf, os.path.join(core_app_path, "api.py"))
-
-    with open(os.path.join(django_site_path, "settings.py"), "r+") as sf:
-        old_contents = sf.read()
-
-        sf.seek(0)
-
-        new_contents = (
-                old_contents.replace(INSTALLED_APPS_OLD, INSTALLED_APPS_NEW_GIS if gis_mode else INSTALLED_APPS_NEW)
-                .replace(DEBUG_OLD, DEBUG_NEW)
-                .replace(ALLOWED_HOSTS_OLD, ALLOWED_HOSTS_NEW.format(site_url))
-                .replace(STATIC_OLD, STATIC_NEW)
-                + DISABLE_MAX_FIELDS
-                + REST_FRAMEWORK_SETTINGS
-        )
-
-        if gis_mode:
-            new_contents = new_contents.replace(DATABASE_ENGINE_NORMAL, DATABASE_ENGINE_GIS)
-            new_contents += SPATIALITE_SETTINGS.format(spatialite_library_path)
-
-        sf.write(new_contents)
-
-        # TODO: May not need spatialite path in settings
+    # Site packages are installed from a cached wheelhouse, which is only built (and needs the network) the first time
+    # a set of requirements is used, or when packages from VCS repositories are refreshed.
+    util_files_dir = os.path.join(package_dir, "util_files")
+    site_requirements = [os.path.join(util_files_dir, "requirements.txt")]
+    if gis_mode:
+        site_requirements.append(os.path.join(util_files_dir, "requirements_gis.txt"))
 
-        sf.truncate()
+    wheelhouse = ""
+    try:
+        env_cache = EnvironmentCache(args.env_cache_dir, offline=args.offline, refresh=args.refresh)
+        with phase("prepare environments"):
+            wheelhouse = env_cache.wheelhouse(site_requirements)
+    except errors.GenerationError as e:
+        exit_with_error(str(e))
+    except subprocess.CalledProcessError:
+        exit_with_error("Error: Could not build the wheelhouse needed to set up the site.")
 
-    with open(os.path.join(django_site_path, "urls.py"), "r+") as uf:
-        old_contents = uf.read()
-        uf.seek(0)
-        uf.write(old_contents.replace(URL_OLD, URL_NEW))
-        uf.truncate()
+    with a_buf, m_buf, api_buf:
+        with phase("render site") as ph:
+            site_files = render_site_files(
+                django_site_name, a_buf.getvalue(), m_buf.getvalue(), api_buf.getvalue(), gis_mode=gis_mode,
+                site_url=site_url, spatialite_library_path=spatialite_library_path,
+                secret_key=read_secret_key(site_path, django_site_name) if relation_diff is not None else None)
+            ph["rows"] = len(site_files)
 
-    print("\n================ ADMINISTRATIVE SETUP ================")
+    if relation_diff is not None:
+        with phase("write site"):
+            written = write_site_files(site_files, site_path)
 
-    admin_username = ""
-    admin_email = ""
-    admin_password = "1"
-    admin_password_2 = "2"
+        print("Updated {} file(s).\n".format(len(written)))
 
-    try:
-        admin_username = input("Admin Account Username: ")
-        while admin_username.strip() == "":
-            print("Please enter a username.")
-            admin_username = input("Admin Account Username: ")
-        admin_email = input("Admin Account Email (Optional): ")
+        if relation_diff.has_changes or "core/models.py" in written:
+            try:
+                with phase("migrate site"):
+                    update_site(site_path, wheelhouse, is_production_build)
+            except subprocess.CalledProcessError:
+                # The manifest is only updated once the database is, so the next run picks up the same changes.
+                exit_with_error("Error: An error occurred while migrating the site's database.\nTerminating...")
 
-        while admin_password != admin_password_2:
-            admin_password = getpass.getpass("Admin Account Password: ")
+    else:
+        # Clean up any old remnants
+        with phase("clean up"):
+            clean_up(django_site_name)
 
-            # TODO: Properly check password validity
-            if len(admin_password.strip()) < 8:
-                print("Error: Please enter a more secure password (8 or more characters).")
-                admin_password = "1"
-                admin_password_2 = "2"
-                continue
+        with phase("write site"):
+            write_site_files(site_files, site_path)
 
-            if is_common_password(admin_password, package_dir=package_dir):
-                print("Error: Please enter in a less commonly-used password (8 or more characters).")
-                admin_password = "1"
-                admin_password_2 = "2"
-                continue
+        try:
+            admin_username, admin_email, admin_password = prompt_admin_account(package_dir)
+        except KeyboardInterrupt:
+            print("\n\nCleaning up and exiting...")
+            clean_up(django_site_name)
+            print("Done.\n")
+            exit(0)
 
-            admin_password_2 = getpass.getpass("Admin Account Password Again: ")
+        try:
+            with phase("run site setup"):
+                set_up_site(site_path, django_site_name, wheelhouse, admin_username, admin_email, admin_password,
+                            is_production_build)
 
-            if admin_password != admin_password_2:
-                print("Error: Passwords do not match. Please try again.")
+        except subprocess.CalledProcessError:
+            # Need to catch subprocess errors to prevent password from being shown onscreen.
+            clean_up(django_site_name)
+            exit_with_error("Error: An error occurred while setting up the site.\nTerminating...")
 
-    except KeyboardInterrupt:
-        print("\n\nCleaning up and exiting...")
-        clean_up(package_dir, django_site_name)
-        print("Done.\n")
-        exit(0)
+    write_manifest(site_path, relations_manifest(relations, gis_mode))
 
-    print("======================================================\n")
+    with phase("archive site"):
+        shutil.make_archive(django_site_name, "zip", root_dir=os.path.join(os.getcwd(), "tmp"),
+                            base_dir=django_site_name)
 
-    try:
-        # TODO: Make path more robust
-        subprocess.run((
-            os.path.join(package_dir, "os_scripts", get_script_file_name("run_site_setup")),
-            package_dir,  # $1
-            django_site_name,  # $2
-            TEMP_DIRECTORY,  # $3
-            admin_username,  # $4
-            admin_email,  # $5
-            admin_password,  # $6
-            site_url,  # $7
-            str(is_production_build),  # $8
-            str(gis_mode),  # $9
-        ), check=True)
 
-    except subprocess.CalledProcessError:
-        # Need to catch subprocess errors to prevent password from being shown onscreen.
-        clean_up(package_dir, django_site_name)
-        exit_with_error("Error: An error occurred while running the site setup script.\nTerminating...")
+def main():
+    print_license()
 
-    shutil.make_archive(django_site_name, "zip", root_dir=os.path.join(os.getcwd(), "tmp"), base_dir=django_site_name)
+    parser = argparse.ArgumentParser(prog="ptd-generate", usage="ptd-generate [options] design.csv output_site_name")
+    parser.add_argument("design_file", help="Path to the design file describing the database.")
+    parser.add_argument("site_name", help="Name of the site to generate.")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Delete and re-create the site (including its database) even if it was generated before, "
+                             "instead of updating it in place.")
+    parser.add_argument("--offline", action="store_true",
+                        help="Only install packages from cached wheelhouses, failing instead of downloading any.")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Download and build packages installed from VCS repositories or URLs (e.g. git+https://) "
+                             "again, replacing the ones in the cached wheelhouse.")
+    parser.add_argument("--env-cache-dir", default=DEFAULT_ENVIRONMENT_CACHE_DIRECTORY, metavar="DIR",
+                        help="Directory to cache wheelhouses in (default: {}).".format(
+                            DEFAULT_ENVIRONMENT_CACHE_DIRECTORY))
+    parser.add_argument("--timings", metavar="REPORT",
+                        help="Write timings and peak memory use for each phase of the run to REPORT, as JSON ('-' for "
+                             "standard output.) Time spent waiting for input is not included in any phase.")
+    parser.add_argument("--timings-cprofile", metavar="STATS",
+                        help="Profile the run with cProfile, writing the statistics to STATS.")
+
+    args = parser.parse_args()
+
+    with profile_run("ptd-generate", args.timings, args.timings_cprofile):
+        _run(args)
 
 
 if __name__ == "__main__":
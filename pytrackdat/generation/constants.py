@@ -17,7 +17,19 @@
 # Contact information:
 #     David Lougheed (david.lougheed@gmail.com)
 
-from ..common import DT_INTEGER, DT_FLOAT, VERSION
+from ..common import (
+    DT_AUTO_KEY,
+    DT_MANUAL_KEY,
+    DT_INTEGER,
+    DT_FLOAT,
+    DT_DECIMAL,
+    DT_BOOLEAN,
+    DT_TEXT,
+    DT_DATE,
+    DT_TIME,
+    DT_FOREIGN_KEY,
+    VERSION,
+)
 
 
 __all__ = [
@@ -28,30 +40,16 @@ __all__ = [
 
     "MODELS_FILE_HEADER",
     "MODEL_TEMPLATE",
+    "MODEL_INDEXES_TEMPLATE",
+    "MODEL_INDEX_TEMPLATE",
 
     "API_FILE_HEADER",
     "MODEL_SERIALIZER_TEMPLATE",
     "MODEL_VIEWSET_TEMPLATE",
     "MODEL_ROUTER_REGISTRATION_TEMPLATE",
 
-    "URL_OLD",
-    "URL_NEW",
-    "DEBUG_OLD",
-    "DEBUG_NEW",
-    "ALLOWED_HOSTS_OLD",
-    "ALLOWED_HOSTS_NEW",
-    "INSTALLED_APPS_OLD",
-    "INSTALLED_APPS_NEW",
-    "INSTALLED_APPS_NEW_GIS",
-    "STATIC_OLD",
-    "STATIC_NEW",
-    "REST_FRAMEWORK_SETTINGS",
-    "SPATIALITE_SETTINGS",
-    "DATABASE_ENGINE_NORMAL",
-    "DATABASE_ENGINE_GIS",
-    "DISABLE_MAX_FIELDS",
-
     "BASIC_NUMBER_TYPES",
+    "API_FILTERABLE_FIELD_TYPES",
 ]
 
 
@@ -124,13 +122,20 @@ class {name}(models.Model):
     class Meta:
         # Use short name as verbose name to not show the PyTrackDat prefix
         verbose_name = '{short_name}'
-
-    pdt_created_at = models.DateTimeField(auto_now_add=True, null=False)
-    pdt_modified_at = models.DateTimeField(auto_now=True, null=False)
+{meta_indexes}
+    pdt_created_at = models.DateTimeField(auto_now_add=True, null=False{created_at_index})
+    pdt_modified_at = models.DateTimeField(auto_now=True, null=False{modified_at_index})
 
 {model_fields}
 """
 
+MODEL_INDEXES_TEMPLATE = """        indexes = [
+{indexes}
+        ]
+"""
+
+MODEL_INDEX_TEMPLATE = "            models.Index(fields={fields}),"
+
 
 # API Specification Code
 
@@ -205,91 +210,27 @@ MODEL_ROUTER_REGISTRATION_TEMPLATE = """
 api_router.register(r'data/{relation_name_lower}', {relation_name}ViewSet)
 """
 
-# Settings Code
-
-URL_OLD = """urlpatterns = [
-    path('admin/', admin.site.urls),
-]"""
-URL_NEW = """from django.urls import include
-
-from core.api import api_router
-from pytrackdat_snapshot_manager.views import urls
-
-urlpatterns = [
-    path('', admin.site.urls),
-    path('api/', include(api_router.urls)),
-    path('advanced_filters/', include('advanced_filters.urls')),
-] + urls"""
-
-DEBUG_OLD = "DEBUG = True"
-DEBUG_NEW = "DEBUG = not (os.getenv('DJANGO_ENV') == 'production')"
-
-ALLOWED_HOSTS_OLD = "ALLOWED_HOSTS = []"
-ALLOWED_HOSTS_NEW = "ALLOWED_HOSTS = ['127.0.0.1', '{}'] if (os.getenv('DJANGO_ENV') == 'production') else []"
-
-INSTALLED_APPS_OLD = """INSTALLED_APPS = [
-    'django.contrib.admin',
-    'django.contrib.auth',
-    'django.contrib.contenttypes',
-    'django.contrib.sessions',
-    'django.contrib.messages',
-    'django.contrib.staticfiles',
-]"""
-
-INSTALLED_APPS_NEW = """INSTALLED_APPS = [
-    'django.contrib.admin',
-    'django.contrib.auth',
-    'django.contrib.contenttypes',
-    'django.contrib.sessions',
-    'django.contrib.messages',
-    'django.contrib.staticfiles',
-    
-    'core.apps.CoreConfig',
-    'pytrackdat_snapshot_manager',
-
-    'advanced_filters',
-    'rest_framework',
-    'reversion',
-]"""
-
-INSTALLED_APPS_NEW_GIS = INSTALLED_APPS_NEW.replace(
-    "'django.contrib.staticfiles',",
-    """'django.contrib.staticfiles',
-
-    'django.contrib.gis',
-
-    'rest_framework_gis',"""
-)
+# Other Constants
 
-STATIC_OLD = "STATIC_URL = '/static/'"
-STATIC_NEW = """STATIC_URL = '/static/'
-STATIC_ROOT = os.path.join(BASE_DIR, 'static')"""
-
-REST_FRAMEWORK_SETTINGS = """
-REST_FRAMEWORK = {
-    'DEFAULT_FILTER_BACKENDS': [
-        'django_filters.rest_framework.DjangoFilterBackend',
-        'rest_framework.filters.OrderingFilter',
-    ],
-    'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.IsAuthenticated'],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
-    'PAGE_SIZE': 100,  # Default
+BASIC_NUMBER_TYPES = {
+    DT_INTEGER: "IntegerField",
+    DT_FLOAT: "FloatField",
 }
-"""
 
-SPATIALITE_SETTINGS = """
-SPATIALITE_LIBRARY_PATH='{}' if (os.getenv('DJANGO_ENV') != 'production') else None
-"""
+API_FILTERABLE_FIELD_TYPES = {
+    DT_AUTO_KEY: ["exact", "in"],
+    DT_MANUAL_KEY: ["exact", "in"],
 
-DATABASE_ENGINE_NORMAL = "django.db.backends.sqlite3"
-DATABASE_ENGINE_GIS = "django.contrib.gis.db.backends.spatialite"
+    DT_INTEGER: ["exact", "lt", "lte", "gt", "gte", "in"],
+    DT_FLOAT: ["exact", "lt", "lte", "gt", "gte"],
+    DT_DECIMAL: ["exact", "lt", "lte", "gt", "gte", "in"],
 
-DISABLE_MAX_FIELDS = "\nDATA_UPLOAD_MAX_NUMBER_FIELDS = None\n"
+    DT_BOOLEAN: ["exact"],
 
+    DT_TEXT: ["exact", "iexact", "contains", "icontains", "in"],
 
-# Other Constants
+    DT_DATE: ["exact", "lt", "lte", "gt", "gte", "in"],
+    DT_TIME: ["exact", "lt", "lte", "gt", "gte", "in"],
 
-BASIC_NUMBER_TYPES = {
-    DT_INTEGER: "IntegerField",
-    DT_FLOAT: "FloatField",
+    DT_FOREIGN_KEY: ["exact", "in"],
 }
@@ -0,0 +1,211 @@
+# PyTrackDat is a utility for assisting in online database creation.
+# Copyright (C) 2018-2020 the PyTrackDat authors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Contact information:
+#     David Lougheed (david.lougheed@gmail.com)
+
+
+import hashlib
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+
+from typing import List, Sequence, Tuple
+
+from . import errors
+
+
+__all__ = [
+    "DEFAULT_ENVIRONMENT_CACHE_DIRECTORY",
+    "requirements_key",
+    "volatile_requirements",
+    "wheelhouse_install_args",
+    "environment_python",
+    "EnvironmentCache",
+]
+
+
+DEFAULT_ENVIRONMENT_CACHE_DIRECTORY = os.environ.get(
+    "PTD_ENV_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "pytrackdat", "environments"))
+
+# Written last into a cache entry, so that an interrupted build is never mistaken for a finished one
+COMPLETE_MARKER = ".complete"
+
+# Absolute paths of every wheel in a wheelhouse, which can be passed to pip install with -r
+WHEELS_LIST = "wheels.txt"
+
+
+def requirements_key(requirements_files: Sequence[str]) -> str:
+    """
+    Identifies a set of requirements files by the hashes of their contents, along with the Python version and platform
+    that packages are built for, since wheels built for one may not work on another.
+    """
+
+    h = hashlib.sha256("{} {} {} {}".format(
+        sys.implementation.name, ".".join(map(str, sys.version_info[:2])), sys.platform, platform.machine()
+    ).encode("utf-8"))
+
+    for rf in requirements_files:
+        with open(rf, "rb") as fh:
+            h.update(hashlib.sha256(fh.read()).digest())
+
+    return h.hexdigest()[:32]
+
+
+def volatile_requirements(requirements_files: Sequence[str]) -> List[str]:
+    """
+    Lists the requirements which point to a VCS repository or URL (e.g. git+https://...) instead of a released version.
+    What these refer to can change without the requirements files changing, so the cached wheels built from them can
+    go stale; they are only built again when a refresh is asked for.
+    """
+
+    requirements = []
+
+    for rf in requirements_files:
+        with open(rf, "r") as fh:
+            for line in fh:
+                line = re.sub(r"(^|\s)#.*$", "", line).strip()
+
+                if line.startswith("-e ") or line.startswith("--editable "):
+                    line = line.split(None, 1)[1]
+                elif line.startswith("-"):
+                    continue  # Other pip options, e.g. --index-url
+
+                if "://" in line:
+                    requirements.append(line)
+
+    return requirements
+
+
+def _wheel_project(wheel: str) -> str:
+    return wheel.split("-")[0].lower()
+
+
+def _write_wheels_list(path: str, wheels_dir: str) -> None:
+    with open(os.path.join(wheels_dir, WHEELS_LIST), "w") as wf:
+        for wheel in sorted(os.listdir(wheels_dir)):
+            if wheel.endswith(".whl"):
+                wf.write(os.path.join(path, wheel) + "\n")
+
+
+def wheelhouse_install_args(wheelhouse: str) -> Tuple[str, ...]:
+    """
+    Arguments to pip for installing every package in a wheelhouse, without touching the network.
+    """
+    return "install", "--no-index", "--find-links", wheelhouse, "-r", os.path.join(wheelhouse, WHEELS_LIST)
+
+
+def environment_python(path: str) -> str:
+    return os.path.join(path, "Scripts", "python.exe") if os.name == "nt" else os.path.join(path, "bin", "python")
+
+
+class EnvironmentCache:
+    """
+    On-disk cache of wheelhouses (directories of built packages) used to set up sites. Wheelhouses are keyed by
+    requirements_key, so they are only downloaded and built the first time a set of requirements is used, and are
+    rebuilt automatically whenever a requirements file changes. In offline mode, missing entries are an error instead
+    of being built.
+
+    Requirements on a VCS repository or URL (see volatile_requirements) are only built again, replacing their
+    previously built wheels, when refresh is set; otherwise the wheels built along with the wheelhouse are used, so a
+    cached wheelhouse never needs the network.
+    """
+
+    def __init__(self, directory: str = DEFAULT_ENVIRONMENT_CACHE_DIRECTORY, offline: bool = False,
+                 refresh: bool = False):
+        if offline and refresh:
+            raise errors.GenerationError("Error: Packages cannot be refreshed in offline mode.")
+
+        self.directory = directory
+        self.offline = offline
+        self.refresh = refresh
+
+    def _entry_path(self, kind: str, requirements_files: Sequence[str]) -> str:
+        return os.path.join(self.directory, kind, requirements_key(requirements_files))
+
+    @staticmethod
+    def _complete(path: str) -> bool:
+        return os.path.exists(os.path.join(path, COMPLETE_MARKER))
+
+    @staticmethod
+    def _mark_complete(path: str) -> None:
+        with open(os.path.join(path, COMPLETE_MARKER), "w"):
+            pass
+
+    def _check_online(self, kind: str, requirements_files: Sequence[str]) -> None:
+        if self.offline:
+            raise errors.GenerationError(
+                "Error: No cached {} for '{}' in '{}'.\n"
+                "       Run once without --offline to build it.".format(
+                    kind, "', '".join(map(os.path.basename, requirements_files)), self.directory))
+
+    def wheelhouse(self, requirements_files: Sequence[str]) -> str:
+        """
+        Returns the path of a wheelhouse with every package needed to install the given requirements, downloading and
+        building the packages if they are not cached yet.
+        """
+
+        path = self._entry_path("wheelhouses", requirements_files)
+        if self._complete(path):
+            if self.refresh:
+                self._refresh_volatile(path, requirements_files)
+            return path
+
+        self._check_online("wheelhouse", requirements_files)
+
+        tmp_path = path + ".tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+        subprocess.run((sys.executable, "-m", "pip", "wheel", "--wheel-dir", tmp_path,
+                        *(a for rf in requirements_files for a in ("-r", rf))), check=True)
+
+        _write_wheels_list(path, tmp_path)
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+        self._mark_complete(path)
+
+        return path
+
+    @staticmethod
+    def _refresh_volatile(path: str, requirements_files: Sequence[str]) -> None:
+        requirements = volatile_requirements(requirements_files)
+        if not requirements:
+            return
+
+        # Dependencies are found in the wheelhouse where possible, so usually only the volatile packages are built.
+        tmp_path = path + ".volatile.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+        subprocess.run((sys.executable, "-m", "pip", "wheel", "--wheel-dir", tmp_path, "--find-links", path,
+                        *requirements), check=True)
+
+        # Replace any wheels of the same projects, since a new build may have a different version
+        new_wheels = [w for w in os.listdir(tmp_path) if w.endswith(".whl")]
+        new_projects = set(map(_wheel_project, new_wheels))
+
+        for wheel in os.listdir(path):
+            if wheel.endswith(".whl") and _wheel_project(wheel) in new_projects:
+                os.remove(os.path.join(path, wheel))
+
+        for wheel in new_wheels:
+            os.replace(os.path.join(tmp_path, wheel), os.path.join(path, wheel))
+
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        _write_wheels_list(path, path)
@@ -17,6 +17,8 @@
 # Contact information:
 #     David Lougheed (david.lougheed@gmail.com)
 
+from typing import Optional
+
 from ..common import *
 from .constants import BASIC_NUMBER_TYPES
 from .utils import get_choices_from_text_field
@@ -24,6 +26,7 @@ from .utils import get_choices_from_text_field
 
 __all__ = [
    "clean_field_help_text",
+   "format_db_index",
    "auto_key_formatter",
    "manual_key_formatter",
    "foreign_key_formatter",
@@ -37,58 +40,67 @@ def clean_field_help_text(d: str) -> str:
     return d.replace("\\", "\\\\").replace("'", "\\'")
 
 
-def auto_key_formatter(f: RelationField) -> str:
+def format_db_index(db_index: Optional[bool]) -> str:
+    # Fields without an explicit db_index keep Django's default (only foreign keys are indexed)
+    return "" if db_index is None else ", db_index={}".format(db_index)
+
+
+def auto_key_formatter(f: RelationField, *_args) -> str:
     return "models.AutoField(primary_key=True, help_text='{}')".format(clean_field_help_text(f.description))
 
 
-def manual_key_formatter(f: RelationField) -> str:
+def manual_key_formatter(f: RelationField, *_args) -> str:
     # TODO: Shouldn't be always text?
     return "models.CharField(primary_key=True, max_length=127, " \
            "help_text='{}')".format(clean_field_help_text(f.description))
 
 
-def foreign_key_formatter(f: RelationField) -> str:
+def foreign_key_formatter(f: RelationField, db_index: Optional[bool] = None) -> str:
     return (
         "models.ForeignKey('{relation}', help_text='{help_text}', blank={nullable}, null={nullable}, "
-        "on_delete=models.{on_delete})".format(
+        "on_delete=models.{on_delete}{db_index})".format(
             relation=to_relation_name(f.additional_fields[0]),
             help_text=f.description.replace("'", "\\'"),
             nullable=str(f.nullable),
-            on_delete="SET_NULL" if f.nullable else "CASCADE"
+            on_delete="SET_NULL" if f.nullable else "CASCADE",
+            db_index=format_db_index(db_index)
         ))
 
 
-def basic_number_formatter(f: RelationField) -> str:
+def basic_number_formatter(f: RelationField, db_index: Optional[bool] = None) -> str:
     t = BASIC_NUMBER_TYPES[f.data_type]
-    return "models.{type}(help_text='{help_text}', blank={nullable}, null={nullable}{default})".format(
+    return "models.{type}(help_text='{help_text}', blank={nullable}, null={nullable}{default}{db_index})".format(
         type=t,
         help_text=clean_field_help_text(f.description),
         nullable=str(f.nullable),
-        default="" if f.default is None else ", default={}".format(f.default)
+        default="" if f.default is None else ", default={}".format(f.default),
+        db_index=format_db_index(db_index)
     )
 
 
-def decimal_formatter(f: RelationField) -> str:
+def decimal_formatter(f: RelationField, db_index: Optional[bool] = None) -> str:
     return (
         "models.DecimalField(help_text='{help_text}', max_digits={max_digits}, decimal_places={decimals}, "
-        "blank={nullable}, null={nullable}{default})".format(
+        "blank={nullable}, null={nullable}{default}{db_index})".format(
             help_text=clean_field_help_text(f.description),
             max_digits=f.additional_fields[0],
             decimals=f.additional_fields[1],
             nullable=str(f.nullable),
-            default="" if f.default is None else ", default=Decimal({})".format(f.default)
+            default="" if f.default is None else ", default=Decimal({})".format(f.default),
+            db_index=format_db_index(db_index)
         ))
 
 
-def boolean_formatter(f: RelationField) -> str:
-    return "models.BooleanField(help_text='{help_text}', blank={nullable}, null={nullable}{default})".format(
+def boolean_formatter(f: RelationField, db_index: Optional[bool] = None) -> str:
+    return "models.BooleanField(help_text='{help_text}', blank={nullable}, null={nullable}{default}{db_index})".format(
         help_text=clean_field_help_text(f.description),
         nullable=str(f.nullable),
-        default="" if f.default is None else ", default={}".format(f.default)
+        default="" if f.default is None else ", default={}".format(f.default),
+        db_index=format_db_index(db_index)
     )
 
 
-def text_formatter(f: RelationField) -> str:
+def text_formatter(f: RelationField, db_index: Optional[bool] = None) -> str:
     choices = ()
     max_length = None
 
@@ -105,68 +117,72 @@ def text_formatter(f: RelationField) -> str:
         if choice_names is not None:
             choices = tuple(zip(choice_names, choice_names))
 
-    return "models.{field_type}(help_text='{help_text}', blank={blank_value}{default}{choices}{length})".format(
-        field_type="TextField" if max_length is None else "CharField",
-        help_text=clean_field_help_text(f.description),
-        blank_value=str(len(choices) == 0 or f.nullable),
+    return (
+        "models.{field_type}(help_text='{help_text}', blank={blank_value}{default}{choices}{length}"
+        "{db_index})".format(
+            field_type="TextField" if max_length is None else "CharField",
+            help_text=clean_field_help_text(f.description),
+            blank_value=str(len(choices) == 0 or f.nullable),
 
-        # TODO: Make sure default is cleaned
-        default="" if f.default is None else ", default='{}'".format(f.default),
-        choices="" if len(choices) == 0 else ", choices={}".format(str(choices)),
-        length="" if max_length is None else ", max_length={}".format(max_length)
-    )
+            # TODO: Make sure default is cleaned
+            default="" if f.default is None else ", default='{}'".format(f.default),
+            choices="" if len(choices) == 0 else ", choices={}".format(str(choices)),
+            length="" if max_length is None else ", max_length={}".format(max_length),
+            db_index=format_db_index(db_index)
+        ))
 
 
-def date_formatter(f: RelationField) -> str:
+def date_formatter(f: RelationField, db_index: Optional[bool] = None) -> str:
     # TODO: standardize date formatting... I think this might already be standardized?
-    return "models.DateField(help_text='{help_text}', blank={nullable}, null={nullable}{default})".format(
+    return "models.DateField(help_text='{help_text}', blank={nullable}, null={nullable}{default}{db_index})".format(
         help_text=clean_field_help_text(f.description),
         nullable=str(f.nullable),
         default="" if f.default is None else ", default=datetime.strptime('{}', '%Y-%m-%d')".format(
             f.default.strftime("%Y-%m-%d")
-        )
+        ),
+        db_index=format_db_index(db_index)
     )
 
 
 # All spatial fields cannot be null.
 
 
-def point_formatter(f: RelationField) -> str:
+def point_formatter(f: RelationField, *_args) -> str:
     # TODO: WARN IF NULLABLE
     # TODO: DO WE EVER MAKE THIS BLANK?
     # TODO: FIGURE OUT POINT FORMAT FOR DEFAULTS / IN GENERAL
     return "models.PointField(help_text='{}')".format(f.description.replace("'", "\\'"))
 
 
-def line_string_formatter(f: RelationField) -> str:
+def line_string_formatter(f: RelationField, *_args) -> str:
     # TODO: WARN IF NULLABLE
     # TODO: DO WE EVER MAKE THIS BLANK?
     # TODO: FIGURE OUT LINE STRING FORMAT FOR DEFAULTS / IN GENERAL
     return "models.LineStringField(help_text='{}')".format(f.description.replace("'", "\\'"))
 
 
-def polygon_formatter(f: RelationField) -> str:
+def polygon_formatter(f: RelationField, *_args) -> str:
     # TODO: WARN IF NULLABLE
     # TODO: DO WE EVER MAKE THIS BLANK?
     # TODO: FIGURE OUT POLYGON FORMAT FOR DEFAULTS / IN GENERAL
     return "models.PolygonField(help_text='{}')".format(f.description.replace("'", "\\'"))
 
 
-def multi_point_formatter(f: RelationField) -> str:
+def multi_point_formatter(f: RelationField, *_args) -> str:
     # TODO: WARN IF NULLABLE
     # TODO: DO WE EVER MAKE THIS BLANK?
     # TODO: FIGURE OUT POINT FORMAT FOR DEFAULTS / IN GENERAL
     return "models.MultiPointField(help_text='{}')".format(f.description.replace("'", "\\'"))
 
 
-def multi_line_string_formatter(f: RelationField) -> str:
+def multi_line_string_formatter(f: RelationField, *_args) -> str:
     # TODO: WARN IF NULLABLE
     # TODO: DO WE EVER MAKE THIS BLANK?
     # TODO: FIGURE OUT LINE STRING FORMAT FOR DEFAULTS / IN GENERAL
     return "models.MultiLineStringField(help_text='{}')".format(f.description.replace("'", "\\'"))
 
 
-def multi_polygon_formatter(f: RelationField) -> str:
+def multi_polygon_formatter(f: RelationField, *_args) -> str:
     # TODO: WARN IF NULLABLE
     # TODO: DO WE EVER MAKE THIS BLANK?
     # TODO: FIGURE OUT POLYGON FORMAT FOR DEFAULTS / IN GENERAL
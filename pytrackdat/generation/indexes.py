@@ -0,0 +1,152 @@
+# PyTrackDat is a utility for assisting in online database creation.
+# Copyright (C) 2018-2020 the PyTrackDat authors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Contact information:
+#     David Lougheed (david.lougheed@gmail.com)
+
+
+import re
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from ..common import *
+from .constants import API_FILTERABLE_FIELD_TYPES
+from . import errors
+
+
+__all__ = [
+    "CREATED_AT_FIELD",
+    "MODIFIED_AT_FIELD",
+    "IndexPlan",
+    "list_filter_fields",
+    "range_filter_fields",
+    "parse_index_settings",
+    "plan_indexes",
+]
+
+
+# Fields added by PyTrackDat to every model
+CREATED_AT_FIELD = "pdt_created_at"
+MODIFIED_AT_FIELD = "pdt_modified_at"
+
+# Design file relation header cells such as 'index: date_collected; site' or 'no index: sex'
+RE_INDEX_SETTING = re.compile(r"^\s*(index|no index)\s*:(.*)$", re.IGNORECASE)
+
+# Opts a relation out of all automatic indexes
+ALL_FIELDS = "*"
+
+RANGE_LOOKUPS = {"lt", "lte", "gt", "gte"}
+
+
+class IndexPlan:
+    """
+    Indexes to generate for a relation's model. Single-field indexes are declared with db_index on the field (or,
+    when a foreign key is opted out of the index Django gives it by default, db_index=False), and composite indexes
+    in the model's Meta.indexes.
+    """
+
+    __slots__ = ("db_index", "composite")
+
+    def __init__(self, db_index: Dict[str, bool], composite: List[Tuple[str, ...]]):
+        self.db_index = db_index
+        self.composite = composite
+
+    def field_db_index(self, field_name: str) -> Optional[bool]:
+        # None if the field should keep Django's default
+        return self.db_index.get(field_name)
+
+
+def list_filter_fields(relation: Relation) -> Tuple[str, ...]:
+    """
+    Fields the admin lets users filter the relation's list by.
+    """
+    return tuple(f.name for f in relation.fields if f.data_type == DT_BOOLEAN or f.choices is not None)
+
+
+def range_filter_fields(relation: Relation) -> Tuple[str, ...]:
+    """
+    Fields the API lets clients filter by range (and which are useful to sort by), e.g. numbers, dates and times.
+    """
+    return tuple(f.name for f in relation.fields
+                 if RANGE_LOOKUPS.intersection(API_FILTERABLE_FIELD_TYPES.get(f.data_type, ())))
+
+
+def parse_index_settings(headers: Sequence[str]) -> Tuple[List[Tuple[str, ...]], List[str]]:
+    """
+    Finds index settings among the cells of a design file block's first row, returning the extra indexes (each a
+    tuple of field names) and the names of fields opted out of automatic indexes.
+    """
+
+    indexes = []
+    no_index = []
+
+    for cell in headers:
+        match = RE_INDEX_SETTING.match(cell)
+        if match is None:
+            continue
+
+        names = [n.strip() for n in match.group(2).split(DESIGN_SEPARATOR) if n.strip() != ""]
+        names = [n if n == ALL_FIELDS else field_to_py_code(n) for n in names]
+
+        if match.group(1).lower() == "index":
+            if names:
+                indexes.append(tuple(names))
+        else:
+            no_index.extend(names)
+
+    return indexes, no_index
+
+
+def plan_indexes(relation: Relation) -> IndexPlan:
+    """
+    Decides which indexes a relation's model should have. Fields used by the admin's list filters and the API's range
+    filters are indexed automatically, as is the modification time of each row (used to find recent changes); foreign
+    keys are already indexed by Django. Primary keys are always indexed. Indexes from the design file are added, and
+    fields opted out of automatic indexes (or all fields, with '*') are left without them.
+    """
+
+    fields = {f.name: f for f in relation.fields}
+    known_fields = set(fields) | {CREATED_AT_FIELD, MODIFIED_AT_FIELD}
+
+    for name in (*(n for idx in relation.indexes for n in idx), *(n for n in relation.no_index if n != ALL_FIELDS)):
+        if name not in known_fields:
+            raise errors.GenerationError(
+                "Error: Index setting for relation '{}' refers to unknown field '{}'.".format(
+                    relation.design_name, name))
+
+    no_index = set(fields) | {MODIFIED_AT_FIELD} if ALL_FIELDS in relation.no_index else set(relation.no_index)
+
+    db_index = {}
+
+    for name in (*list_filter_fields(relation), *range_filter_fields(relation), MODIFIED_AT_FIELD):
+        if name not in no_index and (name not in fields or fields[name].data_type not in KEY_TYPES):
+            db_index[name] = True
+
+    for f in relation.fields:
+        if f.data_type == DT_FOREIGN_KEY and f.name in no_index:
+            db_index[f.name] = False
+
+    composite = []
+
+    for index in relation.indexes:
+        if len(index) == 1:
+            # Explicit indexes win over opting out
+            if index[0] not in fields or fields[index[0]].data_type not in KEY_TYPES:
+                db_index[index[0]] = True
+        elif index not in composite:
+            composite.append(index)
+
+    return IndexPlan(db_index, composite)
@@ -0,0 +1,170 @@
+# PyTrackDat is a utility for assisting in online database creation.
+# Copyright (C) 2018-2020 the PyTrackDat authors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Contact information:
+#     David Lougheed (david.lougheed@gmail.com)
+
+
+import json
+import os
+
+from typing import Dict, List, Optional, Sequence
+
+from ..common import Relation, VERSION
+
+
+__all__ = [
+    "MANIFEST_FILE_NAME",
+    "MANIFEST_VERSION",
+    "RelationChange",
+    "RelationDiff",
+    "relations_manifest",
+    "read_manifest",
+    "write_manifest",
+    "diff_relations",
+]
+
+
+# Stored in the root of each generated site, next to manage.py
+MANIFEST_FILE_NAME = "ptd_manifest.json"
+
+# Bump whenever the format of manifests changes, so that sites with an old manifest are rebuilt instead of diffed.
+MANIFEST_VERSION = 1
+
+
+def _relation_to_json(relation: Relation) -> Dict:
+    # Defaults may be dates, times or decimals; these are compared by their string forms.
+    return json.loads(json.dumps(dict(relation), default=str))
+
+
+class RelationChange:
+    """
+    Field-level description of how a relation present in both a site's manifest and a new design has changed.
+    """
+
+    __slots__ = ("name", "added_fields", "removed_fields", "altered_fields")
+
+    def __init__(self, name: str, added_fields: List[str], removed_fields: List[str], altered_fields: List[str]):
+        self.name = name
+        self.added_fields = added_fields
+        self.removed_fields = removed_fields
+        self.altered_fields = altered_fields
+
+    def __str__(self):
+        parts = ["{} {}".format(label, ", ".join(fields)) for label, fields in (
+            ("added", self.added_fields), ("removed", self.removed_fields), ("altered", self.altered_fields)) if fields]
+        return "{}: {}".format(self.name, "; ".join(parts) if parts else "relation settings changed")
+
+
+class RelationDiff:
+    """
+    Differences between the relations a site was last generated with and those of a new design.
+    """
+
+    __slots__ = ("added", "removed", "changed", "unchanged")
+
+    def __init__(self, added: List[str], removed: List[str], changed: List[RelationChange], unchanged: List[str]):
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+        self.unchanged = unchanged
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def summary(self) -> str:
+        if not self.has_changes:
+            return "No relations have changed."
+
+        return "\n".join(
+            ["Added relation: {}".format(rn) for rn in self.added] +
+            ["Removed relation: {}".format(rn) for rn in self.removed] +
+            ["Changed relation {}".format(c) for c in self.changed])
+
+
+def relations_manifest(relations: Sequence[Relation], gis_mode: bool) -> Dict:
+    return {
+        "version": MANIFEST_VERSION,
+        "pytrackdat_version": VERSION,
+        "gis_mode": gis_mode,
+        "relations": [_relation_to_json(r) for r in relations],
+    }
+
+
+def read_manifest(site_path: str) -> Optional[Dict]:
+    """
+    Reads the manifest of a previously generated site, returning None if the site has no (usable) manifest.
+    """
+
+    try:
+        with open(os.path.join(site_path, MANIFEST_FILE_NAME), "r", encoding="utf-8") as mf:
+            manifest = json.load(mf)
+    except (OSError, ValueError):
+        return None
+
+    return manifest if manifest.get("version") == MANIFEST_VERSION else None
+
+
+def write_manifest(site_path: str, manifest: Dict) -> None:
+    path = os.path.join(site_path, MANIFEST_FILE_NAME)
+    tmp_path = path + ".tmp"
+
+    with open(tmp_path, "w", encoding="utf-8") as mf:
+        json.dump(manifest, mf, indent=2)
+
+    # Replace atomically, so an interrupted run cannot leave a half-written manifest behind
+    os.replace(tmp_path, path)
+
+
+def diff_relations(manifest: Dict, relations: Sequence[Relation]) -> RelationDiff:
+    """
+    Compares the relations recorded in a site's manifest to a new design's relations, by name. The generated code for
+    a relation depends only on the relation itself, so unchanged relations keep the same models, admin classes and
+    API views.
+    """
+
+    old_relations = {r["name"]: r for r in manifest["relations"]}
+    new_relations = [_relation_to_json(r) for r in relations]
+    new_names = {r["name"] for r in new_relations}
+
+    added = []
+    changed = []
+    unchanged = []
+
+    for new in new_relations:
+        old = old_relations.get(new["name"])
+
+        if old is None:
+            added.append(new["name"])
+            continue
+
+        if old == new:
+            unchanged.append(new["name"])
+            continue
+
+        old_fields = {f["name"]: f for f in old["fields"]}
+        new_fields = {f["name"]: f for f in new["fields"]}
+
+        changed.append(RelationChange(
+            new["name"],
+            added_fields=[f for f in new_fields if f not in old_fields],
+            removed_fields=[f for f in old_fields if f not in new_fields],
+            altered_fields=[f for f in new_fields if f in old_fields and new_fields[f] != old_fields[f]]))
+
+    removed = [r["name"] for r in manifest["relations"] if r["name"] not in new_names]
+
+    return RelationDiff(added, removed, changed, unchanged)
@@ -0,0 +1,297 @@
+# PyTrackDat is a utility for assisting in online database creation.
+# Copyright (C) 2018-2020 the PyTrackDat authors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Contact information:
+#     David Lougheed (david.lougheed@gmail.com)
+
+
+import os
+import random
+import re
+import shutil
+import stat
+import subprocess
+import sys
+
+from typing import Dict, List, Optional, Union
+
+from ..common import VERSION
+from .environments import environment_python, wheelhouse_install_args
+
+
+__all__ = [
+    "SiteFiles",
+    "make_secret_key",
+    "read_secret_key",
+    "render_template",
+    "render_site_files",
+    "write_site_files",
+    "set_up_site",
+    "update_site",
+]
+
+
+PACKAGE_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SITE_TEMPLATE_DIRECTORY = os.path.join(PACKAGE_DIRECTORY, "site_template")
+APP_INCLUDES_DIRECTORY = os.path.join(PACKAGE_DIRECTORY, "app_includes")
+UTIL_FILES_DIRECTORY = os.path.join(PACKAGE_DIRECTORY, "util_files")
+
+TEMPLATE_SUFFIX = "-tpl"
+RE_TEMPLATE_VARIABLE = re.compile(r"{{ (\w+) }}")
+RE_SECRET_KEY = re.compile(r"^SECRET_KEY = '([^'\n]*)'$", re.MULTILINE)
+
+# Version of the Django documentation linked to from generated files
+DJANGO_DOCS_VERSION = "2.2"
+
+# Same characters as Django's own get_random_secret_key; none of them need escaping inside a Python string literal
+SECRET_KEY_CHARACTERS = "abcdefghijklmnopqrstuvwxyz0123456789!@#$%^&*(-_=+)"
+SECRET_KEY_LENGTH = 50
+
+# Files copied as-is into the root of every site
+SITE_UTIL_FILES = (
+    "requirements.txt",
+    "requirements_gis.txt",  # May go unused
+    "docker-compose.yml",
+    "nginx.conf",
+    "export_labels.R",
+    "install_dependencies.R",
+)
+
+GIS_INSTALLED_APPS = """
+    'django.contrib.gis',
+
+    'rest_framework_gis',
+"""
+
+SPATIALITE_SETTINGS = """
+SPATIALITE_LIBRARY_PATH = '{}' if (os.getenv('DJANGO_ENV') != 'production') else None
+"""
+
+DATABASE_ENGINE_NORMAL = "django.db.backends.sqlite3"
+DATABASE_ENGINE_GIS = "django.contrib.gis.db.backends.spatialite"
+
+# Run with the site's own interpreter, reading the script from standard input so that the admin account's password
+# never shows up in a process listing.
+SITE_SETUP_SCRIPT = """import importlib
+import os
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', {settings_module!r})
+
+import django
+from django.core.management import call_command
+
+django.setup()
+
+call_command('makemigrations')
+importlib.invalidate_caches()  # Make sure the migrations just written are seen
+call_command('migrate')
+call_command('createinitialrevisions')
+
+if {username!r}:
+    from django.contrib.auth.models import User
+    User.objects.create_superuser({username!r}, {email!r}, {password!r})
+"""
+
+# Relative paths (using forward slashes) to file contents, or to None for empty directories
+SiteFiles = Dict[str, Optional[Union[str, bytes]]]
+
+
+def make_secret_key() -> str:
+    rng = random.SystemRandom()
+    return "".join(rng.choice(SECRET_KEY_CHARACTERS) for _ in range(SECRET_KEY_LENGTH))
+
+
+def read_secret_key(site_path: str, site_name: str) -> Optional[str]:
+    """
+    Reads the secret key from the settings of a previously written site, so that re-rendering the site keeps it.
+    """
+
+    try:
+        with open(os.path.join(site_path, site_name, "settings.py"), "r", encoding="utf-8") as sf:
+            match = RE_SECRET_KEY.search(sf.read())
+    except OSError:
+        return None
+
+    return match.group(1) if match else None
+
+
+def render_template(template: str, context: Dict[str, str]) -> str:
+    """
+    Replaces each {{ name }} in a template with the context's value for the name. Unlike Django's own template
+    language there are no filters or tags, so templates can be rendered before Django is installed anywhere.
+    """
+    return RE_TEMPLATE_VARIABLE.sub(lambda m: context[m.group(1)], template)
+
+
+def _read_bytes(path: str) -> bytes:
+    with open(path, "rb") as fh:
+        return fh.read()
+
+
+def _walk_files(directory: str):
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+        for f in sorted(files):
+            if not f.endswith(".pyc"):
+                path = os.path.join(root, f)
+                yield os.path.relpath(path, directory).replace(os.sep, "/"), path
+
+
+def render_site_files(site_name: str, admin_code: str, models_code: str, api_code: str, gis_mode: bool = False,
+                      site_url: str = "localhost", spatialite_library_path: str = "",
+                      secret_key: Optional[str] = None) -> SiteFiles:
+    """
+    Renders the full file tree of a new site: the Django project (named after the site), the core application with
+    the generated admin, models and API code, PyTrackDat's own application files, and the deployment files. Nothing
+    is written to disk; given the same secret key, the result is the same every time.
+    """
+
+    context = {
+        "project_name": site_name,
+        "version": VERSION,
+        "docs_version": DJANGO_DOCS_VERSION,
+        "secret_key": secret_key if secret_key is not None else make_secret_key(),
+        "site_url": site_url,
+        "gis_apps": GIS_INSTALLED_APPS if gis_mode else "",
+        "database_engine": DATABASE_ENGINE_GIS if gis_mode else DATABASE_ENGINE_NORMAL,
+        "gis_settings": SPATIALITE_SETTINGS.format(spatialite_library_path) if gis_mode else "",
+    }
+
+    template_directories = {"project": site_name, "app": "core"}
+
+    files = {}  # type: SiteFiles
+
+    for rel_path, path in _walk_files(SITE_TEMPLATE_DIRECTORY):
+        if not rel_path.endswith(TEMPLATE_SUFFIX):
+            continue
+
+        parts = rel_path[:-len(TEMPLATE_SUFFIX)].split("/")
+        parts[0] = template_directories.get(parts[0], parts[0]) if len(parts) > 1 else parts[0]
+
+        with open(path, "r", encoding="utf-8") as fh:
+            files["/".join(parts)] = render_template(fh.read(), context)
+
+    files["core/admin.py"] = admin_code
+    files["core/models.py"] = models_code
+    files["core/api.py"] = api_code
+
+    for rel_path, path in _walk_files(APP_INCLUDES_DIRECTORY):
+        files["core/" + rel_path] = _read_bytes(path)
+
+    files["core/common.py"] = _read_bytes(os.path.join(PACKAGE_DIRECTORY, "common.py"))
+
+    for f in SITE_UTIL_FILES:
+        files[f] = _read_bytes(os.path.join(UTIL_FILES_DIRECTORY, f))
+
+    with open(os.path.join(UTIL_FILES_DIRECTORY, "Dockerfile{}.template".format(".gis" if gis_mode else "")),
+              "r", encoding="utf-8") as fh:
+        files["Dockerfile"] = fh.read().replace("SITE_NAME", site_name)
+
+    # Storage directory for snapshots
+    files["snapshots"] = None
+
+    return files
+
+
+def write_site_files(files: SiteFiles, directory: str) -> List[str]:
+    """
+    Writes a rendered file tree into a directory, creating it if needed. Files whose contents are already up to date
+    are left alone, so that re-writing an existing site only touches what has changed. Returns the relative paths of
+    the files written.
+    """
+
+    os.makedirs(directory, exist_ok=True)
+
+    written = []
+
+    for rel_path in sorted(files):
+        path = os.path.join(directory, *rel_path.split("/"))
+        contents = files[rel_path]
+
+        if contents is None:
+            os.makedirs(path, exist_ok=True)
+            continue
+
+        data = contents if isinstance(contents, bytes) else contents.encode("utf-8")
+
+        try:
+            with open(path, "rb") as fh:
+                if fh.read() == data:
+                    continue
+        except OSError:
+            pass
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as fh:
+            fh.write(data)
+
+        written.append(rel_path)
+
+    manage_py = os.path.join(directory, "manage.py")
+    if os.path.exists(manage_py):
+        os.chmod(manage_py, os.stat(manage_py).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+    return written
+
+
+def _install_site_environment(site_env: str, wheelhouse: str) -> None:
+    if not os.path.exists(environment_python(site_env)):
+        shutil.rmtree(site_env, ignore_errors=True)
+        subprocess.run((sys.executable, "-m", "virtualenv", site_env), check=True)
+
+    # Does nothing if everything is already installed
+    subprocess.run((environment_python(site_env), "-m", "pip", *wheelhouse_install_args(wheelhouse)), check=True)
+
+
+def set_up_site(site_path: str, site_name: str, wheelhouse: str, admin_username: str = "", admin_email: str = "",
+                admin_password: str = "", is_production_build: bool = False) -> None:
+    """
+    Installs a written site's dependencies from a wheelhouse into a new virtual environment in the site, creates its
+    database and (if a username is given) its admin account. Production builds are deployed with Docker, so the
+    virtual environment is removed afterwards.
+
+    Raises subprocess.CalledProcessError if any step fails.
+    """
+
+    site_env = os.path.join(site_path, "site_env")
+    shutil.rmtree(site_env, ignore_errors=True)
+    _install_site_environment(site_env, wheelhouse)
+
+    script = SITE_SETUP_SCRIPT.format(settings_module="{}.settings".format(site_name), username=admin_username,
+                                      email=admin_email, password=admin_password)
+    subprocess.run((environment_python(site_env), "-"), input=script.encode("utf-8"), cwd=site_path, check=True)
+
+    if is_production_build:
+        shutil.rmtree(site_env, ignore_errors=True)
+
+
+def update_site(site_path: str, wheelhouse: str, is_production_build: bool = False) -> None:
+    """
+    Brings the database of a previously set up site in line with its re-written models, by creating migrations for
+    only what has changed and applying them; existing data and accounts are kept. Django may need to ask whether a
+    field was renamed, or for a one-off default for rows gaining a non-nullable field, so it is run interactively.
+
+    Raises subprocess.CalledProcessError if any step fails.
+    """
+
+    site_env = os.path.join(site_path, "site_env")
+    _install_site_environment(site_env, wheelhouse)
+
+    subprocess.run((environment_python(site_env), "manage.py", "makemigrations", "core"), cwd=site_path, check=True)
+    subprocess.run((environment_python(site_env), "manage.py", "migrate"), cwd=site_path, check=True)
+
+    if is_production_build:
+        shutil.rmtree(site_env, ignore_errors=True)
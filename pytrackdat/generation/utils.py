@@ -22,14 +22,46 @@ from ..common import DESIGN_SEPARATOR, RelationField
 
 
 __all__ = [
+    "format_literal",
+    "get_choices_from_additional_fields",
     "get_choices_from_text_field",
 ]
 
 
-def get_choices_from_text_field(f: RelationField) -> Optional[Tuple[str, ...]]:
-    if len(f.additional_fields) == 2:
+def get_choices_from_additional_fields(additional_fields: Tuple) -> Optional[Tuple[str, ...]]:
+    if len(additional_fields) == 2:
         # TODO: Choice human names
-        choice_names = tuple(str(c).strip() for c in f.additional_fields[1].split(DESIGN_SEPARATOR)
+        choice_names = tuple(str(c).strip() for c in additional_fields[1].split(DESIGN_SEPARATOR)
                              if str(c).strip() != "")
         return choice_names if len(choice_names) > 0 else None
     return None
+
+
+def get_choices_from_text_field(f: RelationField) -> Optional[Tuple[str, ...]]:
+    return get_choices_from_additional_fields(f.additional_fields)
+
+
+def format_literal(value, indent: int = 0, width: int = 120) -> str:
+    """
+    Formats a value made of dicts, lists, tuples and other literals as Python code, to be placed at the given
+    indentation level. Containers which do not fit on one line (within width) are split into one item per line.
+
+    Unlike pprint.pformat, which re-renders every nested value once per level to check whether it fits, each value is
+    only rendered once, so formatting takes time proportional to the size of the output.
+    """
+
+    if isinstance(value, dict):
+        opening, closing = "{", "}"
+        items = ["{}: {}".format(repr(k), format_literal(v, indent + 4, width)) for k, v in value.items()]
+    elif isinstance(value, (list, tuple)):
+        opening, closing = ("[", "]") if isinstance(value, list) else ("(", ")")
+        items = [format_literal(v, indent + 4, width) for v in value]
+    else:
+        return repr(value)
+
+    one_line = opening + ", ".join(items) + ("," if len(items) == 1 and closing == ")" else "") + closing
+    if indent + len(one_line) <= width and "\n" not in one_line:
+        return one_line
+
+    item_indent = " " * (indent + 4)
+    return "{}\n{}{}{}".format(opening, "".join("{}{},\n".format(item_indent, i) for i in items), " " * indent, closing)
@@ -0,0 +1,202 @@
+# PyTrackDat is a utility for assisting in online database creation.
+# Copyright (C) 2018-2020 the PyTrackDat authors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Contact information:
+#     David Lougheed (david.lougheed@gmail.com)
+
+import cProfile
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Optional
+
+from .common import VERSION
+
+
+__all__ = [
+    "RunProfiler",
+    "profile_run",
+    "phase",
+]
+
+
+def _cpu_time() -> float:
+    # Includes worker processes which have finished (e.g. once a process pool has been shut down.)
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+class RunProfiler:
+    """
+    Collects wall time, CPU time, row throughput and peak (Python-allocated) memory for the phases of a command-line
+    run, optionally along with a cProfile profile of the whole run. Phases may be nested; memory use of child processes
+    is not included in peaks.
+    """
+
+    def __init__(self, command: str, cprofile_path: Optional[str] = None):
+        self.command = command
+        self.cprofile_path = cprofile_path
+
+        self.phases = []
+        self._stack = []
+        self._profile = None  # type: Optional[cProfile.Profile]
+
+        self._started_at = None  # type: Optional[datetime]
+        self._start_wall = 0.0
+        self._start_cpu = 0.0
+        self._end_wall = 0.0
+        self._end_cpu = 0.0
+        self._peak_memory = 0
+
+    def start(self) -> None:
+        self._started_at = datetime.now()
+        self._start_wall = time.perf_counter()
+        self._start_cpu = _cpu_time()
+
+        tracemalloc.start()
+
+        if self.cprofile_path is not None:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def stop(self) -> None:
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile.dump_stats(self.cprofile_path)
+            self._profile = None
+
+        self._end_wall = time.perf_counter()
+        self._end_cpu = _cpu_time()
+
+        if tracemalloc.is_tracing():
+            self._peak_memory = max([self._peak_memory, tracemalloc.get_traced_memory()[1]] +
+                                    [p["peak_memory"] for p in self.phases])
+            tracemalloc.stop()
+
+    @contextmanager
+    def phase(self, name: str, relation: Optional[str] = None, rows: Optional[int] = None):
+        """
+        Measures a phase of the run. Yields the phase's record, so that the number of rows processed can be filled in
+        once it is known.
+        """
+
+        if self._stack:
+            # Peaks are reset for each phase, so remember the enclosing phase's peak so far
+            parent = self._stack[-1]
+            parent["peak_memory"] = max(parent["peak_memory"], tracemalloc.get_traced_memory()[1])
+
+        if hasattr(tracemalloc, "reset_peak"):  # Python 3.9+; otherwise, peaks are for the run so far
+            tracemalloc.reset_peak()
+
+        record = {
+            "name": name,
+            "relation": relation,
+            "depth": len(self._stack),
+            "rows": rows,
+            "wall_time": 0.0,
+            "cpu_time": 0.0,
+            "rows_per_second": None,
+            "peak_memory": 0,
+        }
+
+        self.phases.append(record)
+        self._stack.append(record)
+
+        start_wall = time.perf_counter()
+        start_cpu = _cpu_time()
+
+        try:
+            yield record
+        finally:
+            record["wall_time"] = time.perf_counter() - start_wall
+            record["cpu_time"] = _cpu_time() - start_cpu
+            record["peak_memory"] = max(record["peak_memory"], tracemalloc.get_traced_memory()[1])
+            if record["rows"] is not None and record["wall_time"] > 0:
+                record["rows_per_second"] = record["rows"] / record["wall_time"]
+
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1]["peak_memory"] = max(self._stack[-1]["peak_memory"], record["peak_memory"])
+
+    def report(self) -> Dict:
+        return {
+            "command": self.command,
+            "arguments": sys.argv[1:],
+            "pytrackdat_version": VERSION,
+            "python_version": platform.python_version(),
+            "platform": platform.platform(),
+            "started_at": self._started_at.isoformat() if self._started_at else None,
+            "wall_time": self._end_wall - self._start_wall,
+            "cpu_time": self._end_cpu - self._start_cpu,
+            "peak_memory": self._peak_memory,
+            "cprofile_path": self.cprofile_path,
+            "phases": self.phases,
+        }
+
+
+_active_profiler = None  # type: Optional[RunProfiler]
+
+
+@contextmanager
+def profile_run(command: str, report_path: Optional[str] = None, cprofile_path: Optional[str] = None):
+    """
+    Profiles a command-line run if a path for a JSON report ("-" for standard output) or a cProfile dump is given;
+    otherwise, does nothing. The report is written even if the run exits early.
+    """
+
+    global _active_profiler
+
+    if report_path is None and cprofile_path is None:
+        yield None
+        return
+
+    profiler = RunProfiler(command, cprofile_path)
+    _active_profiler = profiler
+    profiler.start()
+
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        _active_profiler = None
+
+        if report_path == "-":
+            json.dump(profiler.report(), sys.stdout, indent=2)
+            print()
+        elif report_path is not None:
+            with open(report_path, "w") as rf:
+                json.dump(profiler.report(), rf, indent=2)
+
+
+@contextmanager
+def phase(name: str, relation: Optional[str] = None, rows: Optional[int] = None):
+    """
+    Measures a phase of the current run, if it is being profiled (see profile_run.) Yields a record whose "rows" entry
+    can be set to the number of rows processed in the phase.
+    """
+
+    if _active_profiler is None:
+        yield {}
+        return
+
+    with _active_profiler.phase(name, relation, rows) as record:
+        yield record
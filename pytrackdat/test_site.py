@@ -6,6 +6,7 @@ import subprocess
 from sys import argv
 
 from .common import *
+from .generation.environments import environment_python
 
 
 TEMP_DIRECTORY = os.path.join(os.getcwd(), "tmp")
@@ -25,11 +26,8 @@ def main():
         exit(1)
 
     try:
-        subprocess.run(
-            ('cmd /c "cd {} && site_env\\Scripts\\activate.bat && python manage.py runserver"' if os.name == "nt"
-             else "/bin/bash -c 'cd {} && source site_env/bin/activate && ./manage.py runserver'").format(site_path),
-            shell=True
-        )
+        subprocess.run((environment_python(os.path.join(site_path, "site_env")), "manage.py", "runserver"),
+                       cwd=site_path)
     except (subprocess.CalledProcessError, KeyboardInterrupt):
         print("\nExiting...")
 
@@ -11,6 +11,9 @@ setup(
 
     python_requires="~=3.6",
     install_requires=["wheel", "virtualenv"],
+    extras_require={
+        "numpy": ["numpy"],
+    },
 
     description='A utility for assisting in the creation of online '
                 'databases for biological data.',
@@ -28,7 +31,7 @@ setup(
     author="David Lougheed",
     author_email="david.lougheed@gmail.com",
 
-    packages=["pytrackdat"],
+    packages=["pytrackdat", "pytrackdat.analysis", "pytrackdat.generation"],
     include_package_data=True,
 
     entry_points={
@@ -0,0 +1,157 @@
+# PyTrackDat is a utility for assisting in online database creation.
+# Copyright (C) 2018-2020 the PyTrackDat authors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Contact information:
+#     David Lougheed (david.lougheed@gmail.com)
+
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from contextlib import redirect_stdout
+
+import pytrackdat.analysis as pa
+from pytrackdat.analysis.cache import PROFILE_STORE_VERSION, ProfileCache, ProfileStore
+
+
+class TestAnalysisCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = ProfileCache(os.path.join(self.tmp_dir, "cache"))
+        self.relation_file = os.path.join(self.tmp_dir, "sites.csv")
+        shutil.copy("./example/data/sites.csv", self.relation_file)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_cache_round_trip(self):
+        self.assertIsNone(self.cache.get(self.relation_file))
+
+        fields, profiles = pa.profile_relation_file(self.relation_file)
+        self.cache.put(self.relation_file, fields, profiles)
+
+        c_fields, c_profiles = self.cache.get(self.relation_file)
+        self.assertEqual(c_fields, fields)
+        self.assertEqual([p.value_counts for p in c_profiles], [p.value_counts for p in profiles])
+
+        self.assertEqual(len(self.cache.entries()), 1)
+        self.assertEqual(self.cache.clear(), 1)
+        self.assertIsNone(self.cache.get(self.relation_file))
+
+    def test_changed_file_invalidates_entry(self):
+        relations = (("sites", self.relation_file),)
+
+        with redirect_stdout(io.StringIO()):
+            pa.profile_relations(relations, cache=self.cache)
+
+        self.assertIsNotNone(self.cache.get(self.relation_file))
+
+        with open(self.relation_file, "a") as rf:
+            rf.write("New Lake,44.1,-76.2,\n")
+
+        self.assertIsNone(ProfileCache(self.cache.directory).get(self.relation_file))
+
+        with redirect_stdout(io.StringIO()):
+            (_rn, _fields, profiles), = pa.profile_relations(relations, cache=ProfileCache(self.cache.directory))
+
+        self.assertIn("New Lake", profiles[0].value_counts)
+
+    def test_distinct_cap_mismatch_misses(self):
+        fields, profiles = pa.profile_relation_file(self.relation_file)
+        self.cache.put(self.relation_file, fields, profiles)
+
+        # Profiles kept without a limit must not be used when profiling under a memory limit, or vice versa
+        self.assertIsNone(self.cache.get(self.relation_file, 10))
+
+        relations = (("sites", self.relation_file),)
+        with redirect_stdout(io.StringIO()):
+            (_rn, _fields, capped), = pa.profile_relations(relations, cache=self.cache, distinct_cap=10)
+
+        self.assertTrue(all(p.distinct_cap == 10 for p in capped))
+        self.assertIsNotNone(self.cache.get(self.relation_file, 10))
+        self.assertIsNone(self.cache.get(self.relation_file))
+
+    def test_profile_store_merges_batches(self):
+        batch_file = os.path.join(self.tmp_dir, "sites_2.csv")
+        with open(self.relation_file, "r") as rf, open(batch_file, "w") as bf:
+            bf.write(next(rf))
+            bf.write("New Lake,44.1,-76.2,\n")
+
+        store_path = os.path.join(self.tmp_dir, "profiles.json")
+
+        store = ProfileStore(store_path)
+        for rf in (self.relation_file, batch_file):
+            self.assertFalse(store.has_batch("sites", rf))
+            store.add_batch("sites", rf, *pa.profile_relation_file(rf))
+        store.save()
+
+        store = ProfileStore(store_path)
+        self.assertTrue(store.has_batch("sites", batch_file))
+
+        (rn, fields, profiles), = store.relations()
+        _fields, all_profiles = pa.profile_relation_file(self.relation_file)
+        self.assertEqual(profiles[0].rows, all_profiles[0].rows + 1)
+        self.assertIn("New Lake", profiles[0].value_counts)
+
+        with self.assertRaises(ValueError):
+            store.add_batch("sites", "./example/data/specimens.csv",
+                            *pa.profile_relation_file("./example/data/specimens.csv"))
+
+        # Merged profiles are capped by the memory limit of the run merging them
+        store.add_batch("sites", self.relation_file, fields, all_profiles, distinct_cap=3)
+        (_rn, _fields, capped), = store.relations()
+        self.assertTrue(all(p.distinct_cap == 3 and len(p.value_counts) <= 4 for p in capped))
+        self.assertEqual([p.rows for p in capped], [p.rows + a.rows for p, a in zip(profiles, all_profiles)])
+
+    def test_profile_store_migrates_old_versions(self):
+        fields, profiles = pa.profile_relation_file(self.relation_file, distinct_cap=3)
+        store_path = os.path.join(self.tmp_dir, "profiles.json")
+
+        def old_profile(p, version):
+            d = p.to_dict()
+            if version < 3:
+                for k in ("has_duplicates", "sketch", "exact_unique"):
+                    del d[k]
+            if version < 4 and d["overflow"] is not None:
+                del d["overflow"]["date_formats"]
+                del d["overflow"]["time_formats"]
+            return d
+
+        for version in (2, 3, 4):
+            with open(store_path, "w") as sf:
+                json.dump({"version": version, "relations": [{
+                    "name": "sites", "fields": list(fields), "batches": ["0" * 64],
+                    "profiles": [old_profile(p, version) for p in profiles]}]}, sf)
+
+            store = ProfileStore(store_path)
+            store.add_batch("sites", self.relation_file, fields, profiles)
+            store.save()
+
+            (_rn, _fields, merged), = ProfileStore(store_path).relations()
+            self.assertEqual([p.rows for p in merged], [2 * p.rows for p in profiles])
+            self.assertTrue(all(p.distinct_overflow for p in merged))
+            self.assertTrue(all(p.has_duplicates for p in merged))
+
+            with open(store_path, "r") as sf:
+                self.assertEqual(json.load(sf)["version"], PROFILE_STORE_VERSION)
+
+        with open(store_path, "w") as sf:
+            json.dump({"version": PROFILE_STORE_VERSION + 1, "relations": []}, sf)
+        with self.assertRaises(ValueError):
+            ProfileStore(store_path)
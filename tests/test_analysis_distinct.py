@@ -0,0 +1,53 @@
+# PyTrackDat is a utility for assisting in online database creation.
+# Copyright (C) 2018-2020 the PyTrackDat authors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Contact information:
+#     David Lougheed (david.lougheed@gmail.com)
+
+import unittest
+
+import pytrackdat.analysis as pa
+from pytrackdat.analysis.distinct import parse_memory_size, SpillingDistinctSet
+
+
+class TestAnalysisDistinct(unittest.TestCase):
+    def test_parse_memory_size(self):
+        self.assertEqual(parse_memory_size("1000"), 1000)
+        self.assertEqual(parse_memory_size("512M"), 512 * 1024 * 1024)
+        self.assertEqual(parse_memory_size("1.5gb"), 3 * 512 * 1024 * 1024)
+        with self.assertRaises(ValueError):
+            parse_memory_size("lots")
+
+    def test_spilling_distinct_set(self):
+        values = ["value\n{}".format(i) for i in range(5000)]
+
+        with SpillingDistinctSet(memory_limit=10000, n_partitions=8) as ds:
+            for v in values:
+                ds.add(v)
+
+            self.assertTrue(ds.spilled)
+            self.assertTrue(ds.is_unique())
+            self.assertEqual(len(ds), len(values))
+
+            # Spilled long ago, so this duplicate can only be found by checking the partitions
+            ds.add(values[0])
+            self.assertFalse(ds.has_duplicates)
+            self.assertFalse(ds.is_unique())
+            self.assertEqual(len(ds), len(values))
+
+    def test_column_is_unique_with_memory_limit(self):
+        self.assertTrue(pa.column_is_unique("./example/data/specimens.csv", 0, memory_limit=1000))
+        self.assertFalse(pa.column_is_unique("./example/data/specimens.csv", 2, memory_limit=1000))
@@ -0,0 +1,74 @@
+# PyTrackDat is a utility for assisting in online database creation.
+# Copyright (C) 2018-2020 the PyTrackDat authors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Contact information:
+#     David Lougheed (david.lougheed@gmail.com)
+
+import io
+import unittest
+
+from contextlib import redirect_stdout
+
+import pytrackdat.analysis as pa
+from pytrackdat.analysis.sketches import BloomFilter, HyperLogLog
+
+
+def _profiles(**columns):
+    fields = tuple(columns.keys())
+    profiles = []
+    for col in columns.values():
+        p = pa.ColumnProfile()
+        p.update(col)
+        profiles.append(p)
+    return fields, profiles
+
+
+class TestAnalysisForeignKeys(unittest.TestCase):
+    def test_bloom_filter(self):
+        bf = BloomFilter.from_values((str(i) for i in range(1000)), 1000)
+        self.assertTrue(all(str(i) in bf for i in range(1000)))
+        self.assertLess(sum(str(i) in bf for i in range(1000, 11000)), 300)
+
+    def test_hyperloglog(self):
+        hll = HyperLogLog()
+        hll.update(str(i) for i in range(50000))
+        self.assertAlmostEqual(hll.estimate(), 50000, delta=50000 * 3 * hll.standard_error)
+
+        other = HyperLogLog.from_dict(hll.to_dict())
+        other.update(str(i) for i in range(25000, 75000))
+        hll.merge(other)
+        self.assertAlmostEqual(hll.estimate(), 75000, delta=75000 * 3 * hll.standard_error)
+
+    def test_example_foreign_key(self):
+        relations = (("specimens", "./example/data/specimens.csv"), ("sites", "./example/data/sites.csv"))
+        with redirect_stdout(io.StringIO()):
+            relation_profiles = pa.profile_relations(relations)
+            keys = pa.find_relation_keys(relation_profiles)
+
+        self.assertDictEqual(pa.find_foreign_keys(relation_profiles, keys), {("specimens", 3): "sites"})
+
+    def test_numeric_keys_need_matching_names(self):
+        relation_profiles = [
+            ("sample", *_profiles(sample_id=[str(i) for i in range(100)])),
+            ("measurement", *_profiles(measurement_id=[str(i) for i in range(200)],
+                                       count=[str(i % 5) for i in range(200)],
+                                       sample=[str(i % 50) for i in range(199)] + [""])),
+        ]
+
+        with redirect_stdout(io.StringIO()):
+            keys = pa.find_relation_keys(relation_profiles)
+
+        self.assertDictEqual(pa.find_foreign_keys(relation_profiles, keys), {("measurement", 2): "sample"})
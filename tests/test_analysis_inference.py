@@ -43,6 +43,7 @@ class TestAnalysisInference(unittest.TestCase):
             "max_length": -1,
             "is_key": True,
             "include_alternate": False,
+            "format": None,
             "max_seen_decimals": -1
         })
 
@@ -56,6 +57,7 @@ class TestAnalysisInference(unittest.TestCase):
             "max_length": -1,
             "is_key": False,
             "include_alternate": False,
+            "format": None,
             "max_seen_decimals": -1
         })
 
@@ -69,6 +71,7 @@ class TestAnalysisInference(unittest.TestCase):
             "max_length": -1,
             "is_key": False,
             "include_alternate": False,
+            "format": None,
             "max_seen_decimals": -1
         })
 
@@ -82,6 +85,7 @@ class TestAnalysisInference(unittest.TestCase):
             "max_length": -1,
             "is_key": False,
             "include_alternate": False,
+            "format": None,
             "max_seen_decimals": -1
         })
 
@@ -95,6 +99,7 @@ class TestAnalysisInference(unittest.TestCase):
             "max_length": 11,  # 4 digits + decimal point + 2 digits after decimal + (constant 4) TODO: good formula?
             "is_key": False,
             "include_alternate": False,
+            "format": None,
             "max_seen_decimals": 2
         })
 
@@ -108,5 +113,16 @@ class TestAnalysisInference(unittest.TestCase):
             "max_length": 12,  # 4 digits + decimal point + 3 digits after decimal + (constant 4) TODO: good formula?
             "is_key": False,
             "include_alternate": False,
+            "format": None,
             "max_seen_decimals": 3
         })
+
+    def test_date_format(self):
+        inference = pa.infer_column_type("rel", "test", ("2020-01-05", "05/01/2020", "2020-02-05", "2020-01-05", ""),
+                                         EXISTING_KEY)
+        self.assertEqual(inference["detected_type"], "date")
+        self.assertEqual(inference["format"], "%Y-%m-%d")
+
+        inference = pa.infer_column_type("rel", "test", ("12:30", "13:45", "12:30"), EXISTING_KEY)
+        self.assertEqual(inference["detected_type"], "time")
+        self.assertEqual(inference["format"], "%H:%M")
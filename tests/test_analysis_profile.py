@@ -0,0 +1,290 @@
+# PyTrackDat is a utility for assisting in online database creation.
+# Copyright (C) 2018-2020 the PyTrackDat authors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Contact information:
+#     David Lougheed (david.lougheed@gmail.com)
+
+import csv
+import gzip
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+from contextlib import redirect_stdout
+from unittest import mock
+
+import pytrackdat.analysis as pa
+from pytrackdat.analysis.profile import SUMMARY_VALUES_CAP
+
+
+SPECIMENS_FILE = "./example/data/specimens.csv"
+
+
+class TestAnalysisProfile(unittest.TestCase):
+    def test_streamed_profiles_match_column_inference(self):
+        data, fields = pa.extract_data_from_relation_file(SPECIMENS_FILE)
+        p_fields, profiles = pa.profile_relation_file(SPECIMENS_FILE)
+
+        self.assertEqual(fields, p_fields)
+
+        for i, (f, profile) in enumerate(zip(fields, profiles)):
+            self.assertEqual(profile.rows, len(data))
+            self.assertDictEqual(
+                pa.infer_column_type_from_profile("specimens", f, profile),
+                pa.infer_column_type("specimens", f, tuple(d[i] for d in data)))
+
+    def test_profile_distinct_values(self):
+        profile = pa.ColumnProfile()
+        profile.update(["a", "b", "a", " a "])
+        self.assertEqual(profile.rows, 4)
+        self.assertEqual(profile.distinct_values, 2)
+        self.assertEqual(profile.value_counts["a"], 3)
+
+    def test_profile_distinct_cap(self):
+        values = ["1", "2", "3", "4", "x", "", "1", "5.5"]
+
+        capped = pa.ColumnProfile(distinct_cap=3)
+        capped.update(values)
+        self.assertTrue(capped.distinct_overflow)
+        self.assertEqual(capped.rows, len(values))
+        self.assertIn("", capped.value_counts)
+
+        full = pa.ColumnProfile()
+        full.update(values)
+        self.assertFalse(full.distinct_overflow)
+
+        for k in ("rows", "integer_values", "decimal_values", "max_seen_length", "max_seen_decimals"):
+            self.assertEqual(getattr(capped.summary(), k), getattr(full.summary(), k))
+
+        merged = pa.ColumnProfile.from_dict(capped.to_dict())
+        merged.merge(full)
+        self.assertEqual(merged.rows, 2 * len(values))
+        self.assertEqual(merged.summary().integer_values, 2 * full.summary().integer_values)
+
+    def test_parallel_profiles_match_serial(self):
+        relations = (("specimens", SPECIMENS_FILE), ("sites", "./example/data/sites.csv"))
+        serial = pa.profile_relations(relations, jobs=1)
+        parallel = pa.profile_relations(relations, jobs=3)
+
+        self.assertEqual([(rn, fields) for rn, fields, _ in serial], [(rn, fields) for rn, fields, _ in parallel])
+
+        for (rn, fields, s_profiles), (_, _, p_profiles) in zip(serial, parallel):
+            for f, sp, pp in zip(fields, s_profiles, p_profiles):
+                self.assertDictEqual(pa.infer_column_type_from_profile(rn, f, sp),
+                                     pa.infer_column_type_from_profile(rn, f, pp))
+
+    def test_sampled_relation(self):
+        data, fields = pa.extract_data_from_relation_file(SPECIMENS_FILE)
+
+        s_fields, profiles, total_rows = pa.sample_relation_file(SPECIMENS_FILE, 10)
+        self.assertEqual(s_fields, fields)
+        self.assertEqual(total_rows, len(data))
+        self.assertTrue(all(p.rows == 10 for p in profiles))
+
+        # Sampling is seeded, so repeated runs see the same rows
+        _, profiles_2, _ = pa.sample_relation_file(SPECIMENS_FILE, 10)
+        self.assertEqual([p.value_counts for p in profiles], [p.value_counts for p in profiles_2])
+
+        # A sample at least as large as the relation contains all of it
+        _, full_profiles, _ = pa.sample_relation_file(SPECIMENS_FILE, len(data) + 5)
+        self.assertTrue(all(p.rows == len(data) for p in full_profiles))
+
+    def test_inference_confidence(self):
+        profile = pa.ColumnProfile()
+        profile.update(["1", "2", "3", "-", "-", "bad"] + ["4"] * 94)
+        inference = pa.infer_column_type_from_profile("rel", "test", profile, {"rel": ("key", ())})
+        self.assertEqual(inference["detected_type"], "integer")
+        self.assertAlmostEqual(pa.inference_confidence(profile, inference), 0.97)
+
+        profile = pa.ColumnProfile()
+        profile.update(["1", "2", "", ""])
+        inference = pa.infer_column_type_from_profile("rel", "test", profile, {"rel": ("key", ())})
+        self.assertTrue(inference["nullable"])
+        self.assertEqual(pa.inference_confidence(profile, inference), 1.0)
+
+    def test_encoded_columns(self):
+        relation = pa.read_relation_columns(SPECIMENS_FILE)
+        data, fields = pa.extract_data_from_relation_file(SPECIMENS_FILE)
+
+        self.assertEqual(relation.fields, fields)
+        self.assertEqual(relation.rows, len(data))
+
+        for i, (f, col) in enumerate(zip(fields, relation.columns)):
+            plain_col = [d[i] for d in data]
+            self.assertEqual(list(col), plain_col)
+            self.assertEqual(len(col.values), len(set(plain_col)))
+            self.assertDictEqual(pa.infer_column_type("specimens", f, col),
+                                 pa.infer_column_type("specimens", f, plain_col))
+
+        col = pa.EncodedColumn(["a", "b", "a"])
+        col[1] = "c"
+        self.assertEqual(list(col), ["a", "c", "a"])
+
+    def test_chunked_profiles_match_serial(self):
+        with tempfile.TemporaryDirectory() as td:
+            rf = os.path.join(td, "quoted.csv")
+            with open(rf, "w", encoding="utf-8", newline="") as fh:
+                fh.write("\ufeffid,notes,count\r\n")
+                for i in range(200):
+                    fh.write('{},"line one\nline ""{}"", two",{}\r\n'.format(i, i % 7, i % 3))
+                    if i % 50 == 0:
+                        fh.write(",,\r\n")
+
+            fields, serial = pa.profile_relation_file(rf)
+            c_fields, chunks = pa.find_chunk_boundaries(rf, 8, min_chunk_size=1)
+
+            self.assertEqual(fields, c_fields)
+            self.assertEqual(len(chunks), 8)
+
+            merged = [pa.ColumnProfile() for _ in fields]
+            for start, end in chunks:
+                for p, cp in zip(merged, pa.profile_relation_chunk(rf, start, end, len(fields))):
+                    p.merge(cp)
+
+            for sp, mp in zip(serial, merged):
+                self.assertEqual(sp.rows, 200)
+                self.assertEqual(sp.rows, mp.rows)
+                self.assertDictEqual(sp.value_counts, mp.value_counts)
+
+    def test_overflowed_key_detection(self):
+        with tempfile.TemporaryDirectory() as td:
+            rf = os.path.join(td, "keys.csv")
+            with open(rf, "w", encoding="utf-8") as fh:
+                fh.write("near_key,key\n")
+                for i in range(500):
+                    fh.write("{},{}\n".format(i if i < 499 else 100, i))
+
+            data, fields = pa.extract_data_from_relation_file(rf)
+            profiles = [pa.ColumnProfile(distinct_cap=10) for _ in fields]
+            for row in data:
+                for p, v in zip(profiles, row):
+                    p.add(v)
+
+            for p in profiles:
+                self.assertTrue(p.distinct_overflow)
+                self.assertAlmostEqual(p.distinct_estimate(), 500, delta=25)
+                # Overflowed values cannot be compared, so the duplicate 100 is not spotted until the exact check
+                self.assertTrue(p.may_be_unique())
+                self.assertFalse(p.is_unique())
+
+            relation_profiles = [("keys", fields, profiles)]
+            with redirect_stdout(io.StringIO()):
+                self.assertEqual(pa.verify_relation_keys(relation_profiles, [("keys", rf)]), ["keys"])
+                keys = pa.find_relation_keys(relation_profiles)
+
+            self.assertFalse(profiles[0].exact_unique)
+            self.assertTrue(profiles[1].exact_unique)
+            self.assertEqual(keys["keys"][0], "key")
+
+            profiles[1].merge(pa.profile_relation_file(rf)[1][1])
+            self.assertTrue(profiles[1].has_duplicates)
+            self.assertFalse(profiles[1].may_be_unique())
+
+    def test_compressed_relation_file(self):
+        with tempfile.TemporaryDirectory() as td:
+            rf = os.path.join(td, "specimens.csv.gz")
+            with open(SPECIMENS_FILE, "rb") as fh, gzip.open(rf, "wb") as gz:
+                gz.write(fh.read())
+
+            self.assertEqual(pa.extract_data_from_relation_file(rf), pa.extract_data_from_relation_file(SPECIMENS_FILE))
+
+            with redirect_stdout(io.StringIO()):
+                (_rn, fields, profiles), = pa.profile_relations((("specimens", rf),), jobs=2)
+
+            self.assertEqual([p.value_counts for p in profiles],
+                             [p.value_counts for p in pa.profile_relation_file(SPECIMENS_FILE)[1]])
+
+    def test_sharded_relation(self):
+        data, fields = pa.extract_data_from_relation_file(SPECIMENS_FILE)
+
+        with tempfile.TemporaryDirectory() as td:
+            for i in range(3):
+                with open(os.path.join(td, "day_{}.csv".format(i)), "w", encoding="utf-8", newline="") as fh:
+                    writer = csv.writer(fh)
+                    writer.writerow(fields)
+                    writer.writerows(data[i::3])
+
+            shards = pa.find_relation_shards(td)
+            self.assertEqual(shards, pa.find_relation_shards(os.path.join(td, "day_*.csv")))
+            self.assertEqual(len(shards), 3)
+
+            self.assertEqual(sorted(pa.extract_data_from_relation_file(shards)[0]), sorted(data))
+
+            full = pa.profile_relation_file(SPECIMENS_FILE)[1]
+            for jobs in (1, 2):
+                with redirect_stdout(io.StringIO()):
+                    (rn, s_fields, profiles), = pa.profile_relations((("specimens", shards),), jobs=jobs)
+                self.assertEqual((rn, s_fields), ("specimens", fields))
+                self.assertEqual([p.value_counts for p in profiles], [p.value_counts for p in full])
+                self.assertEqual([p.has_duplicates for p in profiles], [p.has_duplicates for p in full])
+
+            with open(os.path.join(td, "day_3.csv"), "w", encoding="utf-8") as fh:
+                fh.write("other,fields\n1,2\n")
+
+            with redirect_stdout(io.StringIO()), self.assertRaises(SystemExit):
+                pa.profile_relations((("specimens", pa.find_relation_shards(td)),))
+
+    def test_merge_overlapping_summaries(self):
+        summary = pa.ColumnSummary()
+        for v in ("0", "1", "a", "b", "1-2"):
+            summary.add(v)
+
+        other = pa.ColumnSummary()
+        for v in ("0", "1", "2", "a", "c", "1-2", "3-4"):
+            other.add(v)
+
+        summary.merge(other)
+        self.assertEqual(summary.integer_values_set, {0, 1, 2})
+        self.assertEqual(summary.non_numeric_values, {"a", "b", "c", "1-2", "3-4"})
+        self.assertEqual(summary.other_values, {"a", "b", "c", "1-2", "3-4"})
+        self.assertEqual(summary.rows, 12)
+
+        # Values kept by both summaries do not use up the slots left under the cap
+        almost_full = pa.ColumnSummary()
+        for i in range(SUMMARY_VALUES_CAP - 1):
+            almost_full.add("v{:02}".format(i))
+        almost_full.merge(almost_full.from_dict(almost_full.to_dict()))
+        self.assertEqual(len(almost_full.non_numeric_values), SUMMARY_VALUES_CAP - 1)
+
+        other = pa.ColumnSummary()
+        for v in ("v00", "v01", "x"):
+            other.add(v)
+        almost_full.merge(other)
+        self.assertIn("x", almost_full.non_numeric_values)
+        self.assertEqual(len(almost_full.non_numeric_values), SUMMARY_VALUES_CAP)
+
+    def test_mixed_case_relation_paths(self):
+        with tempfile.TemporaryDirectory() as td:
+            os.makedirs(os.path.join(td, "Data"))
+            with open(SPECIMENS_FILE, "r") as sf, \
+                    open(os.path.join(td, "Data", "Specimens_1.csv"), "w", encoding="utf-8") as fh:
+                fh.write(sf.read())
+
+            design_file = os.path.join(td, "design.csv")
+            argv = ["ptd-analyze", "--no-cache", design_file, "Specimens", os.path.join(td, "Data", "Specimens_*.csv")]
+
+            with mock.patch.object(sys, "argv", argv), redirect_stdout(io.StringIO()):
+                pa.main()
+
+            with open(design_file, "r") as df:
+                self.assertEqual(next(csv.reader(df))[0], "Specimens")
+
+            # Names which only differ by case would become the same relation
+            with mock.patch.object(sys, "argv", argv + ["specimens", SPECIMENS_FILE]), \
+                    redirect_stdout(io.StringIO()), self.assertRaises(SystemExit):
+                pa.main()
@@ -0,0 +1,112 @@
+# PyTrackDat is a utility for assisting in online database creation.
+# Copyright (C) 2018-2020 the PyTrackDat authors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Contact information:
+#     David Lougheed (david.lougheed@gmail.com)
+
+import csv
+import io
+import unittest
+
+from contextlib import redirect_stdout
+
+import pytrackdat.analysis as pa
+from pytrackdat.common import DT_FOREIGN_KEY, DT_INTEGER
+
+
+def _read_csv(rf):
+    with open(rf, "r", encoding="utf-8-sig") as fh:
+        return list(csv.reader(fh))
+
+
+class TestAnalysisTables(unittest.TestCase):
+    def setUp(self):
+        self.specimens = _read_csv("./example/data/specimens.csv")
+        self.sites = _read_csv("./example/data/sites.csv")
+
+    def test_tables_match_relation_files(self):
+        specimen_columns = {f: [r[i] if i < len(r) else "" for r in self.specimens[1:]]
+                            for i, f in enumerate(self.specimens[0])}
+        site_rows = [dict(zip(self.sites[0], r)) for r in self.sites[1:]]
+
+        design_file_rows = pa.analyze_relations({"specimens": specimen_columns, "sites": site_rows})
+        self.assertEqual(design_file_rows, pa.analyze_relations({"specimens": iter(self.specimens),
+                                                                  "sites": self.sites}))
+
+        for rn, rf, table in (("specimens", "./example/data/specimens.csv", specimen_columns),
+                              ("sites", "./example/data/sites.csv", site_rows)):
+            fields, profiles = pa.profile_relation_file(rf)
+            t_fields, t_profiles = pa.profile_table(table)
+            self.assertEqual(fields, t_fields)
+            self.assertEqual([p.value_counts for p in profiles], [p.value_counts for p in t_profiles])
+
+        # Foreign keys are found between in-memory tables too
+        self.assertIn(["Site Name", "site_name", DT_FOREIGN_KEY], [r[:3] for r in design_file_rows])
+
+    def test_missing_values(self):
+        _fields, (_id, profile) = pa.profile_table({"id": [1, 2, 3, 4, 5], "count": [1, 2, None, float("nan"), 3]})
+        self.assertEqual(profile.rows, 5)
+        self.assertEqual(profile.value_counts[""], 2)
+
+        with redirect_stdout(io.StringIO()):
+            inference = pa.infer_column_type_from_profile("r", "count", profile)
+
+        self.assertEqual(inference["detected_type"], DT_INTEGER)
+        self.assertTrue(inference["nullable"])
+
+    def test_blank_rows_skipped_in_every_kind_of_table(self):
+        fields = ("id", "count")
+        rows = [(1, 5), (None, None), (2, None), ("", float("nan")), (3, 7)]
+
+        class DataFrame:
+            # Just enough of a pandas data frame for profile_table
+            columns = fields
+            iloc = None
+
+            def __getitem__(self, c):
+                return [r[fields.index(c)] for r in rows]
+
+        tables = [
+            [fields, *rows],
+            [dict(zip(fields, r)) for r in rows],
+            {f: [r[i] for r in rows] for i, f in enumerate(fields)},
+            DataFrame(),
+        ]
+
+        expected = [p.to_dict() for p in pa.profile_table(tables[0])[1]]
+        self.assertEqual([p["rows"] for p in expected], [3, 3])
+        for table in tables[1:]:
+            self.assertEqual([p.to_dict() for p in pa.profile_table(table)[1]], expected)
+
+        try:
+            import numpy as np
+        except ImportError:
+            return
+
+        records = np.array([(r[0], np.nan if r[1] is None else r[1]) for r in rows],
+                           dtype=[("id", "O"), ("count", "f8")])
+        self.assertEqual([p.rows for p in pa.profile_table(records)[1]], [3, 3])
+
+    def test_numpy_record_array(self):
+        try:
+            import numpy as np
+        except ImportError:
+            self.skipTest("NumPy is not installed")
+
+        table = np.array([(i, i * 0.5) for i in range(50)], dtype=[("id", "i8"), ("weight", "f8")])
+        fields, profiles = pa.profile_table(table)
+        self.assertEqual(fields, ("id", "weight"))
+        self.assertEqual(profiles[0].summary().integer_values, 50)
@@ -0,0 +1,66 @@
+# PyTrackDat is a utility for assisting in online database creation.
+# Copyright (C) 2018-2020 the PyTrackDat authors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Contact information:
+#     David Lougheed (david.lougheed@gmail.com)
+
+
+import random
+import unittest
+
+import pytrackdat.analysis as pa
+from pytrackdat.analysis.vectorized import MIN_VECTORIZED_VALUES, NUMPY_AVAILABLE
+
+
+# Values near the edges of what counts as a plain integer or decimal
+EDGE_CASES = ("0", "-0", "+0", "007", "+5", "-12", "5.", ".5", "-.5", "+.50", "1.2.3", "1e5", "1.5E-3", "1,000",
+              "1 000.5", "-", ".", "+", "", "2020-01-05", "05/01/2020", "12:30", "12:30:00", "٣", "9" * 40,
+              "1\x00", "NA", "n/a")
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "NumPy is not installed")
+class TestAnalysisVectorized(unittest.TestCase):
+    def assert_summaries_match(self, value_counts):
+        self.assertGreaterEqual(len(value_counts), MIN_VECTORIZED_VALUES)
+
+        one_by_one = pa.ColumnSummary()
+        for v, n in value_counts.items():
+            one_by_one.add(v, n)
+
+        self.assertDictEqual(pa.ColumnSummary.from_value_counts(value_counts).to_dict(), one_by_one.to_dict())
+
+    def test_edge_cases(self):
+        value_counts = {v: i + 1 for i, v in enumerate(EDGE_CASES)}
+        value_counts.update({str(i): 1 for i in range(1, MIN_VECTORIZED_VALUES)})
+        self.assert_summaries_match(value_counts)
+
+    def test_random_columns(self):
+        rng = random.Random(1)
+        alphabet = "0123456789+-.e, /:"
+
+        for _ in range(50):
+            value_counts = {}
+            while len(value_counts) < MIN_VECTORIZED_VALUES:
+                r = rng.random()
+                if r < 0.4:
+                    v = str(rng.randint(-1000, 1000))
+                elif r < 0.8:
+                    v = "{:.{}f}".format(rng.uniform(-100, 100), rng.randint(0, 4))
+                else:
+                    v = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 6))).strip()
+                value_counts[v] = rng.randint(1, 3)
+
+            self.assert_summaries_match(value_counts)
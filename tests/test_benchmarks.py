@@ -0,0 +1,50 @@
+# PyTrackDat is a utility for assisting in online database creation.
+# Copyright (C) 2018-2020 the PyTrackDat authors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Contact information:
+#     David Lougheed (david.lougheed@gmail.com)
+
+import io
+import unittest
+
+from contextlib import redirect_stdout
+
+from benchmarks import bench_analysis, bench_generation
+from benchmarks.datasets import COLUMN_KINDS, generate_column
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_generators_are_seeded(self):
+        for kind in COLUMN_KINDS:
+            self.assertEqual(generate_column(kind, 100), generate_column(kind, 100))
+            self.assertNotEqual(generate_column(kind, 100, seed=1), generate_column(kind, 100, seed=2))
+
+    def test_benchmarks_run(self):
+        with redirect_stdout(io.StringIO()):
+            results = bench_analysis.run_benchmarks(100, 100, ["integer", "key"], memory=False)
+            regressions = bench_analysis.compare_to_baseline(results, {
+                "python_version": "", "platform": "", "results": [dict(r, rows_per_second=1) for r in results]})
+
+        self.assertEqual([r["detected_type"] for r in results[:2]], ["integer", "manual key"])
+        self.assertEqual(results[2]["benchmark"], "analyze_relation_file")
+        self.assertEqual(regressions, 0)
+
+    def test_generation_benchmarks_run(self):
+        with redirect_stdout(io.StringIO()):
+            results = bench_generation.run_benchmarks(10, 12, memory=False)
+
+        self.assertEqual([r["benchmark"] for r in results], ["design_to_relations", "generate_code"])
+        self.assertTrue(all(r["fields"] == 120 for r in results))
@@ -17,10 +17,19 @@
 # Contact information:
 #     David Lougheed (david.lougheed@gmail.com)
 
+import bz2
+import copy
+import gzip
 import io
+import lzma
+import os
+import pickle
+import tempfile
 import unittest
+import zipfile
 
 from contextlib import redirect_stdout
+from datetime import datetime
 
 from pytrackdat.common import *
 
@@ -68,3 +77,81 @@ class TestCommonMethods(unittest.TestCase):
         with redirect_stdout(lf):
             print_license()
             self.assertGreater(len(lf.getvalue()), 0)
+
+    def test_compressed_text_files(self):
+        contents = "\ufeffa,b\n1,caf\u00e9\n"
+        raw = contents.encode("utf-8")
+
+        with tempfile.TemporaryDirectory() as td:
+            paths = {None: os.path.join(td, "plain.csv"), COMPRESSION_GZIP: os.path.join(td, "data.csv.gz"),
+                     COMPRESSION_BZ2: os.path.join(td, "data.csv.bz2"), COMPRESSION_XZ: os.path.join(td, "data.xz"),
+                     COMPRESSION_ZIP: os.path.join(td, "data.zip")}
+
+            with open(paths[None], "wb") as fh:
+                fh.write(raw)
+            for compression, module in ((COMPRESSION_GZIP, gzip), (COMPRESSION_BZ2, bz2), (COMPRESSION_XZ, lzma)):
+                with module.open(paths[compression], "wb") as fh:
+                    fh.write(raw)
+            with zipfile.ZipFile(paths[COMPRESSION_ZIP], "w") as zf:
+                zf.writestr("README.txt", "not data")
+                zf.writestr("data/data.csv", raw)
+
+            for compression, path in paths.items():
+                self.assertEqual(detect_compression(path), compression)
+
+                with open_text_file(path) as fh:
+                    self.assertEqual(fh.read(), contents.lstrip("\ufeff"))
+
+                # File objects work too (e.g. uploaded files)
+                with open(path, "rb") as fh, open_text_file(fh) as text:
+                    self.assertEqual(text.read(), contents.lstrip("\ufeff"))
+
+    def test_date_time_parsers(self):
+        values = ("2020-01-05", "2020-1-5", "05/01/2020", "2020/01/05", "not a date", "")
+
+        for fmt in (None, "%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y"):
+            parse = make_date_time_parser(DT_DATE, fmt)
+            self.assertEqual(parse("2020-01-05"), datetime(2020, 1, 5))
+            self.assertEqual(parse("2020-1-5"), datetime(2020, 1, 5))
+            self.assertEqual(parse("2020/01/05"), datetime(2020, 1, 5))
+            self.assertIsNone(parse("not a date"))
+            self.assertIsNone(parse(""))
+            self.assertIsNone(parse("12:30"))
+
+        # The column's format takes precedence over the default reading of ambiguous dates
+        self.assertEqual(make_date_time_parser(DT_DATE)(values[2]), datetime(2020, 1, 5))
+        self.assertEqual(make_date_time_parser(DT_DATE, "%m/%d/%Y")(values[2]), datetime(2020, 5, 1))
+
+        # Values shaped like dates which are not real dates are not parsed, with or without a column format
+        for fmt in (None, "%Y-%m-%d", "%d/%m/%Y"):
+            parse = make_date_time_parser(DT_DATE, fmt)
+            self.assertIsNone(parse("2020-02-30"))
+            self.assertIsNone(parse("31/04/2020"))
+        self.assertIsNone(make_date_time_parser(DT_TIME)("25:61"))
+
+        parse = make_date_time_parser(DT_TIME, "%H:%M")
+        self.assertEqual(parse("12:30"), datetime(1900, 1, 1, 12, 30))
+        self.assertEqual(parse("12:30:15"), datetime(1900, 1, 1, 12, 30, 15))
+        self.assertIsNone(parse("2020-01-05"))
+
+    def test_relations_are_immutable(self):
+        field = RelationField(("Sex",), "sex", DT_TEXT, True, ("",), None, "Sex", True, ("1", "F; M"), ("F", "M"))
+        relation = Relation(" Specimens ", [field], DT_AUTO_KEY, indexes=(("sex",),))
+
+        self.assertEqual(relation.name, PDT_RELATION_PREFIX + "Specimen")
+        self.assertEqual(relation.name_lower, "specimens")
+        self.assertEqual(relation.fields, (field,))
+        self.assertEqual(dict(field)["choices"], ("F", "M"))
+        self.assertEqual(dict(relation)["fields"], (dict(field),))
+
+        for obj, attr in ((field, "choices"), (relation, "name"), (relation, "fields")):
+            with self.assertRaises(AttributeError):
+                setattr(obj, attr, None)
+            with self.assertRaises(AttributeError):
+                delattr(obj, attr)
+
+        with self.assertRaises(AttributeError):
+            field.extra = True
+
+        for copied in (pickle.loads(pickle.dumps(relation)), copy.deepcopy(relation)):
+            self.assertEqual(dict(copied), dict(relation))
@@ -20,6 +20,7 @@
 import unittest
 
 from pytrackdat.generation import design_to_relations
+from pytrackdat.generation.utils import format_literal
 from pytrackdat.generation.errors import GenerationError
 
 
@@ -43,3 +44,20 @@ class TestDesignFileParsing(unittest.TestCase):
             with open("./tests/design_files/point_field.csv") as tf:
                 # GIS mode is off, so an error should be raised.
                 design_to_relations(tf, False)
+
+    def test_literal_formatting(self):
+        values = (
+            [],
+            {"a": (), "b": ("x",), "c": None, "d": [1, 2.5, "it's"]},
+            ({"name": "n" * 50, "fields": tuple({"name": "f{}".format(i), "choices": ("a", "b")} for i in range(5))},),
+        )
+
+        for value in values:
+            for indent in (0, 8):
+                formatted = format_literal(value, indent)
+                self.assertEqual(eval(formatted), value)
+                self.assertTrue(all(len(line) + indent <= 120 for line in formatted.split("\n")))
+
+        self.assertEqual(format_literal(("x",)), "('x',)")
+        self.assertEqual(format_literal({"a": [1, 2]}), "{'a': [1, 2]}")
+        self.assertIn("\n        {'name': 'f0', 'choices': ('a', 'b')},\n", format_literal(values[2][0], 0))
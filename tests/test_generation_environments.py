@@ -0,0 +1,113 @@
+# PyTrackDat is a utility for assisting in online database creation.
+# Copyright (C) 2018-2019 the PyTrackDat authors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Contact information:
+#     David Lougheed (david.lougheed@gmail.com)
+
+
+import os
+import subprocess
+import tempfile
+import unittest
+
+from unittest import mock
+
+from pytrackdat.generation.environments import *
+from pytrackdat.generation.errors import GenerationError
+
+
+class TestGenerationEnvironments(unittest.TestCase):
+    def test_requirements_key(self):
+        with tempfile.TemporaryDirectory() as td:
+            rf = os.path.join(td, "requirements.txt")
+            with open(rf, "w") as fh:
+                fh.write("Django>=2.2.15,<3.0\n")
+
+            key = requirements_key([rf])
+            self.assertEqual(key, requirements_key([rf]))
+
+            with open(rf, "a") as fh:
+                fh.write("six\n")
+
+            self.assertNotEqual(key, requirements_key([rf]))
+            self.assertNotEqual(requirements_key([rf]), requirements_key([rf, rf]))
+
+    def test_cached_entries(self):
+        with tempfile.TemporaryDirectory() as td:
+            rf = os.path.join(td, "requirements.txt")
+            with open(rf, "w") as fh:
+                fh.write("six\n")
+
+            cache = EnvironmentCache(os.path.join(td, "cache"), offline=True)
+
+            with self.assertRaises(GenerationError):
+                cache.wheelhouse([rf])
+
+            # Finished entries are used as they are, without running anything
+            wheelhouse = os.path.join(td, "cache", "wheelhouses", requirements_key([rf]))
+            os.makedirs(wheelhouse)
+            with open(os.path.join(wheelhouse, ".complete"), "w"):
+                pass
+
+            with mock.patch.object(subprocess, "run", side_effect=AssertionError("should not run")):
+                self.assertEqual(cache.wheelhouse([rf]), wheelhouse)
+
+            self.assertEqual(wheelhouse_install_args(wheelhouse)[:4],
+                             ("install", "--no-index", "--find-links", wheelhouse))
+
+    def test_volatile_requirements(self):
+        with tempfile.TemporaryDirectory() as td:
+            rf = os.path.join(td, "requirements.txt")
+            with open(rf, "w") as fh:
+                fh.write("# git+https://example.org/commented.git\n"
+                         "--index-url https://pypi.org/simple\n"
+                         "six==1.15.0\n"
+                         "git+https://example.org/tool.git  # upstream\n"
+                         "-e git+https://example.org/editable.git#egg=editable\n")
+
+            self.assertEqual(volatile_requirements([rf]),
+                             ["git+https://example.org/tool.git", "git+https://example.org/editable.git#egg=editable"])
+
+            wheelhouse = os.path.join(td, "cache", "wheelhouses", requirements_key([rf]))
+            os.makedirs(wheelhouse)
+            for wheel in (".complete", "six-1.15.0-py2.py3-none-any.whl", "tool-0.1.0-py3-none-any.whl"):
+                with open(os.path.join(wheelhouse, wheel), "w"):
+                    pass
+
+            def build_wheels(args, **_kwargs):
+                wheel_dir = args[args.index("--wheel-dir") + 1]
+                os.makedirs(wheel_dir)
+                for wheel in ("tool-0.2.0-py3-none-any.whl", "editable-1.0-py3-none-any.whl"):
+                    with open(os.path.join(wheel_dir, wheel), "w"):
+                        pass
+
+            # Cached wheelhouses are used as they are, without the network, unless a refresh is asked for
+            with mock.patch.object(subprocess, "run", side_effect=AssertionError("should not run")):
+                self.assertEqual(EnvironmentCache(os.path.join(td, "cache")).wheelhouse([rf]), wheelhouse)
+
+            # Refreshing rebuilds only the volatile requirements, replacing their old wheels
+            with mock.patch.object(subprocess, "run", side_effect=build_wheels) as run:
+                self.assertEqual(EnvironmentCache(os.path.join(td, "cache"), refresh=True).wheelhouse([rf]),
+                                 wheelhouse)
+
+            self.assertEqual(run.call_args[0][0][-2:], tuple(volatile_requirements([rf])))
+            with open(os.path.join(wheelhouse, "wheels.txt")) as wf:
+                self.assertEqual([os.path.basename(w) for w in wf.read().split()],
+                                 ["editable-1.0-py3-none-any.whl", "six-1.15.0-py2.py3-none-any.whl",
+                                  "tool-0.2.0-py3-none-any.whl"])
+
+            with self.assertRaises(GenerationError):
+                EnvironmentCache(os.path.join(td, "cache"), offline=True, refresh=True)
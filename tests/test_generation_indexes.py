@@ -0,0 +1,78 @@
+# PyTrackDat is a utility for assisting in online database creation.
+# Copyright (C) 2018-2020 the PyTrackDat authors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Contact information:
+#     David Lougheed (david.lougheed@gmail.com)
+
+
+import io
+import unittest
+
+from contextlib import redirect_stdout
+
+import pytrackdat.generation as pg
+from pytrackdat.generation.errors import GenerationError
+
+
+DESIGN_FILE = "./tests/design_files/site.csv"
+
+
+class TestGenerationIndexes(unittest.TestCase):
+    def setUp(self):
+        with open(DESIGN_FILE, "r") as df:
+            self.design = df.read()
+
+    def _relations(self, specimen_settings: str = ""):
+        design = self.design.replace("specimen,new field name", "specimen,{}".format(specimen_settings), 1)
+        with redirect_stdout(io.StringIO()):
+            return pg.design_to_relations(io.StringIO(design), False)
+
+    def test_parse_index_settings(self):
+        self.assertEqual(pg.parse_index_settings(["new field name", "Index: Site Name; date_collected", "index:",
+                                                  "no index: sex;mass", "NO INDEX: *"]),
+                         ([("site_name", "date_collected")], ["sex", "mass", "*"]))
+
+    def test_automatic_index_plan(self):
+        specimen, site = self._relations()
+
+        plan = pg.plan_indexes(specimen)
+        # Filtered by the admin (choices), by range in the API (dates and decimals) and the modification time; keys
+        # and foreign keys are indexed already.
+        self.assertDictEqual(plan.db_index, {"sex": True, "date_collected": True, "mass": True,
+                                             "pdt_modified_at": True})
+        self.assertEqual(plan.composite, [])
+        self.assertIsNone(plan.field_db_index("site_name"))
+
+        self.assertDictEqual(pg.plan_indexes(site).db_index, {"visited": True, "pdt_modified_at": True})
+
+    def test_index_overrides(self):
+        specimen = self._relations('"index: site_name; date_collected",index: species,no index: mass; site_name')[0]
+        plan = pg.plan_indexes(specimen)
+        self.assertDictEqual(plan.db_index, {"sex": True, "date_collected": True, "pdt_modified_at": True,
+                                             "site_name": False, "species": True})
+        self.assertEqual(plan.composite, [("site_name", "date_collected")])
+
+        models = pg.create_models([specimen], False).getvalue()
+        self.assertIn("models.Index(fields=['site_name', 'date_collected'])", models)
+        self.assertIn("on_delete=models.CASCADE, db_index=False)", models)
+        compile(models, "models.py", "exec")
+
+        specimen = self._relations("no index: *")[0]
+        self.assertDictEqual(pg.plan_indexes(specimen).db_index, {"site_name": False})
+        self.assertNotIn("db_index=True", pg.create_models([specimen], False).getvalue())
+
+        with self.assertRaises(GenerationError):
+            self._relations("index: date_collected; missing")
@@ -0,0 +1,105 @@
+# PyTrackDat is a utility for assisting in online database creation.
+# Copyright (C) 2018-2020 the PyTrackDat authors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Contact information:
+#     David Lougheed (david.lougheed@gmail.com)
+
+
+import io
+import tempfile
+import unittest
+
+from contextlib import redirect_stdout
+
+import pytrackdat.generation as pg
+
+
+DESIGN_FILE = "./tests/design_files/site.csv"
+
+
+def _relations(design: str):
+    with redirect_stdout(io.StringIO()):
+        return pg.design_to_relations(io.StringIO(design), False)
+
+
+class TestGenerationManifest(unittest.TestCase):
+    def setUp(self):
+        with open(DESIGN_FILE, "r") as df:
+            self.design = df.read()
+
+    def test_manifest_round_trip(self):
+        relations = _relations(self.design)
+
+        with tempfile.TemporaryDirectory() as td:
+            self.assertIsNone(pg.read_manifest(td))
+
+            pg.write_manifest(td, pg.relations_manifest(relations, False))
+            manifest = pg.read_manifest(td)
+
+            self.assertFalse(manifest["gis_mode"])
+            self.assertEqual([r["name"] for r in manifest["relations"]], [r.name for r in relations])
+            self.assertFalse(pg.diff_relations(manifest, relations).has_changes)
+
+            pg.write_manifest(td, {**manifest, "version": pg.MANIFEST_VERSION + 1})
+            self.assertIsNone(pg.read_manifest(td))
+
+    def test_relation_diff(self):
+        manifest = pg.relations_manifest(_relations(self.design), False)
+
+        design = (self.design
+                  .replace("Mass,mass,decimal,true,-,,Mass in grams,false,6,2\n",
+                           "Length,length,float,true,-,,Length in mm,false,,\n")
+                  .replace("Visited,visited,boolean,false,,false", "Visited,visited,boolean,true,,false"))
+        design += ",,,,,,,,,\ncollector,,,,,,,,,\nName,name,manual key,false,,,Collector's name,true,,\n"
+
+        diff = pg.diff_relations(manifest, _relations(design))
+        self.assertTrue(diff.has_changes)
+        self.assertEqual(diff.added, ["PyTrackDatCollector"])
+        self.assertEqual(diff.removed, [])
+        self.assertEqual(diff.unchanged, [])
+        self.assertEqual([(c.name, c.added_fields, c.removed_fields, c.altered_fields) for c in diff.changed], [
+            ("PyTrackDatSpecimen", ["length"], ["mass"], []),
+            ("PyTrackDatSite", [], [], ["visited"]),
+        ])
+        self.assertIn("Added relation: PyTrackDatCollector", diff.summary())
+
+        diff = pg.diff_relations(manifest, _relations(self.design.split(",,,,,,,,,\n")[0]))
+        self.assertEqual((diff.removed, diff.unchanged), (["PyTrackDatSite"], ["PyTrackDatSpecimen"]))
+
+    def test_incremental_write(self):
+        relations = _relations(self.design)
+
+        def render(rels, secret_key=None):
+            return pg.render_site_files(
+                "test_site",
+                pg.create_admin(rels, "test_site", False).getvalue(),
+                pg.create_models(rels, False).getvalue(),
+                pg.create_api(rels, "test_site", False).getvalue(),
+                secret_key=secret_key)
+
+        with tempfile.TemporaryDirectory() as td:
+            files = render(relations)
+            self.assertEqual(len(pg.write_site_files(files, td)), sum(1 for c in files.values() if c is not None))
+
+            secret_key = pg.read_secret_key(td, "test_site")
+            self.assertIsNotNone(secret_key)
+
+            # Nothing changed, so nothing is re-written
+            self.assertEqual(pg.write_site_files(render(relations, secret_key), td), [])
+
+            # Descriptions are not used by the admin, so only the models and API change
+            changed = _relations(self.design.replace("Mass in grams", "Mass in kilograms"))
+            self.assertEqual(pg.write_site_files(render(changed, secret_key), td), ["core/api.py", "core/models.py"])
@@ -0,0 +1,102 @@
+# PyTrackDat is a utility for assisting in online database creation.
+# Copyright (C) 2018-2020 the PyTrackDat authors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Contact information:
+#     David Lougheed (david.lougheed@gmail.com)
+
+
+import os
+import tempfile
+import unittest
+
+import pytrackdat.generation as pg
+
+
+DESIGN_FILE = "./tests/design_files/site.csv"
+SECRET_KEY = "x" * 50
+
+
+def _render(gis_mode: bool = False, **kwargs) -> pg.scaffold.SiteFiles:
+    with open(DESIGN_FILE, "r") as df:
+        relations = pg.design_to_relations(df, gis_mode)
+
+    return pg.render_site_files(
+        "test_site",
+        pg.create_admin(relations, "test_site", gis_mode).getvalue(),
+        pg.create_models(relations, gis_mode).getvalue(),
+        pg.create_api(relations, "test_site", gis_mode).getvalue(),
+        gis_mode=gis_mode,
+        secret_key=SECRET_KEY,
+        **kwargs)
+
+
+class TestGenerationScaffold(unittest.TestCase):
+    def test_render_template(self):
+        self.assertEqual(pg.render_template("a {{ b }} {{b}} {{ c }}", {"b": "1", "c": "{{ b }}"}), "a 1 {{b}} {{ b }}")
+        with self.assertRaises(KeyError):
+            pg.render_template("{{ missing }}", {})
+
+    def test_site_files(self):
+        files = _render(site_url="example.org")
+
+        for path in ("manage.py", "test_site/settings.py", "test_site/urls.py", "test_site/wsgi.py", "core/apps.py",
+                     "core/migrations/__init__.py", "core/common.py", "core/import_csv.py", "Dockerfile",
+                     "requirements.txt", "core/management/commands/import_relation.py"):
+            self.assertIn(path, files)
+
+        self.assertIsNone(files["snapshots"])
+        self.assertFalse(any("__pycache__" in p or "-tpl" in p for p in files))
+
+        for path, contents in files.items():
+            if path.endswith(".py"):
+                compile(contents, path, "exec")
+
+        settings = files["test_site/settings.py"]
+        self.assertNotIn("{{", settings)
+        self.assertIn("SECRET_KEY = '{}'".format(SECRET_KEY), settings)
+        self.assertIn("'example.org'", settings)
+        self.assertIn("ROOT_URLCONF = 'test_site.urls'", settings)
+        self.assertIn("django.db.backends.sqlite3", settings)
+        self.assertNotIn("django.contrib.gis", settings)
+        self.assertIn("api_router.urls", files["test_site/urls.py"])
+        self.assertNotIn("SITE_NAME", files["Dockerfile"])
+
+        self.assertEqual(files, _render(site_url="example.org"))
+
+        # Without a fixed secret key, a new one is made for every site
+        self.assertNotEqual(pg.make_secret_key(), pg.make_secret_key())
+
+    def test_gis_site_files(self):
+        settings = _render(gis_mode=True, spatialite_library_path="/lib/spatialite.so")["test_site/settings.py"]
+        compile(settings, "settings.py", "exec")
+        self.assertIn("'django.contrib.gis',", settings)
+        self.assertIn("django.contrib.gis.db.backends.spatialite", settings)
+        self.assertIn("SPATIALITE_LIBRARY_PATH = '/lib/spatialite.so'", settings)
+
+    def test_write_site_files(self):
+        files = _render()
+
+        with tempfile.TemporaryDirectory() as td:
+            pg.write_site_files(files, td)
+
+            self.assertTrue(os.path.isdir(os.path.join(td, "snapshots")))
+            with open(os.path.join(td, "core", "models.py"), "r", encoding="utf-8") as fh:
+                self.assertEqual(fh.read(), files["core/models.py"])
+            with open(os.path.join(td, "core", "common.py"), "rb") as fh:
+                self.assertEqual(fh.read(), files["core/common.py"])
+
+            if os.name != "nt":
+                self.assertTrue(os.access(os.path.join(td, "manage.py"), os.X_OK))
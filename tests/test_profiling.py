@@ -0,0 +1,57 @@
+# PyTrackDat is a utility for assisting in online database creation.
+# Copyright (C) 2018-2020 the PyTrackDat authors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Contact information:
+#     David Lougheed (david.lougheed@gmail.com)
+
+import json
+import os
+import tempfile
+import unittest
+
+from pytrackdat.profiling import phase, profile_run
+
+
+class TestProfiling(unittest.TestCase):
+    def test_phase_without_profiling(self):
+        with phase("nothing") as ph:
+            ph["rows"] = 10
+
+    def test_profile_report(self):
+        with tempfile.TemporaryDirectory() as td:
+            report_path = os.path.join(td, "report.json")
+            stats_path = os.path.join(td, "run.prof")
+
+            with profile_run("ptd-test", report_path, stats_path):
+                with phase("outer", "relation") as outer:
+                    with phase("inner", rows=1000):
+                        data = [str(i) for i in range(1000)]
+                    outer["rows"] = len(data)
+
+            with open(report_path) as rf:
+                report = json.load(rf)
+
+            self.assertTrue(os.path.exists(stats_path))
+
+        self.assertEqual(report["command"], "ptd-test")
+        self.assertEqual([p["name"] for p in report["phases"]], ["outer", "inner"])
+
+        outer, inner = report["phases"]
+        self.assertEqual((outer["relation"], outer["depth"], outer["rows"]), ("relation", 0, 1000))
+        self.assertEqual(inner["depth"], 1)
+        self.assertGreater(inner["rows_per_second"], 0)
+        self.assertGreaterEqual(outer["peak_memory"], inner["peak_memory"])
+        self.assertGreaterEqual(report["peak_memory"], outer["peak_memory"])
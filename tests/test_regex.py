@@ -49,3 +49,29 @@ class TestRegex(unittest.TestCase):
         for i in VALID_HUMAN_INTEGERS:
             self.assertRegex(i, pc.RE_DECIMAL_HUMAN)
             self.assertRegex(i.replace(",", " "), pc.RE_DECIMAL_HUMAN)
+
+    def test_value_classification(self):
+        cases = [("1", pc.VC_INTEGER, None), ("32,000", pc.VC_INTEGER, None), ("1.5", pc.VC_DECIMAL, None),
+                 ("-1.23e10", pc.VC_FLOAT, None), ("2019-05-13", pc.VC_DATE, "%Y-%m-%d"),
+                 ("13/05/2019", pc.VC_DATE, "%d/%m/%Y"), ("12:30:01", pc.VC_TIME, "%H:%M:%S"),
+                 ("abc", pc.VC_OTHER, None), ("", pc.VC_OTHER, None)]
+        for v, vc, fmt in cases:
+            self.assertEqual(pc.classify_value(v), (vc, fmt))
+
+    def test_value_classification_matches_individual_regexes(self):
+        values = (VALID_INTEGERS + VALID_HUMAN_INTEGERS + VALID_DECIMALS + VALID_HUMAN_DECIMALS +
+                  ("007", "1 000", "1,00", "2019/5/13", "5-13-2019", "3019-01-01", "1:30", "12:30", "x1", "1e"))
+
+        for v in values:
+            if pc.RE_INTEGER.match(v) or pc.RE_INTEGER_HUMAN.match(v):
+                expected = pc.VC_INTEGER
+            elif pc.RE_DECIMAL.match(v.lower()) or pc.RE_DECIMAL_HUMAN.match(v.lower()):
+                expected = pc.VC_FLOAT if "e" in v.lower() else pc.VC_DECIMAL
+            elif any(dr.match(v) for dr, _ in pc.DATE_FORMATS):
+                expected = pc.VC_DATE
+            elif any(tr.match(v) for tr, _ in pc.TIME_FORMATS):
+                expected = pc.VC_TIME
+            else:
+                expected = pc.VC_OTHER
+
+            self.assertEqual(pc.classify_value(v)[0], expected, v)